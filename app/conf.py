@@ -26,6 +26,29 @@ class Config:
     )
     WTF_CSRF_TIME_LIMIT = None
 
+    # rendered-markdown cache (app/routes/utils.py:markdown_cache)
+    MARKDOWN_CACHE_SIZE = 4096  # max rendered HTML blocks held in memory per worker
+    MARKDOWN_CACHE_DIR = None  # optional directory shared by all workers, ex: "/tmp/decider_md_cache"
+    MARKDOWN_CACHE_DIR_MAX_FILES = 20000  # oldest files beyond this are pruned from MARKDOWN_CACHE_DIR
+    # MARKDOWN_CACHE_DIR is made 0700 - it's skipped if other users can write to it (its HTML is served as sanitized)
+
+    # index type of full-text search columns made at build time (app/utils/db/create/util.py) - "gin" or "gist"
+    SEARCH_INDEX_TYPE = "gin"
+
+    # threads per worker process running /search/full sub-searches concurrently (each holds a DB connection)
+    FULL_SEARCH_WORKERS = 4
+
+    # DB connection pool of each worker process (uWSGI: DECIDER_PROCESSES x DECIDER_THREADS, see uwsgi.ini)
+    # - pool_size + max_overflow should cover its request threads + FULL_SEARCH_WORKERS
+    # - pool_pre_ping replaces connections the DB dropped (restarts / idle timeouts) instead of failing a request
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 8,
+        "max_overflow": 4,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+
 
 class DefaultConfig(Config):
     """Database Administration Config
@@ -1,2 +1,6 @@
 from  app.domain.PSQLTxt import PSQLTxt
-from app.domain.ParsedSearchString import ParsedSearchString
\ No newline at end of file
+from app.domain.ParsedSearchString import ParsedSearchString
+from app.domain.content_generation import GenerationCache
+from app.domain.version_catalog import VersionCatalog, CatalogVersion
+from app.domain.cooccurrence_matrix import CoOccurrenceMatrix
+from app.domain.navigation_graph import NavigationGraph
@@ -0,0 +1,166 @@
+"""
+Content generation counters - lets every worker hold in-process caches of DB content and learn when they go stale
+
+- the content_generation table has one integer per scope:
+  - CATALOG_SCOPE   : the set of installed versions (and their platforms / tactics / data sources / mitigation sources)
+  - "<version>"     : any content of that ATT&CK version (installs, edits)
+  - answer_node_scope() : answer cards of a single node of a version's question tree
+  - tree_scope()        : question / answer text anywhere in a version's question tree (what tree edits change)
+  - mismappings_scope() : Mismappings of a version (edited without touching any other content of it)
+- writers (build scripts, edit routes) bump() the scopes they change, in the same transaction as the change
+- readers compare the generations a cached value was built from against current_generations() (1 query per request)
+
+This is used instead of LISTEN/NOTIFY as uWSGI workers don't hold a dedicated listening connection,
+and a single tiny-table read per request is far cheaper than the queries it saves.
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import threading
+import weakref
+
+from flask import g
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import db, ContentGeneration
+from app.version import DECIDER_APP_VERSION
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SCOPE = "catalog"
+
+# part of every generations_etag() along with DECIDER_APP_VERSION - bump it when a response's format changes
+# without an app version change, so clients holding the old body don't keep getting 304s for it
+RESPONSE_REVISION = 1
+
+
+def answer_node_scope(version, node):
+    """Scope of the answer cards shown at node ("start", Tactic ID, or base Technique ID) of a version's tree"""
+    return f"{version}:answers:{node}"
+
+
+def tree_scope(version):
+    """Scope of the question / answer text of a version's tree - bumped by tree edits, alongside their node scopes"""
+    return f"{version}:tree"
+
+
+def mismappings_scope(version):
+    """Scope of the Mismappings of a version"""
+    return f"{version}:mismappings"
+
+
+def current_generations():
+    """Returns {scope: generation} for all scopes - queried once per request and memoized on flask.g
+
+    If the table can't be read (DB built before it existed / user not granted), {} is returned;
+    caches then build once per worker and never refresh until the DB is rebuilt
+
+    Read in a savepoint: a failed read only rolls back to it, never the request's own pending changes
+    (and bumps made earlier in the request's transaction are still seen)
+    """
+    generations = g.get("content_generations")
+    if generations is None:
+        try:
+            with db.session.begin_nested():
+                generations = {row.scope: row.generation for row in ContentGeneration.query.all()}
+        except SQLAlchemyError as ex:
+            logger.warning(f"could not read content generations, in-process caches won't refresh - due to: {ex}")
+            generations = {}
+        g.content_generations = generations
+    return generations
+
+
+def bump(*scopes):
+    """Increments the generation of each scope specified, creating the scope if new
+
+    - does not commit: call before the caller's own commit so the bump is atomic with the content change
+    - creates the content_generation table if missing (DBs built before it was introduced)
+    """
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+
+    ContentGeneration.__table__.create(db.session.connection(), checkfirst=True)
+
+    stmt = pg_insert(ContentGeneration).values([{"scope": s, "generation": 1} for s in scopes])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContentGeneration.scope],
+        set_={"generation": ContentGeneration.generation + 1},
+    )
+    db.session.execute(stmt)
+
+    # next current_generations() call of this request should see the change
+    g.pop("content_generations", None)
+
+
+def generations_etag(*scopes):
+    """Returns a (strong) ETag value for content depending only on the scopes specified, or None if not available
+
+    - changes whenever any of the scopes is bumped, and on deploys changing DECIDER_APP_VERSION / RESPONSE_REVISION
+    - None when generations can't be read, as the tag would then never change with the content
+    """
+    generations = current_generations()
+    if not generations:
+        return None
+    scope_generations = "-".join(str(generations.get(scope, 0)) for scope in scopes)
+    return f"v{DECIDER_APP_VERSION}r{RESPONSE_REVISION}g{scope_generations}"
+
+
+class GenerationCache:
+    """Thread-safe in-process cache of values built from DB content, rebuilt once their content generations change
+
+    builder     : function(key) -> value, builds the value (runs queries)
+    scopes_of   : function(key) -> iterable of content scopes the value for key depends on
+    max_entries : (optional) bound on number of keys held, least-recently used keys are evicted first
+
+    Cached values are shared between requests / threads, so builders should return immutable structures
+    """
+
+    def __init__(self, builder, scopes_of, max_entries=None):
+        self._builder = builder
+        self._scopes_of = scopes_of
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (generations built from, value)
+        _generation_caches.add(self)
+
+    def get(self, key):
+        generations = current_generations()
+        stamp = tuple(generations.get(scope, 0) for scope in self._scopes_of(key))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None) and (entry[0] == stamp):
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # built outside of lock so slow builds don't block other keys - a concurrent duplicate build is harmless
+        logger.debug(f"building cached content for {key}")
+        value = self._builder(key)
+
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            if (self._max_entries is not None) and (len(self._entries) > self._max_entries):
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# uWSGI loads the app once then forks its workers (lazy-apps = false): entries built before the fork are shared
+# copy-on-write (they're immutable), but a lock held by another thread at fork time would never be released in the
+# child - so each child starts with fresh locks (needs py-call-osafterfork = true under uWSGI)
+_generation_caches = weakref.WeakSet()
+
+
+def _reset_locks_after_fork():
+    for cache in list(_generation_caches):
+        cache._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_locks_after_fork)
@@ -0,0 +1,155 @@
+"""
+Per-version in-memory CoOccurrence matrix - cart-wide suggestions without a DB join per request
+
+- the CoOccurrence rows of a version (i -implies-> j, with a score) are held as a CSR sparse matrix
+  - rows / columns are Technique indices (Techniques of the version in tech_id order)
+  - arrays from the array module keep it compact (~16 bytes per non-zero) without needing numpy
+- scoring a cart aggregates its rows (sum / max / weighted mean), followed by a heap-based top-K
+- loaded once per worker, reloaded when the version's content generation is bumped
+"""
+
+from array import array
+from dataclasses import dataclass
+import heapq
+from typing import Dict, Tuple
+
+from app.domain.content_generation import GenerationCache
+from app.models import db, CoOccurrence, Technique
+
+AGGREGATES = ("sum", "max", "mean")
+MIN_WEIGHT = 1e-6
+
+
+@dataclass(frozen=True)
+class CoOccurrenceMatrix:
+    """
+    tech_ids : Technique IDs of the version, by index
+    tech_uid : Technique UIDs of the version, by index
+    index_of : Technique ID -> index
+    indptr   : row i's entries are at [indptr[i], indptr[i + 1])
+    indices  : column (implied Technique index) of each entry
+    scores   : score of each entry
+    weights  : weight of each entry in a "mean" aggregate - j_avg / j_std, how consistently j co-occurs
+    """
+
+    tech_ids: Tuple[str, ...]
+    tech_uid: array
+    index_of: Dict[str, int]
+    indptr: array
+    indices: array
+    scores: array
+    weights: array
+
+    @property
+    def nnz(self):
+        """Number of CoOccurrences held"""
+        return len(self.indices)
+
+    def aggregate_rows(self, rows, min_score=1.0, aggregate="sum", exclude=()):
+        """Returns {column index: aggregated score} of the entries with score >= min_score in the rows specified
+
+        aggregate: one of AGGREGATES
+        - "sum"  : total of the scores
+        - "max"  : highest of the scores
+        - "mean" : mean of the scores, weighted by each entry's weight
+        exclude: column indices to leave out
+        """
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"aggregate must be one of {AGGREGATES}, not {aggregate}")
+
+        totals = {}
+        weight_totals = {}
+        indptr, indices, scores, weights = self.indptr, self.indices, self.scores, self.weights
+        for row in rows:
+            for k in range(indptr[row], indptr[row + 1]):
+                score = scores[k]
+                if score < min_score:
+                    continue
+                col = indices[k]
+                if aggregate == "sum":
+                    totals[col] = totals.get(col, 0.0) + score
+                elif aggregate == "max":
+                    totals[col] = max(totals.get(col, score), score)
+                else:
+                    totals[col] = totals.get(col, 0.0) + weights[k] * score
+                    weight_totals[col] = weight_totals.get(col, 0.0) + weights[k]
+
+        if aggregate == "mean":
+            totals = {col: total / weight_totals[col] for col, total in totals.items()}
+
+        for col in exclude:
+            totals.pop(col, None)
+        return totals
+
+    def suggest(self, tech_ids, limit=None, min_score=1.0, aggregate="sum", exclude_given=False):
+        """Returns [(Technique index, score)] implied by the Techniques specified, highest score first
+
+        - Technique IDs not in the version are ignored
+        - limit: max entries returned (None for all), selected with a heap rather than a full sort
+        - min_score / aggregate: see aggregate_rows()
+        - exclude_given: leave the specified Techniques out of the suggestions
+        """
+        rows = {self.index_of[tid] for tid in tech_ids if tid in self.index_of}
+        totals = self.aggregate_rows(rows, min_score, aggregate, exclude=rows if exclude_given else ())
+
+        # ties broken by Technique ID order
+        order_key = lambda col_score: (col_score[1], -col_score[0])  # noqa: E731
+        if limit is None:
+            return sorted(totals.items(), key=order_key, reverse=True)
+        return heapq.nlargest(limit, totals.items(), key=order_key)
+
+
+def _build_matrix(version):
+    techs = (
+        db.session.query(Technique.uid, Technique.tech_id)
+        .filter(Technique.attack_version == version)
+        .order_by(Technique.tech_id)
+    ).all()
+    tech_uid = array("i", (uid for uid, _ in techs))
+    index_of_uid = {uid: ind for ind, (uid, _) in enumerate(techs)}
+
+    # CoOccurrences only exist between Techniques of the same version
+    cooccurrences = (
+        db.session.query(
+            CoOccurrence.technique_i,
+            CoOccurrence.technique_j,
+            CoOccurrence.score,
+            CoOccurrence.j_avg,
+            CoOccurrence.j_std,
+        )
+        .join(Technique, Technique.uid == CoOccurrence.technique_i)
+        .filter(Technique.attack_version == version)
+    ).all()
+    cooccurrences.sort(key=lambda row: (index_of_uid[row[0]], index_of_uid[row[1]]))
+
+    indptr = array("i", [0] * (len(techs) + 1))
+    indices = array("i")
+    scores = array("d")
+    weights = array("d")
+    for uid_i, uid_j, score, j_avg, j_std in cooccurrences:
+        indptr[index_of_uid[uid_i] + 1] += 1
+        indices.append(index_of_uid[uid_j])
+        scores.append(score)
+        # a j that always appears equally often (std 0) is fully consistent - weigh by its average alone
+        # (kept > 0 so every mean has a non-zero denominator)
+        weights.append(max((j_avg / j_std) if j_std > 0 else j_avg, MIN_WEIGHT))
+    for row in range(len(techs)):
+        indptr[row + 1] += indptr[row]
+
+    return CoOccurrenceMatrix(
+        tech_ids=tuple(tech_id for _, tech_id in techs),
+        tech_uid=tech_uid,
+        index_of={tech_id: ind for ind, (_, tech_id) in enumerate(techs)},
+        indptr=indptr,
+        indices=indices,
+        scores=scores,
+        weights=weights,
+    )
+
+
+_matrix_cache = GenerationCache(_build_matrix, scopes_of=lambda version: (version,))
+
+
+def get_cooccurrence_matrix(version):
+    """Returns the CoOccurrenceMatrix of an installed version, reloaded from the DB only if its content changed"""
+    return _matrix_cache.get(version)
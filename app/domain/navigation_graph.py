@@ -0,0 +1,226 @@
+"""
+Per-version in-memory navigation graph of the question tree - crumbs / selectors / existence checks without queries
+
+- holds the Tactics, (Sub)Techniques, Sub lists, and Tactic placements of a version as immutable lookups
+- replaces the 6-8 queries a success page made to resolve the same nodes (incl. a LIKE '%Tabcd%' for subs)
+- entries mirror the attribute names of the ORM models they come from, so callers read them the same way
+- app paths of its pages are precomputed too, so result builders don't run url_for (a werkzeug URL build) per row
+- loaded once per worker, reloaded when the version's content generation (or its tree scope, see tree edits) is bumped
+"""
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from flask import url_for
+
+from app.domain.content_generation import GenerationCache, tree_scope
+from app.models import db, Mitigation, MitigationSource, Tactic, tactic_technique_map, Technique
+
+# graphs held per worker
+MAX_CACHED_VERSIONS = 32
+
+
+@dataclass(frozen=True)
+class NavTactic:
+    """
+    technique_ids : base Technique IDs placed under the Tactic, in tech_id order
+    """
+
+    uid: int
+    tact_id: str
+    tact_name: str
+    tact_url: str
+    tact_question: str
+    technique_ids: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class NavTechnique:
+    """
+    parent_id  : base Technique ID of a SubTechnique, None for a base Technique
+    sub_ids    : SubTechnique IDs of a base Technique, in tech_id order (empty for Subs)
+    tactic_ids : Tactic IDs the Technique is placed under
+    """
+
+    uid: int
+    tech_id: str
+    tech_name: str
+    full_tech_name: str
+    tech_url: str
+    tech_question: Optional[str]
+    parent_id: Optional[str]
+    sub_ids: Tuple[str, ...]
+    tactic_ids: FrozenSet[str]
+
+
+@dataclass(frozen=True)
+class NavigationGraph:
+    """
+    version          : ATT&CK version the graph is of
+    tactics          : Tactic ID -> NavTactic, in Tactic UID (matrix) order
+    techniques       : Technique ID -> NavTechnique, in tech_id order
+    tactic_paths     : Tactic ID -> path of its question page
+    technique_paths  : Technique ID -> path of its no-tactic success page
+    mitigation_paths : (Mitigation Source, Mitigation ID) -> path of the Mitigation's page
+
+    Paths are built with url_for once, by the request that (re)builds the graph
+    """
+
+    version: str
+    tactics: Dict[str, NavTactic]
+    techniques: Dict[str, NavTechnique]
+    tactic_paths: Dict[str, str]
+    technique_paths: Dict[str, str]
+    mitigation_paths: Dict[Tuple[str, str], str]
+
+    def tactic(self, tact_id):
+        """Returns the NavTactic of tact_id, or None if it isn't in the version"""
+        return self.tactics.get(tact_id)
+
+    def technique(self, tech_id):
+        """Returns the NavTechnique of tech_id, or None if it isn't in the version"""
+        return self.techniques.get(tech_id)
+
+    def family(self, tech_id):
+        """Returns [base, sub1, sub2, ...] NavTechniques of the base Technique of tech_id ([] if it doesn't exist)"""
+        base = self.techniques.get(tech_id.split(".")[0])
+        if base is None:
+            return []
+        return [base, *(self.techniques[sub_id] for sub_id in base.sub_ids)]
+
+    def tactic_path(self, tact_id):
+        """Returns the path of a Tactic's question page (built on the spot for a Tactic not in the version)"""
+        path = self.tactic_paths.get(tact_id)
+        if path is None:
+            path = url_for("question_.question_tactic_page", version=self.version, tactic_id=tact_id)
+        return path
+
+    def technique_path(self, tech_id, tactic_context="TA0000", end=False):
+        """Returns the path of a Technique's page - same rules as routes.utils.build_technique_url()
+        (built on the spot / to its success page for a Technique not in the version)
+
+        - tactic_context "TA0000" : no-tactic success page
+        - SubTechnique            : success page under the Tactic
+        - base Technique          : success page if end or it has no question (no Subs), else its Subs question page
+        """
+        if tactic_context == "TA0000":
+            path = self.technique_paths.get(tech_id)
+            if path is None:
+                path = url_for("question_.notactic_success", version=self.version, subpath=tech_id.replace(".", "/"))
+            return path
+
+        technique = self.techniques.get(tech_id)
+        if ("." in tech_id) or end or (technique is None) or (not technique.tech_question):
+            dest = tech_id.replace(".", "/")
+        else:
+            dest = f"{tech_id}/QnA"
+        return f"{self.tactic_path(tactic_context)}/{dest}"
+
+    def mitigation_path(self, source, mit_id, anchor=None):
+        """Returns the path of a Mitigation's page, optionally to an anchor (Technique ID) on it
+
+        (built on the spot for a Mitigation not in the version)
+        """
+        path = self.mitigation_paths.get((source, mit_id))
+        if path is None:
+            path = url_for(
+                "mitigations_.mitigation_success", version=self.version, source=source.lower(), mit_id=mit_id
+            )
+        return f"{path}#{anchor}" if anchor else path
+
+
+def _build_graph(version):
+    tactics = (
+        db.session.query(Tactic.uid, Tactic.tact_id, Tactic.tact_name, Tactic.tact_url, Tactic.tact_question)
+        .filter(Tactic.attack_version == version)
+        .order_by(Tactic.uid)
+    ).all()
+    techniques = (
+        db.session.query(
+            Technique.uid,
+            Technique.tech_id,
+            Technique.tech_name,
+            Technique.full_tech_name,
+            Technique.tech_url,
+            Technique.tech_question,
+        )
+        .filter(Technique.attack_version == version)
+        .order_by(Technique.tech_id)
+    ).all()
+    placements = (
+        db.session.query(Tactic.tact_id, Technique.tech_id)
+        .join(tactic_technique_map, tactic_technique_map.c.tactic == Tactic.uid)
+        .join(Technique, tactic_technique_map.c.technique == Technique.uid)
+        .filter(Tactic.attack_version == version)
+    ).all()
+    mitigations = (
+        db.session.query(MitigationSource.source, Mitigation.mit_id)
+        .join(Mitigation, Mitigation.mitigation_source == MitigationSource.uid)
+        .filter(MitigationSource.attack_version == version)
+    ).all()
+
+    tactic_ids_of = {tech_id: set() for _, tech_id, *_ in techniques}
+    technique_ids_of = {tact_id: [] for _, tact_id, *_ in tactics}
+    for tact_id, tech_id in placements:
+        tactic_ids_of[tech_id].add(tact_id)
+        if "." not in tech_id:
+            technique_ids_of[tact_id].append(tech_id)
+
+    # tech_id order has each base directly followed by its subs
+    sub_ids_of = {tech_id: [] for _, tech_id, *_ in techniques if "." not in tech_id}
+    for _, tech_id, *_ in techniques:
+        if "." in tech_id:
+            sub_ids_of[tech_id.split(".")[0]].append(tech_id)
+
+    return NavigationGraph(
+        version=version,
+        tactics={
+            tact_id: NavTactic(
+                uid, tact_id, tact_name, tact_url, tact_question, tuple(sorted(technique_ids_of[tact_id]))
+            )
+            for uid, tact_id, tact_name, tact_url, tact_question in tactics
+        },
+        techniques={
+            tech_id: NavTechnique(
+                uid=uid,
+                tech_id=tech_id,
+                tech_name=tech_name,
+                full_tech_name=full_tech_name,
+                tech_url=tech_url,
+                tech_question=tech_question,
+                parent_id=tech_id.split(".")[0] if "." in tech_id else None,
+                sub_ids=tuple(sub_ids_of.get(tech_id, ())),
+                tactic_ids=frozenset(tactic_ids_of[tech_id]),
+            )
+            for uid, tech_id, tech_name, full_tech_name, tech_url, tech_question in techniques
+        },
+        tactic_paths={
+            tact_id: url_for("question_.question_tactic_page", version=version, tactic_id=tact_id)
+            for _, tact_id, *_ in tactics
+        },
+        technique_paths={
+            tech_id: url_for("question_.notactic_success", version=version, subpath=tech_id.replace(".", "/"))
+            for _, tech_id, *_ in techniques
+        },
+        mitigation_paths={
+            (source, mit_id): url_for(
+                "mitigations_.mitigation_success", version=version, source=source.lower(), mit_id=mit_id
+            )
+            for source, mit_id in mitigations
+        },
+    )
+
+
+# questions are held, so tree edits (which only bump tree / node scopes) reload it too
+# callers check the version is installed first - the bound is a backstop, a graph is kept per installed version
+_graph_cache = GenerationCache(
+    _build_graph, scopes_of=lambda version: (version, tree_scope(version)), max_entries=MAX_CACHED_VERSIONS
+)
+
+
+def get_navigation_graph(version):
+    """Returns the NavigationGraph of an installed version, (re)loading it from the DB only if its content changed
+
+    - check the version is installed (get_catalog()) first, an uninstalled one gets an empty graph
+    """
+    return _graph_cache.get(version)
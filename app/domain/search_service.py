@@ -176,48 +176,40 @@ def technique_search_args_are_valid(version, query, tactics, mitigation_sources,
         logger.error("request malformed - missing required field(s)")
         return False
 
-    # check version validity & get DB model
+    # check version validity & get catalog entry
     version_pick = VersionPicker(version=version)
     if not version_pick.is_valid:
         logger.error("request malformed - version specified isn't on server")
         return False
-    ver_model = version_pick.cur_version_model
+    ver_entry = version_pick.cur_version_entry
 
     # ensure that specified tactics exist
-    logger.debug(f"querying Tactics in ATT&CK {version} (to validate request)")
-    valid_tactics = {t.tact_name.replace(" ", "_").lower() for t in ver_model.tactics}
+    logger.debug(f"checking Tactics in ATT&CK {version} (to validate request)")
+    valid_tactics = {t.tact_name.replace(" ", "_").lower() for t in ver_entry.tactics}
     specified_tactics = set(tactics)
     if len(specified_tactics) != len(specified_tactics.intersection(valid_tactics)):
         logger.error("request malformed - tactic(s) specified aren't in version")
         return False
 
     # ensure that specified mitigation Sources exist
-    logger.debug(f"querying Mitigation Sources in ATT&CK {version} (to validate request)")
-    #############################################
-    #############################################
-    ## Needs to come from the database
-    ## Will require an update to the db import to
-    ## include the Mitigation_Source table
-    valid_mitigation_sources = ['ism', 'mitre', 'nist']
-    #############################################
-    #############################################
-    
+    logger.debug(f"checking Mitigation Sources in ATT&CK {version} (to validate request)")
+    valid_mitigation_sources = {s.internal_name for s in ver_entry.mitigation_sources}
     specified_mitigation_sources = set(mitigation_sources)
     if len(specified_mitigation_sources) != len(specified_mitigation_sources.intersection(valid_mitigation_sources)):
         logger.error("request malformed - mitigation Source(s) specified aren't in version")
         return False
 
     # ensure that specified platforms exist
-    logger.debug(f"querying Platforms in ATT&CK {version} (to validate request)")
-    valid_platforms = {p.internal_name for p in ver_model.platforms}
+    logger.debug(f"checking Platforms in ATT&CK {version} (to validate request)")
+    valid_platforms = {p.internal_name for p in ver_entry.platforms}
     specified_platforms = set(platforms)
     if len(specified_platforms) != len(specified_platforms.intersection(valid_platforms)):
         logger.error("request malformed - platform(s) specified aren't in version")
         return False
 
     # ensure that specified data sources exist
-    logger.debug(f"querying Data Sources in ATT&CK {version} (to validate request)")
-    valid_data_sources = {s.internal_name for s in ver_model.data_sources}
+    logger.debug(f"checking Data Sources in ATT&CK {version} (to validate request)")
+    valid_data_sources = {s.internal_name for s in ver_entry.data_sources}
     specified_data_sources = set(data_sources)
     if len(specified_data_sources) != len(specified_data_sources.intersection(valid_data_sources)):
         logger.error("request malformed - data source(s) specified aren't in version")
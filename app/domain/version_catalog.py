@@ -0,0 +1,154 @@
+"""
+Process-wide catalog of the installed ATT&CK versions and their filterable items
+
+- loaded once per worker, rebuilt only when the catalog content generation is bumped (add / remove version)
+- replaces the AttackVersion queries that used to run on every VersionPicker construction / template render
+- entries mirror the attribute names of the ORM models they come from, so callers read them the same way
+"""
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Tuple
+
+from sqlalchemy import func
+
+from app.domain.content_generation import CATALOG_SCOPE, GenerationCache
+from app.models import (
+    attack_version_platform_map,
+    AttackVersion,
+    DataSource,
+    db,
+    MitigationSource,
+    Platform,
+    Tactic,
+    tactic_technique_map,
+    Technique,
+)
+
+
+@dataclass(frozen=True)
+class CatalogPlatform:
+    uid: int
+    internal_name: str
+    readable_name: str
+
+
+@dataclass(frozen=True)
+class CatalogTactic:
+    uid: int
+    tact_id: str
+    tact_name: str
+    tact_shortname: str
+
+
+@dataclass(frozen=True)
+class CatalogDataSource:
+    uid: int
+    internal_name: str
+    readable_name: str
+
+
+@dataclass(frozen=True)
+class CatalogMitigationSource:
+    uid: int
+    source: str
+    internal_name: str  # source lowercased with spaces as underscores (how search filters refer to it)
+    display_name: str
+
+
+@dataclass(frozen=True)
+class CatalogVersion:
+    """
+    tactic_technique_pairs : (Tactic ID, Technique ID) of each Technique placement in the version's matrix
+    """
+
+    version: str
+    platforms: Tuple[CatalogPlatform, ...]
+    tactics: Tuple[CatalogTactic, ...]
+    data_sources: Tuple[CatalogDataSource, ...]
+    mitigation_sources: Tuple[CatalogMitigationSource, ...]
+    tactic_technique_pairs: FrozenSet[Tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class VersionCatalog:
+    """
+    versions   : installed version strings, oldest to newest (v{int}.{int} sorted as floats)
+    by_version : version string -> CatalogVersion
+    """
+
+    versions: Tuple[str, ...]
+    by_version: Dict[str, CatalogVersion]
+
+    def get(self, version):
+        """Returns the CatalogVersion of version, or None if it isn't installed"""
+        return self.by_version.get(version)
+
+
+def _build_catalog(_scope):
+    versions = [v for (v,) in db.session.query(AttackVersion.version)]
+
+    platforms = {v: [] for v in versions}
+    for version, uid, internal_name, readable_name in (
+        db.session.query(
+            attack_version_platform_map.c.version,
+            Platform.uid,
+            Platform.internal_name,
+            Platform.readable_name,
+        )
+        .join(Platform, Platform.uid == attack_version_platform_map.c.platform)
+        .order_by(Platform.uid)
+    ):
+        platforms[version].append(CatalogPlatform(uid, internal_name, readable_name))
+
+    tactics = {v: [] for v in versions}
+    for version, uid, tact_id, tact_name, tact_shortname in db.session.query(
+        Tactic.attack_version, Tactic.uid, Tactic.tact_id, Tactic.tact_name, Tactic.tact_shortname
+    ).order_by(Tactic.uid):
+        tactics[version].append(CatalogTactic(uid, tact_id, tact_name, tact_shortname))
+
+    data_sources = {v: [] for v in versions}
+    for version, uid, internal_name, readable_name in db.session.query(
+        DataSource.attack_version, DataSource.uid, DataSource.internal_name, DataSource.readable_name
+    ).order_by(DataSource.uid):
+        data_sources[version].append(CatalogDataSource(uid, internal_name, readable_name))
+
+    mitigation_sources = {v: [] for v in versions}
+    for version, uid, source, internal_name, display_name in db.session.query(
+        MitigationSource.attack_version,
+        MitigationSource.uid,
+        MitigationSource.source,
+        func.lower(func.replace(MitigationSource.source, " ", "_")),
+        MitigationSource.display_name,
+    ).order_by(MitigationSource.uid):
+        mitigation_sources[version].append(CatalogMitigationSource(uid, source, internal_name, display_name))
+
+    tactic_technique_pairs = {v: set() for v in versions}
+    for version, tact_id, tech_id in (
+        db.session.query(Tactic.attack_version, Tactic.tact_id, Technique.tech_id)
+        .join(tactic_technique_map, tactic_technique_map.c.tactic == Tactic.uid)
+        .join(Technique, tactic_technique_map.c.technique == Technique.uid)
+    ):
+        tactic_technique_pairs[version].add((tact_id, tech_id))
+
+    return VersionCatalog(
+        versions=tuple(sorted(versions, key=lambda ver_str: float(ver_str.replace("v", "")))),
+        by_version={
+            v: CatalogVersion(
+                version=v,
+                platforms=tuple(platforms[v]),
+                tactics=tuple(tactics[v]),
+                data_sources=tuple(data_sources[v]),
+                mitigation_sources=tuple(mitigation_sources[v]),
+                tactic_technique_pairs=frozenset(tactic_technique_pairs[v]),
+            )
+            for v in versions
+        },
+    )
+
+
+_catalog_cache = GenerationCache(_build_catalog, scopes_of=lambda scope: (scope,))
+
+
+def get_catalog():
+    """Returns the VersionCatalog of this worker, (re)loading it from the DB only if versions changed"""
+    return _catalog_cache.get(CATALOG_SCOPE)
@@ -115,6 +115,7 @@ class Technique(db.Model):
     # created in postbuild.py
     tech_ts = db.Column(TSVECTOR)  # based on tech_id, tech_description, full_tech_name
     tech_ans_ts = db.Column(TSVECTOR)  # based on tech_answer
+    tech_search_ts = db.Column(TSVECTOR)  # tech_ts + AKAs (weight C), stored - refreshed when Techniques / AKAs change
 
 
 class Aka(db.Model):
@@ -140,6 +141,9 @@ class Mismapping(db.Model):
 
 
 class CoOccurrence(db.Model):
+    # suggestion lookups read a Technique's implied Techniques above a score threshold
+    __table_args__ = (db.Index("cooccurrence_technique_i_score_index", "technique_i", "score"),)
+
     technique_i = db.Column(db.Integer, db.ForeignKey("technique.uid"), primary_key=True, nullable=False)
     technique_j = db.Column(db.Integer, db.ForeignKey("technique.uid"), primary_key=True, nullable=False)
     score = db.Column(db.Float, nullable=False)
@@ -209,6 +213,9 @@ class DataComponent(db.Model):
 
 # Mitigation Mapping Tables
 class Mitigation(db.Model):
+    # Mitigations are versioned through their source - lookups go (version ->) source -> mit_id
+    __table_args__ = (db.Index("mitigation_source_mit_id_index", "mitigation_source", "mit_id"),)
+
     uid = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Text)
     mit_id= db.Column(db.Text, nullable=False)
@@ -232,4 +239,14 @@ technique_mitigation_map = db.Table(
     db.Column("mitigation", db.Integer, db.ForeignKey("mitigation.uid")),
     db.Column("use", db.Text, nullable=True),
     UniqueConstraint("technique", "mitigation", name="uix_1"),
-)
\ No newline at end of file
+)
+
+
+class ContentGeneration(db.Model):
+    """Counter per content scope, bumped whenever that content changes (see app/domain/content_generation.py)
+    scope      : "catalog" for the set of installed versions, or an ATT&CK version string for its content
+    generation : increments on each change, lets every worker know when its in-process caches are stale
+    """
+
+    scope = db.Column(db.Text, primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
@@ -1,10 +1,15 @@
 import logging
-from app.models import CoOccurrence, Platform, db, Tactic, Technique, Mismapping, AttackVersion, DataSource
+import math
+from app.models import Platform, db, Tactic, Technique, Mismapping, AttackVersion, DataSource
 from app.models import technique_platform_map, tactic_technique_map, tactic_ds_map, technique_ds_map
 from app.routes.auth import disabled_in_kiosk
 
+from app.domain.cooccurrence_matrix import AGGREGATES, get_cooccurrence_matrix
+from app.domain.content_generation import CATALOG_SCOPE, GenerationCache, answer_node_scope, mismappings_scope
+from app.domain.navigation_graph import get_navigation_graph
+from app.domain.version_catalog import get_catalog
+
 from app.routes.utils import (
-    build_technique_url,
     is_attack_version,
     is_base_tech_id,
     is_tact_id,
@@ -14,12 +19,13 @@ from app.routes.utils import (
     DictValidator,
 )
 from app.routes.utils import ErrorDuringAJAXRoute, wrap_exceptions_as
+from app.routes.utils_db import generation_cached
 
-from flask import Blueprint, request, current_app, jsonify, g, url_for
+from flask import Blueprint, request, current_app, jsonify, g, stream_with_context
 
 from flask_login import current_user
 from sqlalchemy import asc, func, distinct, and_, or_, literal_column
-from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array
 from sqlalchemy.orm.util import aliased
 
 logger = logging.getLogger(__name__)
@@ -27,8 +33,14 @@ logger = logging.getLogger(__name__)
 api_ = Blueprint("api_", __name__)
 
 
+def version_arg_scopes(**_):
+    """Content scopes of a response that depends on the ATT&CK version in its "version" URL argument"""
+    return CATALOG_SCOPE, request.args.get("version", "")
+
+
 @api_.route("/api/versions", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(lambda: (CATALOG_SCOPE,))
 def get_versions():
     """Returns a list of strings of ATT&CK versions installed on the server (JSON response)"""
     g.route_title = "Get ATT&CK Versions Installed"
@@ -45,6 +57,7 @@ def get_versions():
 
 @api_.route("/api/mismappings", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(lambda: (*version_arg_scopes(), mismappings_scope(request.args.get("version", ""))))
 def get_mismappings():
     """Returns all mismappings for a Technique under an ATT&CK version
 
@@ -104,6 +117,7 @@ def get_mismappings():
 
 @api_.route("/api/tactics", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(version_arg_scopes)
 def get_tactics():
     """Returns all Tatics for a given ATT&CK version, including all fields or a subset if specified
 
@@ -126,6 +140,10 @@ def get_tactics():
         logger.error("request failed - version field missing / malformed")
         return jsonify(message="'version' field missing / malformed"), 400
 
+    if get_catalog().get(version) is None:
+        logger.info(f"version {version} is not installed - no Tactics to return")
+        return jsonify([]), 200
+
     logger.info(f"querying Tactics under {version}")
 
     tactics = (
@@ -139,16 +157,13 @@ def get_tactics():
 
     logger.debug(f"got {len(tactics)} Tactics")
 
+    paths = get_navigation_graph(version)
     dictified = [
         {
             "uid": tactic.uid,
             "tactic_id": tactic.tact_id,
             "tactic_name": tactic.tact_name,
-            "url": url_for(
-                "question_.question_tactic_page",
-                version=version,
-                tactic_id=tactic.tact_id
-            ),
+            "url": paths.tactic_path(tactic.tact_id),
             "techniques": [{"technique_id": technique[0], "technique_name": technique[1]} for technique in techniques],
         }
         for tactic, techniques in tactics
@@ -158,8 +173,50 @@ def get_tactics():
     return jsonify(trimmed), 200
 
 
+# field name -> columns of Technique that field needs - row attributes are named after the column labels
+TECHNIQUE_API_FIELDS = {
+    "technique_id": ("tech_id",),
+    "technique_name": ("tech_name",),
+    "attack_url": ("tech_url",),
+    "decider_url": ("tech_id",),
+    "description": ("tech_description",),
+    "platforms": (),  # aggregated subquery
+    "uid": ("uid",),
+    "tactics": (),  # aggregated subquery
+}
+
+
+def technique_api_entry(row, fields, paths):
+    """Forms an /api/techniques entry with only the fields specified from a row of get_techniques' query
+
+    paths: NavigationGraph of the version, for decider_url
+    """
+    entry = {}
+    for field in fields:
+        if field == "technique_id":
+            entry[field] = row.tech_id
+        elif field == "technique_name":
+            entry[field] = row.tech_name
+        elif field == "attack_url":
+            entry[field] = row.tech_url
+        elif field == "decider_url":
+            entry[field] = paths.technique_path(row.tech_id)  # /no_tactic/ URLs, implicit end=True
+        elif field == "description":
+            entry[field] = row.tech_description
+        elif field == "platforms":
+            entry[field] = row.platforms or []
+        elif field == "uid":
+            entry[field] = row.uid
+        elif field == "tactics":
+            entry[field] = [
+                {"tactic_id": tact[0], "tactic_name": tact[1], "attack_url": tact[2]} for tact in (row.tactics or [])
+            ]
+    return entry
+
+
 @api_.route("/api/techniques", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(version_arg_scopes, cache_bodies=False)  # streamed
 def get_techniques():
     """Returns all Techniques for a given ATT&CK version, including all fields or a subset if specified
 
@@ -169,6 +226,8 @@ def get_techniques():
     - invalid fields are ignored
     - specifying only invalid fields yields a list of empty dictionaries
 
+    The response is streamed, and carries an ETag of the version's content generation (If-None-Match -> 304)
+
     url-based request: .../api/techniques?version=VERSION&fields[]=FIELD_NAME_1&fields[]=FIELD_NAME_2
     JSON response
     """
@@ -183,42 +242,57 @@ def get_techniques():
         logger.error("request failed - version field missing / malformed")
         return jsonify(message="'version' field missing / malformed"), 400
 
-    logger.info(f"querying Techniques under {version}")
-
-    # get Techniques from database and dictify
-    techs_tacts_platforms = (
-        db.session.query(
-            Technique,
-            func.array_agg(array([Tactic.tact_id, Tactic.tact_name, Tactic.tact_url])),
-            func.array_agg(distinct(Platform.readable_name)),
+    if get_catalog().get(version) is None:
+        logger.info(f"version {version} is not installed - no Techniques to return")
+        return jsonify([]), 200
+
+    # keep field order of a full entry
+    fields = [f for f in TECHNIQUE_API_FIELDS if (not query_fields) or (f in query_fields)]
+
+    # only select what the requested fields need
+    col_names = {"uid"}.union(*(TECHNIQUE_API_FIELDS[field] for field in fields))
+    columns = [getattr(Technique, col).label(col) for col in sorted(col_names)]
+
+    if "tactics" in fields:
+        tactic_array = array([Tactic.tact_id, Tactic.tact_name, Tactic.tact_url])
+        columns.append(
+            db.session.query(func.array_agg(aggregate_order_by(tactic_array, Tactic.tact_id)))
+            .join(tactic_technique_map, tactic_technique_map.c.tactic == Tactic.uid)
+            .filter(tactic_technique_map.c.technique == Technique.uid)
+            .scalar_subquery()
+            .label("tactics")
+        )
+    if "platforms" in fields:
+        columns.append(
+            db.session.query(func.array_agg(distinct(Platform.readable_name)))
+            .join(technique_platform_map, technique_platform_map.c.platform == Platform.uid)
+            .filter(technique_platform_map.c.technique == Technique.uid)
+            .scalar_subquery()
+            .label("platforms")
         )
+
+    # Techniques of the version that are in at least 1 Tactic
+    in_a_tactic = db.session.query(tactic_technique_map.c.technique)
+    query = (
+        db.session.query(*columns)
+        .filter(Technique.attack_version == version)
+        .filter(Technique.uid.in_(in_a_tactic))
         .order_by(asc(Technique.tech_id))
-        .join(tactic_technique_map, tactic_technique_map.c.technique == Technique.uid)
-        .join(Tactic, Tactic.uid == tactic_technique_map.c.tactic)
-        .outerjoin(technique_platform_map, technique_platform_map.c.technique == Technique.uid)
-        .outerjoin(Platform, Platform.uid == technique_platform_map.c.platform)
-        .distinct(Technique.tech_id)
-        .group_by(Technique.uid)
-    ).all()
+        .yield_per(500)
+    )
 
-    logger.debug(f"got {len(techs_tacts_platforms)} Techniques")
+    logger.info(f"streaming Techniques under {version} (fields: {', '.join(fields) or 'none'})")
 
-    dictified = [
-        {
-            "technique_id": tech.tech_id,
-            "technique_name": tech.tech_name,
-            "attack_url": tech.tech_url,
-            "decider_url": build_technique_url(tech, "TA0000", version),  # /no_tactic/ URLs, implicit end=True
-            "description": tech.tech_description,
-            "platforms": platforms,
-            "uid": tech.uid,
-            "tactics": [{"tactic_id": tact[0], "tactic_name": tact[1], "attack_url": tact[2]} for tact in tactics],
-        }
-        for tech, tactics, platforms in techs_tacts_platforms
-    ]
+    paths = get_navigation_graph(version)
 
-    trimmed = trim_keys(query_fields, dictified)
-    return jsonify(trimmed), 200
+    def generate():
+        dumps = current_app.json.dumps
+        yield "["
+        for num, row in enumerate(query):
+            yield ("," if num else "") + dumps(technique_api_entry(row, fields, paths))
+        yield "]"
+
+    return current_app.response_class(stream_with_context(generate()), mimetype="application/json")
 
 
 @api_.route("/api/user_version_change", methods=["PATCH"])
@@ -262,6 +336,7 @@ def user_version_change():
 
 @api_.route("/api/techid_to_valid_tactid_map/<version>", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(lambda version: (CATALOG_SCOPE, version))
 def techid_to_valid_tactid_map(version):
     """Returns a dict that maps a TechID to a valid TacticID for it
 
@@ -307,6 +382,10 @@ def techid_to_valid_tactid_map(version):
 
 @api_.route("/api/answers/", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(
+    lambda: (CATALOG_SCOPE, answer_node_scope(request.args.get("version", ""), request.args.get("index", ""))),
+    cache_bodies=False,  # answer_cards_snapshot already holds them
+)
 def answers_api():
     """Provides the answer cards for a given position in the question tree
 
@@ -325,7 +404,7 @@ def answers_api():
     - is the ATT&CK version in which to lookup content from
 
     url-based request: .../api/answers/?index=INDEX&tactic=TACTIC_ID&version=VERSION
-    JSON response
+    JSON response (served from answer_cards_snapshot, only queried / rendered when the node's content changes)
     """
     g.route_title = "Get Answer Cards"
 
@@ -338,6 +417,39 @@ def answers_api():
         logger.error("request failed - version field malformed")
         return jsonify(message="'version' field malformed"), 400
 
+    # validate index (and tactic if needed)
+    if (index == "start") or is_tact_id(index):
+        tactic_context = None  # cards don't depend on it, keeps snapshot to 1 entry per node
+    elif is_base_tech_id(index):
+        if not is_tact_id(tactic_context):
+            logger.error("request failed - tactic field malformed")
+            return jsonify(message="'tactic' field malformed"), 400
+    else:
+        logger.error("failed - malformed request")
+        return (
+            jsonify(message='index must be "start", a Tactic ID, or a Technique ID (no SubTechniques allowed).'),
+            400,
+        )
+
+    # nothing to show for versions not installed
+    if get_catalog().get(version_context) is None:
+        logger.info(f"ATT&CK {version_context} isn't installed - there are no answer cards")
+        return jsonify([]), 200
+
+    num_answers, body = answer_cards_snapshot.get((version_context, index, tactic_context))
+    logger.debug(f"got {num_answers} answer cards")
+    return current_app.response_class(body, mimetype="application/json"), 200
+
+
+def build_answer_cards(key):
+    """Builds the JSON answer cards of a tree node - the builder of answer_cards_snapshot
+
+    key = (version_context, index, tactic_context)
+
+    returns (number of answer cards, JSON text of the cards)
+    """
+
+    version_context, index, tactic_context = key
     args = (index, tactic_context, version_context)
 
     # start -> tactics
@@ -351,25 +463,20 @@ def answers_api():
         logger.info("queried Tactic -> Technique answer cards")
 
     # technique -> subtechs / self
-    elif is_base_tech_id(index):
-        # validate tactic
-        if not is_tact_id(tactic_context):
-            logger.error("request failed - tactic field malformed")
-            return jsonify(message="'tactic' field malformed"), 400
-
+    else:
         answers = answers_api_technique(args)
         logger.info("queried Technique -> Sub-Technique answer cards")
 
-    # unknown, bad request
-    else:
-        logger.error("failed - malformed request")
-        return (
-            jsonify(message='index must be "start", a Tactic ID, or a Technique ID (no SubTechniques allowed).'),
-            400,
-        )
+    return len(answers), current_app.json.dumps(answers)
 
-    logger.debug(f"got {len(answers)} answer cards")
-    return jsonify(answers), 200
+
+# in-memory snapshot of rendered answer cards per (version, node, tactic context) - rebuilt lazily per node when
+# it is edited (see set_tact_or_tech_qna) or when versions are added / removed
+answer_cards_snapshot = GenerationCache(
+    build_answer_cards,
+    scopes_of=lambda key: (CATALOG_SCOPE, answer_node_scope(key[0], key[1])),
+    max_entries=8192,
+)
 
 
 # start -> tactics
@@ -411,13 +518,14 @@ def answers_api_start(args):
     ).all()
 
     # form answers
+    paths = get_navigation_graph(version_context)  # precomputed app paths
     answers = [
         {
             "id": tactic.tact_id,
             "content": outgoing_markdown(tactic.tact_answer or ""),
             "name": tactic.tact_name,
             "url": tactic.tact_url,
-            "path": build_technique_url(None, tactic.tact_id, version_context),
+            "path": paths.tactic_path(tactic.tact_id),
             "platforms": platforms,
             "num": num,
             "data_sources": [ds for ds in data_sources if ds],
@@ -474,20 +582,21 @@ def answers_api_tactic(args):
     ).all()
 
     # form answers
+    paths = get_navigation_graph(version_context)  # precomputed app paths
     answers = [
         {
             "id": technique.tech_id,
             "content": outgoing_markdown(technique.tech_answer or ""),
             "name": technique.tech_name,
             "url": technique.tech_url,
-            "path": build_technique_url(technique, index, version_context, num == 0),  # *
+            "path": paths.technique_path(technique.tech_id, index, num == 0),  # *
             "platforms": platforms,
             "num": num,
             "data_sources": [ds for ds in data_sources if ds],
         }
         for technique, num, platforms, data_sources in items
     ]
-    # * in build_url: end=True if Tech has 0 children (no SubTechs),
+    # * in technique_path: end=True if Tech has 0 children (no SubTechs),
     #   thus a success link is made; for Techs with Subs - a question view is made
 
     # order Technique answers alphabetically
@@ -557,17 +666,18 @@ def answers_api_technique(args):
     ).all()
 
     # form answers
+    paths = get_navigation_graph(version_context)  # precomputed app paths
     answers = []
     for technique, sub, platforms, data_sources in items:
         # sub is the BaseTech (general case)
         if sub.uid == technique.uid:
-            path = build_technique_url(technique, tactic_context, version_context, True)  # end=True, success page view
+            path = paths.technique_path(technique.tech_id, tactic_context, True)  # end=True, success page view
             content = outgoing_markdown(current_app.config["BASE_TECHNIQUE_ANSWER"])
 
         # sub is SubTechnique of BaseTech
         else:
             technique = sub
-            path = build_technique_url(technique, tactic_context, version_context)
+            path = paths.technique_path(technique.tech_id, tactic_context)
             content = outgoing_markdown(technique.tech_answer or "")
 
         answers.append(
@@ -591,20 +701,9 @@ def answers_api_technique(args):
 # ----------------------------------------------------------------------------------------------------------------------
 
 
-def version_has_co_ocs_data(version):
-    """Returns a bool on if the given ATT&CK version has CoOccurrence data for it in the DB"""
-
-    logger.debug(f"checking if ATT&CK {version} has CoOccurrence data or not")
-    exists = (
-        db.session.query(Technique.attack_version)
-        .filter(Technique.attack_version == version)
-        .join(CoOccurrence, Technique.uid == CoOccurrence.technique_i)
-    ).first()
-    return (exists is not None) and (len(exists) == 1) and (exists[0] == version)
-
-
 @api_.route("/api/cooccurrences", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
+@generation_cached(version_arg_scopes)
 def cooccurrences_api():
     """Returns CoOccurences for either a single or multiple source Techniques
 
@@ -616,7 +715,19 @@ def cooccurrences_api():
     - must be length 1+
     - must be valid Technique IDs
 
-    url-based request: .../api/cooccurrences?version=VERSION&tech_ids=TECH_1&tech_ids=TECH_2
+    limit (optional)
+    - max number of implied Techniques returned (highest scores), all are returned if absent
+
+    min_score (optional, default 1.0)
+    - CoOccurrences scoring below this aren't counted
+
+    aggregate (optional, default sum)
+    - how the scores implied by multiple Techniques are combined: sum, max, or mean (weighted by j_avg / j_std)
+
+    Scores are aggregated from the version's in-memory CoOccurrence matrix (app/domain/cooccurrence_matrix.py),
+    only the returned Techniques are then queried for their details
+
+    url-based request: .../api/cooccurrences?version=VERSION&tech_ids=TECH_1&tech_ids=TECH_2&limit=20
     JSON response
     """
     g.route_title = "Get Techniques' CoOccurrences"
@@ -634,63 +745,63 @@ def cooccurrences_api():
         return jsonify(message="Tech_IDs must be a list of strings with a length of 1+."), 400
     tech_ids = set(tech_ids)
 
+    limit = request.args.get("limit", type=int)
+    if ("limit" in request.args) and ((limit is None) or (limit < 1)):
+        logger.error("request failed - limit is malformed")
+        return jsonify(message="Limit must be an integer of 1+."), 400
+
+    min_score = request.args.get("min_score", 1.0, type=float)
+    if ("min_score" in request.args) and ((min_score is None) or (not math.isfinite(min_score))):
+        logger.error("request failed - min_score is malformed")
+        return jsonify(message="Min_score must be a number."), 400
+
+    aggregate = request.args.get("aggregate", "sum")
+    if aggregate not in AGGREGATES:
+        logger.error("request failed - aggregate is malformed")
+        return jsonify(message=f"Aggregate must be one of: {', '.join(AGGREGATES)}."), 400
+
     logger.debug(f"requesting CoOccurrences for {len(tech_ids)} Techniques under ATT&CK {version}")
 
     # check that version exists
-    version_obj = AttackVersion.query.get(version)
-    if version_obj is None:
+    if get_catalog().get(version) is None:
         logger.error("request failed - version provided is not on the server")
         return jsonify(message="ATT&CK Version requested must exist."), 400
 
     # check if co-oc content exists for this version
-    if not version_has_co_ocs_data(version):
+    matrix = get_cooccurrence_matrix(version)
+    if matrix.nnz == 0:
         logger.error("request failed - version provided has no CoOccurrence data")
         return jsonify(message="No CoOccurrence data exists for this ATT&CK version."), 404
 
-    # Get implied Techniques and their scores
-    technique_i = aliased(Technique)
-    technique_j = aliased(Technique)
-    cooccurrences = (
-        db.session.query(technique_i.uid, CoOccurrence.score, technique_j)  # i -implies-> j
-        # get success/cart Techniques
-        .filter(and_(technique_i.attack_version == version, technique_i.tech_id.in_(tech_ids)))
-        # join co-ocs of score 1.0+
-        .join(CoOccurrence, technique_i.uid == CoOccurrence.technique_i).filter(CoOccurrence.score >= 1.0)
-        # join implied Techniques
-        .join(technique_j, technique_j.uid == CoOccurrence.technique_j)
+    # score implied Techniques, don't show ones already in the cart for the suggestion page
+    suggestions = matrix.suggest(
+        tech_ids, limit=limit, min_score=min_score, aggregate=aggregate, exclude_given=len(tech_ids) > 1
     )
-
-    # don't show implied Techniques already in the cart for the suggestion page
-    if len(tech_ids) > 1:
-        cooccurrences = cooccurrences.filter(technique_j.tech_id.notin_(tech_ids))
-
-    # build response
-    implied_techs = {}
-    logger.debug("querying CoOccurrences")
-    for _, score, implied_tech in cooccurrences.all():
-        # already added - just increase score
-        itid = implied_tech.tech_id
-        if itid in implied_techs:
-            implied_techs[itid]["score"] += score
-
-        # not added yet - add details
-        else:
-            implied_techs[itid] = {
-                "tech_name": implied_tech.tech_name,
+    logger.debug(f"got {len(suggestions)} CoOccurrences")
+
+    # details of the returned Techniques only
+    uids = [matrix.tech_uid[ind] for ind, _ in suggestions]
+    details = {
+        uid: (tech_name, tech_description)
+        for uid, tech_name, tech_description in db.session.query(
+            Technique.uid, Technique.tech_name, Technique.tech_description
+        ).filter(Technique.uid.in_(uids))
+    }
+
+    paths = get_navigation_graph(version)
+    implied_techs = []
+    for (ind, score), uid in zip(suggestions, uids):
+        itid = matrix.tech_ids[ind]
+        tech_name, tech_description = details[uid]
+        implied_techs.append(
+            {
+                "tech_name": tech_name,
                 "tech_id": itid,
-                "tech_desc": outgoing_markdown(implied_tech.tech_description),
-                "url": url_for(
-                    "question_.notactic_success",
-                    version=version,
-                    subpath=itid.replace(".", "/")
-                ),
+                "tech_desc": outgoing_markdown(tech_description),
+                "url": paths.technique_path(itid),
                 "score": score,
             }
-    logger.debug(f"got {len(implied_techs)} CoOccurrences")
-
-    # make into list and order score descending
-    implied_techs = list(implied_techs.values())
-    implied_techs.sort(key=lambda it: -it["score"])
+        )
 
     logger.info("sending CoOccurrences to user")
-    return jsonify(implied_techs), 200
\ No newline at end of file
+    return jsonify(implied_techs), 200
@@ -11,6 +11,8 @@ from sqlalchemy.dialects.postgresql import array
 
 from app.routes.auth import disabled_in_kiosk, edit_permission
 
+from app.domain import content_generation
+
 from app.routes.utils_db import VersionPicker
 from app.routes.utils import (
     SUB_TECHNIQUE_ID_REGEX_P,
@@ -249,6 +251,7 @@ def edit_mismapping_post():
     # write new Mismapping / updates to an existing one
     try:
         logger.debug(f"attempting to write Mismapping #{mismap_obj.uid}")
+        bump_mismappings_of(mismap_obj.original)
         db.session.commit()
         logger.info(f"successfully wrote Mismapping #{mismap_obj.uid}")
 
@@ -302,7 +305,10 @@ def edit_mismapping_delete():
 
     try:
         logger.debug(f"attempting to delete Mismapping #{mismap_id}")
-        db.session.query(Mismapping).filter(Mismapping.uid == mismap_id).delete()
+        mismap_obj = db.session.query(Mismapping).filter(Mismapping.uid == mismap_id).first()
+        if mismap_obj is not None:
+            bump_mismappings_of(mismap_obj.original)
+            db.session.delete(mismap_obj)
         db.session.commit()
         logger.debug(f"successfully deleted Mismapping #{mismap_id}")
 
@@ -314,6 +320,17 @@ def edit_mismapping_delete():
     return jsonify(), 200
 
 
+def bump_mismappings_of(original_uid):
+    """Bumps the Mismappings content generation of the version an original Technique (by UID) is in
+
+    - called before the commit of a Mismapping change, so the bump is atomic with it
+    - invalidates cached Mismapping responses (and their ETags) of that version only
+    """
+    version = db.session.query(Technique.attack_version).filter(Technique.uid == original_uid).scalar()
+    if version is not None:
+        content_generation.bump(content_generation.mismappings_scope(version))
+
+
 # ---------------------------------------------------------------------------------------------------------------------
 # Edit Tree (Question & Answer Card Content)
 
@@ -766,6 +783,10 @@ def set_tact_or_tech_qna(item, value, field_type):
 
     try:
         logger.debug(f"attempting to write {field_type} of {type_id} under {item.attack_version}")
+        content_generation.bump(
+            content_generation.tree_scope(item.attack_version),
+            *(content_generation.answer_node_scope(item.attack_version, node) for node in answer_nodes_showing(item)),
+        )
         db.session.commit()
         logger.info(f"successfully wrote {field_type} of {type_id} under {item.attack_version}")
         return ret
@@ -776,6 +797,29 @@ def set_tact_or_tech_qna(item, value, field_type):
         return None
 
 
+def answer_nodes_showing(item):
+    """Returns the tree nodes whose answer cards are derived from a Technique / Tactic's content
+
+    - Tactic         : its card (answer) is shown at "start"
+    - Base Technique : its card (answer, and question deciding the card link) is shown at each of its Tactics,
+                       and it is the node of its own SubTechnique cards
+    - SubTechnique   : its card is shown at its base Technique
+    """
+
+    if isinstance(item, Tactic):
+        return ["start"]
+
+    if "." in item.tech_id:
+        return [item.tech_id.split(".")[0]]
+
+    tact_ids = (
+        db.session.query(Tactic.tact_id)
+        .join(tactic_technique_map, tactic_technique_map.c.tactic == Tactic.uid)
+        .filter(tactic_technique_map.c.technique == item.uid)
+    ).all()
+    return [item.tech_id] + [tact_id for (tact_id,) in tact_ids]
+
+
 def get_tree(index, version):
     """Retrieves a portion of the decision tree rooted at the specified index
 
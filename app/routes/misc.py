@@ -4,10 +4,9 @@ import logging
 
 from collections import defaultdict
 
-from sqlalchemy import func, tuple_
-from sqlalchemy.dialects.postgresql import array, aggregate_order_by
-
-from app.models import AttackVersion, db, Tactic, Technique, tactic_technique_map
+from sqlalchemy import tuple_
+from app.domain.version_catalog import get_catalog
+from app.models import db, Tactic, Technique, tactic_technique_map
 
 from app.routes.auth import public_route
 
@@ -78,7 +77,7 @@ def is_cart_format_valid(cart):
         {
             "title": dict(type_=str, optional=True),
             # ^--- unused in validity check / report building
-            "version": dict(type_=str, validator=lambda v: AttackVersion.query.get(v) is not None),
+            "version": dict(type_=str, validator=lambda v: get_catalog().get(v) is not None),
             "entries": dict(type_=list, validator=lambda es: all((is_cart_entry_format_valid(e) for e in es))),
         },
     )
@@ -86,42 +85,65 @@ def is_cart_format_valid(cart):
     return dv.success
 
 
-def query_db_for_cart_content(cart):
-    id_pairs = set()
-    for entry in cart["entries"]:
-        id_pairs.add((entry["tactic"], entry["index"]))
+def cart_id_pairs(cart):
+    return {(entry["tactic"], entry["index"]) for entry in cart["entries"]}
+
+
+def are_cart_pairs_in_version(cart):
+    """Checks that each entry's Tact-Tech pair exists in the cart's version (in-memory, via the version catalog)"""
+    return cart_id_pairs(cart) <= get_catalog().get(cart["version"]).tactic_technique_pairs
+
+
+def query_db_for_carts_content(version, carts):
+    """Returns the sorted content of each cart of a version - from 1 query no matter the number of carts
+
+    Output, per cart: Tactics in matrix-order [id, name, url, <techs>]
+    - listing their Techniques [id, name, url] in 'Base: Sub' name alphabetical order
+    """
+    id_pairs = set().union(*(cart_id_pairs(cart) for cart in carts))
+    if not id_pairs:
+        return [[] for _ in carts]
 
-    # Tactics in matrix-order
-    # listing their Techniques in 'Base: Sub' name alphabetical order
-    # filtered by cart version + entries
-    tacts_and_techs = (
+    # all pairs of all carts, in matrix-order then Tech name order
+    rows = (
         db.session.query(
             Tactic.tact_id,
             Tactic.tact_name,
             Tactic.tact_url,
-            func.array_agg(
-                aggregate_order_by(
-                    array([Technique.tech_id, Technique.full_tech_name, Technique.tech_url]), Technique.full_tech_name
-                )
-            ),
+            Technique.tech_id,
+            Technique.full_tech_name,
+            Technique.tech_url,
         )
-        # match cart version
-        .filter(Tactic.attack_version == cart["version"])
+        # match version
+        .filter(Tactic.attack_version == version)
         # join Techs
         .join(tactic_technique_map, tactic_technique_map.c.tactic == Tactic.uid)
         .join(Technique, tactic_technique_map.c.technique == Technique.uid)
-        # match cart version (redundant)
-        .filter(Technique.attack_version == cart["version"])
-        # filter to cart contents
+        # match version (redundant)
+        .filter(Technique.attack_version == version)
+        # filter to carts' contents
         .filter(tuple_(Tactic.tact_id, Technique.tech_id).in_(id_pairs))
-        # matrix-order and aggregate Techs into Tact groups
-        .order_by(Tactic.uid)
-        .group_by(Tactic.uid)
+        .order_by(Tactic.uid, Technique.full_tech_name)
     ).all()
 
-    tacts_and_techs = [list(row) for row in tacts_and_techs]
+    # split rows by cart, keeping the DB's order (its collation decides the name order)
+    contents = []
+    for cart in carts:
+        pairs = cart_id_pairs(cart)
+        tacts_and_techs = []
+        for tact_id, tact_name, tact_url, tech_id, tech_name, tech_url in rows:
+            if (tact_id, tech_id) not in pairs:
+                continue
+            if (not tacts_and_techs) or (tacts_and_techs[-1][0] != tact_id):
+                tacts_and_techs.append([tact_id, tact_name, tact_url, []])
+            tacts_and_techs[-1][3].append([tech_id, tech_name, tech_url])
+        contents.append(tacts_and_techs)
 
-    return tacts_and_techs
+    return contents
+
+
+def query_db_for_cart_content(cart):
+    return query_db_for_carts_content(cart["version"], [cart])[0]
 
 
 def is_query_db_for_cart_successful(cart, tacts_and_techs):
@@ -181,7 +203,12 @@ def sort_cart():
         logger.warning(msg)
         return jsonify(message=msg), 400
 
-    # query DB for cart entries & check that all were located
+    # check that all entries exist before querying, then query DB for cart entries & check that all were located
+    if not are_cart_pairs_in_version(cart):
+        msg = "Cart contained 1+ invalid Tactic-Technique combinations - malformed"
+        logger.warning(msg)
+        return jsonify(message=msg), 400
+
     tacts_and_techs = query_db_for_cart_content(cart)
     if not is_query_db_for_cart_successful(cart, tacts_and_techs):
         msg = "Cart contained 1+ invalid Tactic-Technique combinations - malformed"
@@ -189,3 +216,65 @@ def sort_cart():
         return jsonify(message=msg), 400
 
     return jsonify(tacts_and_techs)
+
+
+# max carts accepted by a single /api/sort_carts request
+SORT_CARTS_MAX = 500
+
+
+@misc_.route("/api/sort_carts", methods=["POST"])
+@wrap_exceptions_as(ErrorDuringAJAXRoute)
+def sort_carts():
+    """
+    Batch form of /api/sort_cart - validates and sorts many carts at once (ex: exporting many reports)
+
+    - carts are grouped by version, each version's carts being resolved by a single query
+    - an invalid cart doesn't fail the request, it is reported in its own result
+
+    JSON request:
+    - a list (max length SORT_CARTS_MAX) of carts, each cart as in the request of /api/sort_cart
+
+    JSON response:
+    - a list with a result per cart, in request order
+      - valid cart  : {"success": true, "tactics": <response of /api/sort_cart for the cart>}
+      - invalid cart: {"success": false, "message": <why>}
+    """
+
+    g.route_title = "Validate Carts / Sort Carts for Docx"
+
+    carts = request.get_json(silent=True)
+    if not isinstance(carts, list) or (len(carts) > SORT_CARTS_MAX):
+        msg = f"Request body missing or malformed - expected a list of up to {SORT_CARTS_MAX} carts"
+        logger.warning(msg)
+        return jsonify(message=msg), 400
+
+    logger.info(f"validating / sorting {len(carts)} carts")
+
+    results = [None] * len(carts)
+    version_to_inds = defaultdict(list)
+    for ind, cart in enumerate(carts):
+        if not is_cart_format_valid(cart):
+            results[ind] = {"success": False, "message": "Cart malformed"}
+        elif not are_cart_pairs_in_version(cart):
+            results[ind] = {
+                "success": False,
+                "message": "Cart contained 1+ invalid Tactic-Technique combinations - malformed",
+            }
+        else:
+            version_to_inds[cart["version"]].append(ind)
+
+    for version, inds in version_to_inds.items():
+        logger.debug(f"querying content of {len(inds)} carts under {version}")
+        contents = query_db_for_carts_content(version, [carts[ind] for ind in inds])
+        for ind, tacts_and_techs in zip(inds, contents):
+            if is_query_db_for_cart_successful(carts[ind], tacts_and_techs):
+                results[ind] = {"success": True, "tactics": tacts_and_techs}
+            else:
+                results[ind] = {
+                    "success": False,
+                    "message": "Cart contained 1+ invalid Tactic-Technique combinations - malformed",
+                }
+
+    num_invalid = sum(not result["success"] for result in results)
+    logger.info(f"{len(carts) - num_invalid} carts valid, {num_invalid} invalid")
+    return jsonify(results)
@@ -60,12 +60,12 @@ def crumb_bar(ids, version_context):
     crumbs = []
 
     logger.debug(f"Crumb Bar: querying Source by ID {ids[0]} ({version_context})")
-    mitigation_src = db_read.mitigation.mit_src(ids[0])
+    mitigation_src = db_read.mitigation.mit_src(ids[0], version_context)
 
     if mitigation_src is None:
         logger.error("Crumb Bar: Mitigation Source does not exist")
         return None
-    logger.debug("Crumb Bar: Tactic exists")
+    logger.debug("Crumb Bar: Mitigation Source exists")
 
     crumbs.append(
         {
@@ -78,9 +78,9 @@ def crumb_bar(ids, version_context):
     if len(ids) > 1:
         logger.debug(f"Crumb Bar: querying Mitigations by IDs {ids[1:]} ({version_context})")
         mitigations = (
-            db.session.query(Mitigation).filter(
-                Mitigation.mit_id.in_(ids[1:])
-            )
+            db.session.query(Mitigation)
+            .filter(Mitigation.mitigation_source == mitigation_src.uid)
+            .filter(Mitigation.mit_id.in_(ids[1:]))
         ).all()
 
         if len(mitigations) != len(ids[1:]):
@@ -104,25 +104,28 @@ def crumb_bar(ids, version_context):
 # ---------------------------------------------------------------------------------------------------------------------
 # Mitigation Page & Helpers
 
-def success_page_vars(mit_id, version_context):
+def success_page_vars(mit_id, mitigation_src_uid, version_context):
     """Generates variables needed for the Jinja success page template
 
     index: str of MitID that the success page is for
 
+    mitigation_src_uid: int UID of the Mitigation Source (of version_context) that the Mitigation belongs to
+
     version_context: str of the ATT&CK version to pull content from
+
+    returns None if the Mitigation does not exist in the Source
     """
 
     # get mitigations and its Mitigation Techniques Use
-    logger.debug(f"querying Techniques and Uses of Mitigation {mit_id}")
+    logger.debug(f"querying Techniques and Uses of Mitigation {mit_id} ({version_context})")
     mitigation, mitigation_src, technique_mitigation_uses = (
         db.session.query(
             Mitigation,  # 0
             func.array_agg(distinct(array([MitigationSource.source, MitigationSource.description, MitigationSource.display_name, MitigationSource.url]))),  # 1
             func.array_agg(distinct(array([Technique.tech_id, Technique.full_tech_name, Technique.attack_version, Technique.tech_description, Technique.tech_url, technique_mitigation_map.c.use]))),  # 2
         )
-        .filter(
-            Mitigation.mit_id == mit_id
-        )
+        .filter(Mitigation.mitigation_source == mitigation_src_uid)
+        .filter(Mitigation.mit_id == mit_id)
         .outerjoin(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
         .outerjoin(technique_mitigation_map, Mitigation.uid == technique_mitigation_map.c.mitigation)
         .outerjoin(Technique, and_(
@@ -130,7 +133,11 @@ def success_page_vars(mit_id, version_context):
             Technique.attack_version == version_context)
         )
         .group_by(Mitigation.uid)
-    ).first()
+    ).first() or (None, None, None)
+
+    if mitigation is None:
+        logger.error(f"Mitigation {mit_id} does not exist in its Source for {version_context}")
+        return None
 
     logger.debug(f"got {len(technique_mitigation_uses)} Uses for Mitigation {mitigation.mit_id}")
 
@@ -173,7 +180,6 @@ def mitigation_src_success(version, source: str):
     version: str of ATT&CK version to pull content from
     """
     g.route_title = "Mitigation Source Success Page"
-    mitigation_context = db_read.mitigation.mit_src(source)
 
     if not is_attack_version(version):
         logger.error("failed - request contained a malformed ATT&CK version")
@@ -186,6 +192,7 @@ def mitigation_src_success(version, source: str):
         return render_template("status_codes/404.html"), 404
     logger.debug("requested ATT&CK version exists")
 
+    mitigation_context = db_read.mitigation.mit_src(source, version_pick.cur_version)
     if not mitigation_context:
         logger.error("failed - request contained a malformed Mitigation Source")
         return render_template("status_codes/404.html"), 404
@@ -234,7 +241,6 @@ def mitigation_success(version, source, mit_id):
     path: str path describing resource being accessed. This validated against the Regex of the Mitigation Source
     """
     g.route_title = "Mitigation Success Page"
-    mitigation_src_context = db_read.mitigation.mit_src(source)
 
     if not is_attack_version(version):
         logger.error("failed - request contained a malformed ATT&CK version")
@@ -249,6 +255,7 @@ def mitigation_success(version, source, mit_id):
 
     version_context = version_pick.cur_version
 
+    mitigation_src_context = db_read.mitigation.mit_src(source, version_context)
     if not mitigation_src_context:
         logger.error("failed - request contained a malformed Mitigation Source")
         return render_template("status_codes/404.html"), 404
@@ -257,7 +264,9 @@ def mitigation_success(version, source, mit_id):
         logger.error("failed - request had a malformed Mitigation ID")
         return render_template("status_codes/404.html"), 404
 
-    success = success_page_vars(mit_id, version_context)
+    success = success_page_vars(mit_id, mitigation_src_context.uid, version_context)
+    if success is None:
+        return render_template("status_codes/404.html"), 404
 
     crumbs = crumb_bar([mitigation_src_context.source, mit_id], version)
     logger.info("serving page")
@@ -17,10 +17,8 @@
 from operator import and_
 from flask import Blueprint, redirect, render_template, current_app, g, url_for
 from app.models import (
-    AttackVersion,
     Platform,
     db,
-    Tactic,
     Technique,
     Aka,
     Mismapping,
@@ -31,10 +29,9 @@ from app.models import (
 from app.models import (
     technique_aka_map,
     technique_platform_map,
-    tactic_technique_map,
     technique_mitigation_map,
 )
-from sqlalchemy import asc, func, distinct
+from sqlalchemy import asc, func
 from sqlalchemy.orm import aliased
 from sqlalchemy.dialects.postgresql import array
 
@@ -42,6 +39,8 @@ import logging.config
 
 import re
 
+from app.domain.navigation_graph import get_navigation_graph
+from app.domain.version_catalog import get_catalog
 from app.routes.utils_db import VersionPicker
 from app.routes.utils import (
     build_technique_url,
@@ -107,10 +106,12 @@ def crumb_bar(ids, version_context):
         "url": url_for("question_.question_start_page", version=version_context),
     }]
 
+    graph = get_navigation_graph(version_context)
+
     # tactic if present
     if len(ids) > 1:
-        logger.debug(f"Crumb Bar: querying Tactic by ID {ids[1]} ({version_context})")
-        tactic = db.session.query(Tactic).filter_by(tact_id=ids[1], attack_version=version_context).first()
+        logger.debug(f"Crumb Bar: looking up Tactic by ID {ids[1]} ({version_context})")
+        tactic = graph.tactic(ids[1])
 
         if tactic is None:
             logger.error("Crumb Bar: Tactic does not exist")
@@ -120,7 +121,7 @@ def crumb_bar(ids, version_context):
         crumbs.append(
             {
                 "name": f"{tactic.tact_name} ({tactic.tact_id})",
-                "url": build_technique_url(None, tactic.tact_id, version_context),
+                "url": graph.tactic_path(tactic.tact_id),
             }
         )
 
@@ -130,27 +131,19 @@ def crumb_bar(ids, version_context):
             logger.error("Crumb Bar: failed - request had one or more malformed Techniques")
             return None
 
-        logger.debug(f"Crumb Bar: querying Techs by IDs {ids[2:]} ({version_context})")
-        techniques = (
-            db.session.query(Technique).filter(
-                and_(
-                    Technique.tech_id.in_(ids[2:]),
-                    Technique.attack_version == version_context,
-                )
-            )
-        ).all()
+        logger.debug(f"Crumb Bar: looking up Techs by IDs {ids[2:]} ({version_context})")
+        techniques = [graph.technique(tech_id) for tech_id in ids[2:]]
 
-        if len(techniques) != len(ids[2:]):
+        if any(t is None for t in techniques):
             logger.error("Crumb Bar: 1+ Techniques do not exist")
             return None
         logger.debug("Crumb Bar: All Techniques exist")
 
-        techniques.sort(key=lambda t: ids[2:].index(t.tech_id))
         for technique in techniques:
             crumbs.append(
                 {
                     "name": f"{technique.tech_name} ({technique.tech_id})",
-                    "url": build_technique_url(technique, tactic.tact_id, version_context),
+                    "url": graph.technique_path(technique.tech_id, tactic.tact_id),
                 }
             )
 
@@ -202,7 +195,7 @@ def get_tech_and_subs(index, tactic_context, version_context):
     tactic_context: str of TacticID that the Technique lives under
     version_context: str of ATT&CK version to pull content from
 
-    returns a tuple of (Base Technique object, dict)
+    returns a tuple of (NavTechnique of index, dict)
     - dict holding the keys "rows" and "selected"
     - "rows" being a list[dict], each with keys "id", "name", "url" describing each technique in the base+subs group
     - "selected" being an int that is the index of the current row being requested **
@@ -210,16 +203,10 @@ def get_tech_and_subs(index, tactic_context, version_context):
     ** This makes "Technique & Sub-Techniques" on the success page, allowing quick jumping between subs/base
     """
 
-    # Get base Technique, query Technique & Subs
-    base_technique = index.split(".")[0]
-
-    logger.debug(f"querying Tech & Subs of {base_technique} ({version_context})")
-    tech_and_subs = (
-        db.session.query(Technique)
-        .filter(Technique.tech_id.contains(base_technique))  # get all entries for base_technique
-        .filter(Technique.attack_version == version_context)
-        .order_by(asc(Technique.tech_id))  # asc tech_id: (base_tech, sub001, sub002, ...)
-    ).all()
+    # Get base Technique & Subs: (base_tech, sub001, sub002, ...)
+    logger.debug(f"looking up Tech & Subs of {index.split('.')[0]} ({version_context})")
+    graph = get_navigation_graph(version_context)
+    tech_and_subs = graph.family(index)
 
     number_of_subs = sum(1 for t in tech_and_subs if ("." in t.tech_id))
     logger.debug(f"got {number_of_subs} sub-Techs")
@@ -233,12 +220,7 @@ def get_tech_and_subs(index, tactic_context, version_context):
             {
                 "id": t.tech_id.split(".")[-1],  # Trims base Technique ID off for all sub techniques
                 "name": t.tech_name,
-                "url": build_technique_url(
-                    t,
-                    tactic_context,
-                    version_context,
-                    is_base_tech_id(t.tech_id),
-                ),
+                "url": graph.technique_path(t.tech_id, tactic_context, is_base_tech_id(t.tech_id)),
             }
             for t in tech_and_subs
         ],
@@ -297,6 +279,63 @@ def get_examples(index, version):
     return examples
 
 
+def get_mitigations(technique_uid):
+    """Retrieves the Mitigations of a Technique, grouped by Mitigation Source
+
+    technique_uid: int UID of the Technique to get Mitigations for
+
+    returns
+    {
+        "Source": [
+            {
+                mit_id: "M1234",
+                name: "Mitigation Name",
+                source_display_name: "Source Display Name",
+                source_url: "https://source-url",
+                description: "how the Mitigation applies to the Technique (or its general description)"
+            },
+            ...
+        ],
+        ...
+    }
+    """
+
+    logger.debug(f"querying Mitigations of Technique UID {technique_uid}")
+    mitigations = (
+        db.session.query(
+            Mitigation.mit_id,
+            MitigationSource.source,
+            MitigationSource.display_name,
+            MitigationSource.url,
+            Mitigation.name,
+            Mitigation.description,
+            technique_mitigation_map.c.use,
+        )
+        .join(Mitigation, Mitigation.uid == technique_mitigation_map.c.mitigation)
+        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
+        .filter(technique_mitigation_map.c.technique == technique_uid)
+        .distinct()
+        .order_by(Mitigation.mit_id, MitigationSource.source)
+    ).all()
+    logger.debug(f"got {len(mitigations)} Mitigations")
+
+    mitigation_entries = {}
+    for mit_id, source_type, source_display_name, source_url, name, description, use in mitigations:
+        if source_type not in mitigation_entries:
+            mitigation_entries[source_type] = []
+
+        mitigation_entries[source_type].append(
+            {
+                "mit_id": mit_id,
+                "name": name,
+                "source_display_name": source_display_name,
+                "source_url": source_url,
+                "description": use if not use is None and len(use) > 0 else description, #pizazz
+            }
+        )
+    return mitigation_entries
+
+
 # ---------------------------------------------------------------------------------------------------------------------
 # Question Page & Helpers - Normal Navigation & Tactic-less Success Page
 
@@ -307,8 +346,8 @@ def question_page_vars(cur_node, index, tactic_context, version_context):
     cur_node
     - the parent (question) node for the page
     - possible types:
-      - Tactic object
-      - Technique object
+      - NavTactic (navigation graph entry of a Tactic)
+      - NavTechnique (navigation graph entry of a Technique)
       - a dict representing index="start" that just has a "question" key
 
     index (str)
@@ -325,8 +364,8 @@ def question_page_vars(cur_node, index, tactic_context, version_context):
     """
 
     # Get version - make platform filters for it
-    logger.debug(f"querying Platforms and Data Sources in version {version_context}")
-    ver = AttackVersion.query.get(version_context)
+    logger.debug(f"reading Platforms and Data Sources of version {version_context} from catalog")
+    ver = get_catalog().get(version_context)
     ver_platforms = ver.platforms
     ver_data_sources = ver.data_sources
     logger.debug(f"got {len(ver_platforms)} Platforms and {len(ver_data_sources)} Data Sources")
@@ -379,67 +418,50 @@ def success_page_vars(index, tactic_context, version_context):
     # creates sub / base technique selector section
     technique, tech_and_subs = get_tech_and_subs(index, tactic_context, version_context)
 
-    # get tactics, platforms, and akas for the current technique
-    logger.debug(f"querying Tactics, Platforms, and AKAs of {index} ({version_context})")
-    _, tact_ids_names, platforms, akas, mitigations = (
-        db.session.query(
-            Technique,  # 0
-            func.array_agg(distinct(array([Tactic.tact_id, Tactic.tact_name]))),  # 1
-            func.array_agg(distinct(Platform.readable_name)),  # 2
-            func.array_remove(func.array_agg(distinct(Aka.term)), None),  # 3
-            func.array_agg(distinct(array([Mitigation.mit_id, MitigationSource.source, MitigationSource.display_name, MitigationSource.url, Mitigation.name, Mitigation.description, technique_mitigation_map.c.use]))),  # 4
-        )
-        .filter(
-            and_(
-                Technique.attack_version == version_context,
-                Technique.tech_id == technique.tech_id,
-            )
-        )
-        .join(tactic_technique_map, tactic_technique_map.c.technique == Technique.uid)
-        .join(Tactic, Tactic.uid == tactic_technique_map.c.tactic)
-        .outerjoin(technique_platform_map, technique_platform_map.c.technique == Technique.uid)
-        .outerjoin(Platform, Platform.uid == technique_platform_map.c.platform)
-        .outerjoin(technique_aka_map, technique_aka_map.c.technique == Technique.uid)
-        .outerjoin(Aka, technique_aka_map.c.aka == Aka.uid)
-        .outerjoin(technique_mitigation_map, technique_mitigation_map.c.technique == Technique.uid)
-        .outerjoin(Mitigation, Mitigation.uid == technique_mitigation_map.c.mitigation)
-        .outerjoin(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
-        .group_by(Technique.uid)
-    ).first()
-    logger.debug(f"got {len(tact_ids_names)} Tactics, {len(platforms)} Platforms, {len(akas)} AKAs, and {len(mitigations)} Mitigations")
+    # each relationship is fetched on its own - one GROUP BY over all of them joined grew as the product of their
+    # sizes (3 Tactics x 5 Platforms x 10 AKAs x 40 Mitigations = 6,000 rows), separately it's their sum
+    graph = get_navigation_graph(version_context)
+    logger.debug(f"querying description, Platforms, AKAs, and Mitigations of {index} ({version_context})")
+    description = db.session.query(Technique.tech_description).filter(Technique.uid == technique.uid).scalar()
+    platforms = [
+        name
+        for (name,) in db.session.query(Platform.readable_name)
+        .join(technique_platform_map, technique_platform_map.c.platform == Platform.uid)
+        .filter(technique_platform_map.c.technique == technique.uid)
+        .distinct()
+        .order_by(Platform.readable_name)
+    ]
+    akas = [
+        term
+        for (term,) in db.session.query(Aka.term)
+        .join(technique_aka_map, technique_aka_map.c.aka == Aka.uid)
+        .filter(technique_aka_map.c.technique == technique.uid)
+        .distinct()
+        .order_by(Aka.term)
+    ]
+    mitigation_entries = get_mitigations(technique.uid)
+    logger.debug(
+        f"got {len(technique.tactic_ids)} Tactics, {len(platforms)} Platforms, {len(akas)} AKAs, "
+        f"and {sum(len(entries) for entries in mitigation_entries.values())} Mitigations"
+    )
 
     # generate dropdown options for tactic selector
     #   this allows selecting which tactic the technique gets added to the cart under
     tactic_entries = [
         {
             "tact_id": tact_id,
-            "tact_name": tact_name,
-            "tech_url_for_tact": build_technique_url(technique, tact_id, version_context, True),
+            "tact_name": graph.tactic(tact_id).tact_name,
+            "tech_url_for_tact": graph.technique_path(technique.tech_id, tact_id, True),
         }
-        for tact_id, tact_name in tact_ids_names
+        for tact_id in sorted(technique.tactic_ids)
     ]
 
-    mitigation_entries = {}
-    for mit_id, source_type, source_display_name, source_url, name, description, use in mitigations:
-        if source_type not in mitigation_entries:
-            mitigation_entries[source_type] = []
-        
-        mitigation_entries[source_type].append(
-            {
-                "mit_id": mit_id,
-                "name": name,
-                "source_display_name": source_display_name,
-                "source_url": source_url,
-                "description": use if not use is None and len(use) > 0 else description, #pizazz
-            }
-        )
-
     # create jinja vars
     return {
         "success": {
             "id": index,
             "name": technique.tech_name,
-            "description": outgoing_markdown(technique.tech_description),
+            "description": outgoing_markdown(description),
             "akas": akas,
             "blurbs": get_examples(index, version_context),
             "url": technique.tech_url,
@@ -526,9 +548,7 @@ def question_tactic_page(version, tactic_id):
         return render_template("status_codes/404.html"), 404
 
     # tactic exists as crumb bar formation validated it
-    logger.debug(f"querying Tactic {tactic_id} ({version_context})")
-    cur_node = db.session.query(Tactic).filter_by(attack_version=version_context, tact_id=tactic_id).first()
-    logger.debug("query done")
+    cur_node = get_navigation_graph(version_context).tactic(tactic_id)
 
     qna = question_page_vars(cur_node, tactic_id, tactic_id, version_context)
 
@@ -608,9 +628,7 @@ def question_further_page(version, tactic_id, dest=""):
         return render_template("technique_success.html", **success, **crumbs)
 
     # known: sub = QnA -> Tech->SubTech question page .. if question exists
-    logger.debug(f"querying Technique {technique_id} under ATT&CK {version_context}")
-    cur_node = db.session.query(Technique).filter_by(attack_version=version_context, tech_id=technique_id).first()
-    logger.debug("query done")
+    cur_node = get_navigation_graph(version_context).technique(technique_id)
 
     if cur_node.tech_question:
         qna = question_page_vars(cur_node, index, tactic_id, version_context)
@@ -687,8 +705,8 @@ def notactic_success(version, subpath=""):
         return render_template("status_codes/404.html"), 404
 
     # if Technique doesn't exist (version change can cause this) -> 404
-    logger.debug(f"querying exitence of {technique} in ATT&CK {version_context}")
-    cur_node = db.session.query(Technique).filter_by(attack_version=version_context, tech_id=technique).first()
+    logger.debug(f"looking up exitence of {technique} in ATT&CK {version_context}")
+    cur_node = get_navigation_graph(version_context).technique(technique)
 
     if cur_node is None:
         logger.error(f"{technique} in ATT&CK {version_context} does not exist")
@@ -1,13 +1,22 @@
 import bleach
+import heapq
+import itertools
 import logging
 import markdown
+import os
 import re
+import threading
+import time
 
-from flask import Blueprint, request, render_template, jsonify, g, make_response, url_for
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, request, render_template, jsonify, g, make_response, current_app
+from flask import copy_current_request_context
 
 from sqlalchemy.sql.expression import distinct
 from sqlalchemy.sql.functions import func
-from sqlalchemy import REAL, literal_column, String, or_, and_
+from sqlalchemy import literal, literal_column, or_, and_
+from sqlalchemy.sql import text as sql_text
 from sqlalchemy.orm.util import aliased
 
 from app.models import (
@@ -23,6 +32,8 @@ from app.models import (
 )
 
 from app.domain import PSQLTxt
+from app.domain.navigation_graph import get_navigation_graph
+from app.domain.version_catalog import get_catalog
 from app.domain.search_service import technique_search_args_are_valid, parse_search_str, tsqry_rep, plain_rep
 from app.models import (
     technique_aka_map,
@@ -43,6 +54,73 @@ from app.routes.utils import ErrorDuringHTMLRoute, ErrorDuringAJAXRoute, wrap_ex
 logger = logging.getLogger(__name__)
 search_ = Blueprint("search_", __name__, template_folder="templates")
 
+# /search/full page sizes
+FULL_SEARCH_DEFAULT_LIMIT = 50
+FULL_SEARCH_MAX_LIMIT = 500
+# deepest rank served (offset + limit) - every sub-search ranks / headlines that many matches, so it bounds their cost
+FULL_SEARCH_MAX_DEPTH = 1000
+
+# min WORD_SIMILARITY of the typed phrase to a Technique name for it to be a Mini-Search result
+MINI_SEARCH_NAME_SIMILARITY = 0.25
+
+# thread pool running the /search/full sub-searches concurrently, see full_search_executor()
+_full_search_executor = None
+_full_search_executor_pid = None
+_full_search_executor_lock = threading.Lock()
+
+
+def _reset_full_search_executor_lock():
+    # forked workers start with a fresh lock (the executor itself is remade by pid in full_search_executor())
+    global _full_search_executor_lock
+    _full_search_executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_full_search_executor_lock)
+
+
+def full_search_executor():
+    """Returns this process' thread pool for /search/full sub-searches (size: FULL_SEARCH_WORKERS config)
+
+    - made lazily, and remade if the process was forked (threads don't survive a fork, uWSGI forks workers)
+    """
+    global _full_search_executor, _full_search_executor_pid
+
+    with _full_search_executor_lock:
+        if (_full_search_executor is None) or (_full_search_executor_pid != os.getpid()):
+            _full_search_executor = ThreadPoolExecutor(
+                max_workers=current_app.config["FULL_SEARCH_WORKERS"],
+                thread_name_prefix="full-search",
+            )
+            _full_search_executor_pid = os.getpid()
+        return _full_search_executor
+
+
+def run_sub_search_concurrently(kind, sub_search):
+    """Submits a sub-search to full_search_executor(), returning its Future
+
+    - the thread gets a copy of the request context, so it has its own app context -> own DB session / connection
+    - request log details (id, user, route title) are carried over so its logs still tie to the request
+    - the time the sub-search took is logged
+    """
+    carried_g = {
+        attr: g.get(attr)
+        for attr in ("request_id", "route_title", "_login_user", "content_generations")
+        if attr in g
+    }
+
+    @copy_current_request_context
+    def timed_sub_search():
+        for attr, value in carried_g.items():
+            setattr(g, attr, value)
+
+        t0 = time.perf_counter()
+        result = sub_search()
+        logger.info(f"{kind} sub-search took {(time.perf_counter() - t0) * 1000:.1f}ms")
+        return result
+
+    return full_search_executor().submit(timed_sub_search)
+
+
 @search_.route("/search/mini/<version>", methods=["POST"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
 def mini_search(version):
@@ -62,6 +140,10 @@ def mini_search(version):
         logger.error("failed - request had a malformed ATT&CK version")
         return jsonify(message="Malformed ATT&CK version requested"), 400
 
+    if get_catalog().get(version) is None:
+        logger.error("failed - requested ATT&CK version is not on the server")
+        return jsonify(message="ATT&CK Version requested must exist."), 400
+
     try:
         phrase = request.json.get("search").strip()
     except Exception:
@@ -71,42 +153,42 @@ def mini_search(version):
     # Matches T1234 | 1234 | T1234.123 | 1234.123 | .123 - with partial progress allowed left to right
     contains_tech_id = re.search(r"[Tt]?[0-9]{4}\.[0-9]{0,3}|[Tt]?[0-9]{1,4}|\.[0-9]{1,3}", phrase)
     if contains_tech_id:
-        phrase = contains_tech_id.group(0)
+        phrase = contains_tech_id.group(0).upper()
 
-        logger.debug(f"querying Techniques by ID under ATT&CK {version}")
-        techniques = (
-            db.session.query(
-                Technique.full_tech_name,
-                Technique.tech_id,
-            )
-            .filter(Technique.attack_version == version)
-            .filter(Technique.tech_id.ilike(f"%{phrase}%"))
-            .order_by(Technique.tech_id)
-        ).all()
+        # answered from the version's navigation graph (tech_id order) - no DB round trip on each keystroke
+        logger.debug(f"looking up Techniques by ID under ATT&CK {version}")
+        techniques = [
+            (t.full_tech_name, t.tech_id)
+            for t in get_navigation_graph(version).techniques.values()
+            if phrase in t.tech_id
+        ]
 
     # No match - return results by similarity descending of phrase likeness to Technique Name
     else:
-        phrase = String("").literal_processor(dialect=db.session.get_bind().dialect)(value=phrase.lower())
+        phrase = phrase.lower()
 
+        # "phrase <% name" is WORD_SIMILARITY(phrase, name) >= threshold, in a form technique_name_trgm_index serves
+        # - SET LOCAL only lasts for this request's transaction
+        # - results have always been those scoring strictly above the threshold: the exact "> threshold" filter
+        #   drops names at exactly it, from the rows the index narrowed to
         logger.debug(f"querying Techniques by name under ATT&CK {version}")
-        subq = (
-            db.session.query(
-                Technique.full_tech_name,
-                Technique.tech_id,
-                literal_column(f"WORD_SIMILARITY({phrase}, technique.full_tech_name)", type_=REAL).label("sml"),
-            ).filter(Technique.attack_version == version)
-        ).subquery()
+        db.session.execute(sql_text(f"SET LOCAL pg_trgm.word_similarity_threshold = {MINI_SEARCH_NAME_SIMILARITY}"))
         techniques = (
-            db.session.query(subq).filter(subq.c.sml > 0.25).order_by(subq.c.sml.desc(), subq.c.full_tech_name)
+            db.session.query(Technique.full_tech_name, Technique.tech_id)
+            .filter(Technique.attack_version == version)
+            .filter(literal(phrase).op("<%")(Technique.full_tech_name))
+            .filter(func.word_similarity(phrase, Technique.full_tech_name) > MINI_SEARCH_NAME_SIMILARITY)
+            .order_by(func.word_similarity(phrase, Technique.full_tech_name).desc(), Technique.full_tech_name)
         ).all()
 
     logger.debug(f"got {len(techniques)} Techniques")
 
     # Make response from entries
-    dictified = []
-    for tech_name, tech_id, *_ in techniques:
-        app_url = url_for("question_.notactic_success", version=version, subpath=tech_id.replace(".", "/"))
-        dictified.append({"tech_name": tech_name, "tech_id": tech_id, "url": app_url})
+    paths = get_navigation_graph(version)
+    dictified = [
+        {"tech_name": tech_name, "tech_id": tech_id, "url": paths.technique_path(tech_id)}
+        for tech_name, tech_id in techniques
+    ]
 
     logger.info("sending search results to user")
     return jsonify(dictified), 200
@@ -149,21 +231,15 @@ def search_page():
     # get version picked
     version_pick = VersionPicker(version=version)
     version_pick.set_vars()
-    ver_model = version_pick.cur_version_model
-    ver_name = ver_model.version
+    ver_entry = version_pick.cur_version_entry
+    ver_name = ver_entry.version
 
-    # populate tactic / platform / data source checkbox options for picked version
-    logger.debug(f"querying Tactics in ATT&CK {ver_name} for filters")
-    tactic_names = [t.tact_name for t in ver_model.tactics]
-
-    logger.debug(f"querying Platforms in ATT&CK {ver_name} for filters")
-    platform_names = [p.readable_name for p in ver_model.platforms]
-
-    logger.debug(f"querying Data Sources in ATT&CK {ver_name} for filters")
-    data_source_names = [d.readable_name for d in ver_model.data_sources]
-
-    logger.debug(f"querying Mitigation Sources in ATT&CK {ver_name} for filters")
-    mitigation_source_names = db.session.query(MitigationSource.source).all()
+    # populate tactic / platform / data source / mitigation source checkbox options for picked version
+    logger.debug(f"reading Tactics, Platforms, Data Sources, Mitigation Sources in ATT&CK {ver_name} for filters")
+    tactic_names = [t.tact_name for t in ver_entry.tactics]
+    platform_names = [p.readable_name for p in ver_entry.platforms]
+    data_source_names = [d.readable_name for d in ver_entry.data_sources]
+    mitigation_source_names = [m.source for m in ver_entry.mitigation_sources]
 
     options_names = ["Techniques", "Usage Examples",
                      "Mitigations","Mitigation Uses"]
@@ -199,7 +275,7 @@ def search_page():
     )
     mitigation_source_filters = checkbox_filters_component(
         "mitigation_source_fs",
-        [x[0] for x in mitigation_source_names],
+        mitigation_source_names,
         "searchClearMitigationSources()",
         "searchUpdateMitigationSources(this)",
         different_name="Mitigation Source",
@@ -212,8 +288,7 @@ def search_page():
     logger.info("serving page")
     return response
 
-def technique_search(search_tsqry, tactics, version, platforms, data_sources):
-    results = []
+def technique_search(search_tsqry, tactics, version, platforms, data_sources, limit=None):
     """Performs a full Technique search and returns highlighted & ranked results
 
     URL Params
@@ -223,12 +298,13 @@ def technique_search(search_tsqry, tactics, version, platforms, data_sources):
     tactics      : list[str] only show results with any of these Tactics      *
     platforms    : list[str] only show results with any of these Platforms    *
     data_sources : list[str] only show results with any of these Data Sources *
+    limit        : (int)     (optional) only return the top-N ranked results
 
     * If this list is empty, no filtering is done on this aspect
 
     Output
     ------
-    - list[dict] is returned
+    - (list[dict], int) is returned - the results, and the number of matches (before the limit)
     - each dict is a Technique result from the search
     - results are ordered first by strength of match, and secondly by TechniqueID as a tie-breaker
     - each dict has these keys:
@@ -252,87 +328,69 @@ def technique_search(search_tsqry, tactics, version, platforms, data_sources):
        B. Technique name (including parent name beforehand if a sub-Technique)
        C. Technique AKAs / keyword tags
        D. Technique description
+       (this vector is stored as technique.tech_search_ts, refreshed at build time when Techniques / AKAs change)
     5. Highlights and description highlight snippets are generated for the results
+       (only for the top-N rows returned - filtering, ranking, limiting, and highlighting is all 1 statement)
     6. Results are ordered and sent out
     """
-    
-    tsvec = PSQLTxt.multiline_cleanup(
-        """
-        technique.tech_ts || setweight(
-            to_tsvector(
-                'english_nostop',
-                regexp_replace(array_to_string(array_agg(distinct(aka.term)), ' ', ''), '[^a-z0-9 ]', ' ', 'gi')
-            ),
-            'C'
-        )
-    """
-    )
+    results = []
 
-    # filter techniques by platform / tactics / data source filters, then generate tsvecs for remaining
-    logger.debug("querying Techniques filtered by Platform/Tactic/Data Source selections and ranked by relevance")
-    tech_subq = (
-        db.session.query(
-            Technique.tech_id,  # 0
-            literal_column(tsvec).label("tsvec"),  # 1
-            literal_column(search_tsqry).label("tsqry"),  # 2
-        )
-        .filter(Technique.attack_version == version)
-        .group_by(Technique.uid)
-        # filter on tactics if specified
-        .join(tactic_technique_map, Technique.uid == tactic_technique_map.c.technique)
+    # filters as semi-joins (no grouping of Technique rows) - so the match can use the index on tech_search_ts
+    tactic_filter = (
+        db.session.query(tactic_technique_map.c.technique)
         .join(Tactic, Tactic.uid == tactic_technique_map.c.tactic)
-        .filter(or_(not tactics, func.lower(func.replace(Tactic.tact_name, " ", "_")).in_(tactics)))
-        # filter on platforms if specified
-        .join(technique_platform_map, Technique.uid == technique_platform_map.c.technique)
+        .filter(func.lower(func.replace(Tactic.tact_name, " ", "_")).in_(tactics))
+    )
+    platform_filter = (
+        db.session.query(technique_platform_map.c.technique)
         .join(Platform, Platform.uid == technique_platform_map.c.platform)
-        .filter(or_(not platforms, func.lower(func.replace(Platform.readable_name, " ", "_")).in_(platforms)))
-        # filter on data sources if defined
-        .outerjoin(technique_ds_map, Technique.uid == technique_ds_map.c.technique)
-        .outerjoin(DataSource, DataSource.uid == technique_ds_map.c.data_source)
-        .filter(or_(not data_sources, func.lower(func.replace(DataSource.readable_name, " ", "_")).in_(data_sources)))
-        # add AKAs if defined for tech
-        .outerjoin(technique_aka_map, Technique.uid == technique_aka_map.c.technique)
-        .outerjoin(Aka, Aka.uid == technique_aka_map.c.aka)
-    ).subquery()
-    
-
-    # get techniques matching search tsquery
-    generate_existing = (db.session.query(tech_subq, literal_column("tsvec @@ tsqry").label("exists"))).subquery()
-
-    # filter non-matching and get scores - returns IDs and their scores, pull into dict
-    filter_and_scoreq = (
-        db.session.query(
-            generate_existing.c.tech_id,
-            literal_column("ts_rank(tsvec, tsqry)").label("score"),
-        ).filter(generate_existing.c.exists)
+        .filter(func.lower(func.replace(Platform.readable_name, " ", "_")).in_(platforms))
+    )
+    data_source_filter = (
+        db.session.query(technique_ds_map.c.technique)
+        .join(DataSource, DataSource.uid == technique_ds_map.c.data_source)
+        .filter(func.lower(func.replace(DataSource.readable_name, " ", "_")).in_(data_sources))
     )
 
-    filter_and_score = filter_and_scoreq.all()
-
-    logger.debug(f"got {len(filter_and_score)} matching Techniques")
-    tech_to_score = {tech: score for tech, score in filter_and_score}
+    # CTE: filter techniques by platform / tactics / data source filters, match against the stored
+    # tech_id/name/description/AKA vector, rank, count (before the cut), and cut to the top-N
+    tsqry = literal_column(search_tsqry)
+    tsvec = Technique.tech_search_ts
+    score = func.ts_rank(tsvec, tsqry)
+    ranked = (
+        db.session.query(Technique.uid, score.label("score"), func.count().over().label("num_matches"))
+        .filter(Technique.attack_version == version)
+        .filter(tsvec.op("@@")(tsqry))
+        .filter(or_(not tactics, Technique.uid.in_(tactic_filter)))
+        .filter(or_(not platforms, Technique.uid.in_(platform_filter)))
+        .filter(or_(not data_sources, Technique.uid.in_(data_source_filter)))
+        .order_by(score.desc(), Technique.tech_id)
+        .limit(limit)
+    ).cte("ranked")
+
+    # details of only the top-N techniques (AKAs gathered per returned row, not for the whole version)
+    akas_str = (
+        db.session.query(
+            literal_column("replace(array_to_string(array_agg(distinct(aka.term)), '    ', ''), '\\\\', '\\')")
+        )
+        .select_from(technique_aka_map)
+        .join(Aka, Aka.uid == technique_aka_map.c.aka)
+        .filter(technique_aka_map.c.technique == ranked.c.uid)
+    ).scalar_subquery()
 
-    # fetch details of matching techniques
-    logger.debug("querying details for the earlier-matched Techniques")
-    result_subq = (
+    top_subq = (
         db.session.query(
-            Technique.tech_id,  # 0
-            Technique.full_tech_name,  # 1
-            Technique.tech_description,  # 2
-            Technique.tech_url,  # 3
-            func.array_agg(distinct(Tactic.tact_id)),  # 4
-            literal_column("replace(array_to_string(array_agg(distinct(aka.term)), '    ', ''), '\\\\', '\\')").label(
-                "akas_str"
-            ),  # 5
-            literal_column(search_tsqry).label("tsqry"),  # 6
+            Technique.tech_id.label("tech_id"),
+            Technique.full_tech_name.label("full_tech_name"),
+            Technique.tech_description.label("tech_description"),
+            Technique.tech_url.label("tech_url"),
+            akas_str.label("akas_str"),
+            ranked.c.score.label("score"),
+            ranked.c.num_matches.label("num_matches"),
+            tsqry.label("tsqry"),
         )
-        .filter(Technique.attack_version == version)
-        .filter(Technique.tech_id.in_(list(tech_to_score.keys())))
-        .group_by(Technique.uid)
-        .join(tactic_technique_map, Technique.uid == tactic_technique_map.c.technique)
-        .join(Tactic, Tactic.uid == tactic_technique_map.c.tactic)
-        .outerjoin(technique_aka_map, Technique.uid == technique_aka_map.c.technique)
-        .outerjoin(Aka, Aka.uid == technique_aka_map.c.aka)
+        .select_from(ranked)
+        .join(Technique, Technique.uid == ranked.c.uid)
     ).subquery()
 
     # generate highlights for ID, Name, Description, and AKAs
@@ -364,27 +422,35 @@ def technique_search(search_tsqry, tactics, version, platforms, data_sources):
     """
     )
 
+    logger.debug("querying Techniques filtered by Platform/Tactic/Data Source selections, ranked, and highlighted")
     result_q = (
         db.session.query(
-            result_subq,
-            # 7, 8, 9, 10
+            top_subq.c.tech_id,  # 0
+            top_subq.c.full_tech_name,  # 1
+            top_subq.c.tech_description,  # 2
+            top_subq.c.tech_url,  # 3
+            top_subq.c.score,  # 4
+            top_subq.c.num_matches,  # 5
+            # 6, 7, 8, 9
             literal_column(PSQLTxt.basic_headline(PSQLTxt.zwspace_pad_special("tech_id"), "tsqry")).label("hl_id"),
             literal_column(PSQLTxt.basic_headline(PSQLTxt.unaccent("full_tech_name"), "tsqry")).label("hl_name"),
             literal_column(tech_desc_headline).label("hl_desc"),
             literal_column(PSQLTxt.basic_headline(PSQLTxt.zwspace_pad_special("akas_str"), "tsqry")).label("hl_akas"),
         )
+        .order_by(top_subq.c.score.desc(), top_subq.c.tech_id)
     ).all()
-    logger.debug("query finished")
+    num_matches = result_q[0].num_matches if result_q else 0
+    logger.debug(f"got {num_matches} matching Techniques, {len(result_q)} returned")
 
     # build response
+    paths = get_navigation_graph(version)  # precomputed app paths
     for (
         tech_id,
         tech_name,
         tech_desc,
         tech_url,
-        _,  # tactic_ids
-        _,  # akas
-        _,  # tsqry
+        score,
+        _,  # num_matches
         hl_id,
         hl_name,
         hl_desc,
@@ -409,86 +475,35 @@ def technique_search(search_tsqry, tactics, version, platforms, data_sources):
                 "tech_name_plain": tech_name,
                 "description": tdesc,
                 "attack_url": tech_url,
-                "internal_url": url_for(
-                    "question_.notactic_success", version=version, subpath=tech_id.replace(".", "/")
-                ),
+                "internal_url": paths.technique_path(tech_id),
                 "akas": hl_akas.split("    ") if hl_akas else [],
-                "score": tech_to_score[tech_id],
+                "score": score,
             }
         )
 
-    return results
+    return results, num_matches
 
-def mitigation_search(search_tsqry, mitigation_sources, version):
-    results = []
-    
-    tsvec = PSQLTxt.multiline_cleanup(
-        """
-        mitigation.mit_ts 
-    """
-    )
-
-    # filter Mitigations by Mitigation Source filters, then generate tsvecs for remaining
-    logger.debug("querying Mitigations filtered by Mitigation Source selections and ranked by relevance")
-    
-    mit_subq = (
-        db.session.query(
-            Mitigation.mit_id,  # 0
-            literal_column(tsvec).label("tsvec"),  # 1
-            literal_column(search_tsqry).label("tsqry"),  # 2
-        )
-        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
-        .filter(or_(not mitigation_sources, func.lower(func.replace(MitigationSource.source, " ", "_")).in_(mitigation_sources)))
-    ).subquery() 
-
-    # get techniques matching search tsquery
-    generate_existing = (db.session.query(mit_subq, literal_column("tsvec @@ tsqry").label("exists"))).subquery()
-
-    # filter non-matching and get scores - returns IDs and their scores, pull into dict
-    filter_and_scoreq = (
-        db.session.query(
-            generate_existing.c.mit_id,
-            literal_column("ts_rank(tsvec, tsqry)").label("score"),
-        ).filter(generate_existing.c.exists)
-    )
-        
-    filter_and_score = filter_and_scoreq.all()
-
-    logger.debug(f"got {len(filter_and_score)} matching Mitigations")
-    mit_to_score = {mit: score for mit, score in filter_and_score}
+def mitigation_search(search_tsqry, mitigation_sources, version, limit=None):
+    """Performs a full Mitigation search and returns highlighted & ranked results
 
-    # fetch details of matching mitigations
-    logger.debug("querying details for the earlier-matched Mitigations")
-    result_subq = (
-        db.session.query(
-            Mitigation.mit_id,  # 0
-            Mitigation.name,  # 1
-            Mitigation.description,  # 2
-            Mitigation.description,  # 3
-            MitigationSource.source,  # 4
-            MitigationSource.display_name,  # 5
-            literal_column(search_tsqry).label("tsqry"),  # 6
-        )
-        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
-        .filter(or_(not mitigation_sources, func.lower(func.replace(MitigationSource.source, " ", "_")).in_(mitigation_sources)))
-        .filter(Mitigation.mit_id.in_(list(mit_to_score.keys())))
-    ).subquery()
-
-    # generate highlights for ID, Name, Description
+    - filtering, ranking, limiting, and highlighting is all 1 statement, highlights only made for returned rows
+    - returns (list[dict], int): the results (ordered by score, then Mitigation ID), and the number of matches
+    """
+    results = []
 
-    # processing tech desc for ts_headline is easier to read as multiple stages
+    # processing mitigation desc for ts_headline is easier to read as multiple stages
     s0 = PSQLTxt.unaccent("description")
     s1 = PSQLTxt.no_html(s0)
     s2 = PSQLTxt.no_citation_nums(s1)
     s3 = PSQLTxt.no_md_urls(s2)
     s4 = PSQLTxt.newlines_as_space(s3)
-    tech_desc_processed = PSQLTxt.zwspace_pad_special(s4)
+    mit_desc_processed = PSQLTxt.zwspace_pad_special(s4)
 
-    tech_desc_headline = PSQLTxt.multiline_cleanup(
+    mit_desc_headline = PSQLTxt.multiline_cleanup(
         f"""
         ts_headline(
             'english_nostop',
-            {tech_desc_processed},
+            {mit_desc_processed},
             tsqry,
             '
                 HighlightAll=false,
@@ -503,26 +518,72 @@ def mitigation_search(search_tsqry, mitigation_sources, version):
     """
     )
 
+    # CTE: Mitigations filtered by version / Mitigation Source selections, matched, ranked, counted, cut to the top-N
+    # - Mitigations have no version of their own, they are scoped through their source (mitigation_source_mit_id_index)
+    tsqry = literal_column(search_tsqry)
+    tsvec = literal_column("mitigation.mit_ts")
+    score = func.ts_rank(tsvec, tsqry)
+    ranked = (
+        db.session.query(Mitigation.uid, score.label("score"), func.count().over().label("num_matches"))
+        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
+        .filter(MitigationSource.attack_version == version)
+        .filter(
+            or_(
+                not mitigation_sources,
+                func.lower(func.replace(MitigationSource.source, " ", "_")).in_(mitigation_sources),
+            )
+        )
+        .filter(tsvec.op("@@")(tsqry))
+        .order_by(score.desc(), Mitigation.mit_id)
+        .limit(limit)
+    ).cte("ranked")
+
+    top_subq = (
+        db.session.query(
+            Mitigation.mit_id.label("mit_id"),
+            Mitigation.name.label("name"),
+            Mitigation.description.label("description"),
+            MitigationSource.source.label("source"),
+            MitigationSource.display_name.label("display_name"),
+            ranked.c.score.label("score"),
+            ranked.c.num_matches.label("num_matches"),
+            tsqry.label("tsqry"),
+        )
+        .select_from(ranked)
+        .join(Mitigation, Mitigation.uid == ranked.c.uid)
+        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
+    ).subquery()
+
+    logger.debug("querying Mitigations filtered by Mitigation Source selections, ranked, and highlighted")
     result_q = (
         db.session.query(
-            result_subq,
-            # 6, 7, 8
+            top_subq.c.mit_id,  # 0
+            top_subq.c.name,  # 1
+            top_subq.c.description,  # 2
+            top_subq.c.source,  # 3
+            top_subq.c.display_name,  # 4
+            top_subq.c.score,  # 5
+            top_subq.c.num_matches,  # 6
+            # 7, 8, 9
             literal_column(PSQLTxt.basic_headline(PSQLTxt.zwspace_pad_special("mit_id"), "tsqry")).label("hl_id"),
             literal_column(PSQLTxt.basic_headline(PSQLTxt.unaccent("name"), "tsqry")).label("hl_name"),
-            literal_column(tech_desc_headline).label("hl_desc")
+            literal_column(mit_desc_headline).label("hl_desc"),
         )
+        .order_by(top_subq.c.score.desc(), top_subq.c.mit_id)
     ).all()
-    logger.debug("query finished")
+    num_matches = result_q[0].num_matches if result_q else 0
+    logger.debug(f"got {num_matches} matching Mitigations, {len(result_q)} returned")
 
     # build response
+    paths = get_navigation_graph(version)  # precomputed app paths
     for (
         mit_id,
         mit_name,
         mit_desc,
-        mit_url, #desc replica
         mit_src,
         mit_src_display_name,
-        _,  # tsqry
+        score,
+        _,  # num_matches
         hl_id,
         hl_name,
         hl_desc,
@@ -547,78 +608,22 @@ def mitigation_search(search_tsqry, mitigation_sources, version):
                 "mitigation_name_plain": mit_name,
                 "description": tdesc,
                 "attack_url": "http://localhost/test",
-                "internal_url": url_for(
-                    "mitigations_.mitigation_success", version=version, source=mit_src.lower(), mit_id=mit_id
-                ),
-                "score": mit_to_score[mit_id],
+                "internal_url": paths.mitigation_path(mit_src, mit_id),
+                "score": score,
             }
         )
-    
-    return results
 
-def mitigation_use_search(search_tsqry, mitigation_sources, version):
-    results = []
-    
-    tsvec = PSQLTxt.multiline_cleanup(
-        """
-        technique_mitigation_map.tech_mit_use_ts 
-    """
-    )
-
-    # filter Mitigations by Mitigation Source filters, then generate tsvecs for remaining
-    logger.debug("querying Technqiue Mitigations Use filtered by Mitigation Source, and Technique Version selections and ranked by relevance")
-    
-    mit_subq = (
-        db.session.query(
-            technique_mitigation_map.c.uid,  # 0
-            literal_column(tsvec).label("tsvec"),  # 1
-            literal_column(search_tsqry).label("tsqry"),  # 2
-        )
-        .join(Mitigation, Mitigation.uid == technique_mitigation_map.c.mitigation)
-        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
-        .join(Technique, Technique.uid == technique_mitigation_map.c.technique)
-        .filter(or_(not mitigation_sources, func.lower(func.replace(MitigationSource.source, " ", "_")).in_(mitigation_sources)))
-        .filter(Technique.attack_version == version)
-    ).subquery()    
+    return results, num_matches
 
-    # get techniques matching search tsquery
-    generate_existing = (db.session.query(mit_subq, literal_column("tsvec @@ tsqry").label("exists"))).subquery()
+def mitigation_use_search(search_tsqry, mitigation_sources, version, limit=None):
+    """Full search of how Mitigations apply to Techniques (their 'use') - returns highlighted & ranked results
 
-    # filter non-matching and get scores - returns IDs and their scores, pull into dict
-    filter_and_scoreq = (
-        db.session.query(
-            generate_existing.c.uid,
-            literal_column("ts_rank(tsvec, tsqry)").label("score"),
-        ).filter(generate_existing.c.exists)
-    )
-    
-    filter_and_score = filter_and_scoreq.all()
-
-    print(f"got {len(filter_and_score)} matching Uses for Technique Mitigations")
-    mit_to_score = {mit: score for mit, score in filter_and_score}
-
-    # fetch details of matching mitigations
-    print("querying details for the earlier-matched Uses for Technique Mitigation")
-    result_subq = (
-        db.session.query(
-            technique_mitigation_map.c.uid,  # 0
-            technique_mitigation_map.c.use,  # 1
-            Technique.tech_id,  # 2
-            Technique.tech_name,  # 3
-            Mitigation.mit_id,  # 4
-            Mitigation.name,  # 5
-            MitigationSource.source,  # 7
-            MitigationSource.display_name,  # 8
-            literal_column(search_tsqry).label("tsqry"),  # 9
-        )
-        .join(Mitigation, Mitigation.uid == technique_mitigation_map.c.mitigation)
-        .join(Technique, Technique.uid == technique_mitigation_map.c.technique)
-        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
-        .filter(or_(not mitigation_sources, func.lower(func.replace(MitigationSource.source, " ", "_")).in_(mitigation_sources)))
-        .filter(technique_mitigation_map.c.uid.in_(list(mit_to_score.keys())))
-    ).subquery()
+    - filtering, ranking, limiting, and highlighting is all 1 statement, highlights only made for returned rows
+    - returns (list[dict], int): the results (ordered by score), and the number of matches
+    """
+    results = []
 
-    # processing tech desc for ts_headline is easier to read as multiple stages
+    # processing use for ts_headline is easier to read as multiple stages
     s0 = PSQLTxt.unaccent("use")
     s1 = PSQLTxt.no_html(s0)
     s2 = PSQLTxt.no_citation_nums(s1)
@@ -645,23 +650,78 @@ def mitigation_use_search(search_tsqry, mitigation_sources, version):
     """
     )
 
+    # CTE: Technique Mitigation Uses filtered by Mitigation Source and version, matched, ranked, counted, and cut
+    tsqry = literal_column(search_tsqry)
+    tsvec = literal_column("technique_mitigation_map.tech_mit_use_ts")
+    score = func.ts_rank(tsvec, tsqry)
+    ranked = (
+        db.session.query(
+            technique_mitigation_map.c.uid, score.label("score"), func.count().over().label("num_matches")
+        )
+        .join(Mitigation, Mitigation.uid == technique_mitigation_map.c.mitigation)
+        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
+        .join(Technique, Technique.uid == technique_mitigation_map.c.technique)
+        .filter(MitigationSource.attack_version == version)
+        .filter(
+            or_(
+                not mitigation_sources,
+                func.lower(func.replace(MitigationSource.source, " ", "_")).in_(mitigation_sources),
+            )
+        )
+        .filter(Technique.attack_version == version)
+        .filter(tsvec.op("@@")(tsqry))
+        .order_by(score.desc(), technique_mitigation_map.c.uid)
+        .limit(limit)
+    ).cte("ranked")
+
+    top_subq = (
+        db.session.query(
+            technique_mitigation_map.c.use.label("use"),
+            Technique.tech_id.label("tech_id"),
+            Technique.tech_name.label("tech_name"),
+            Mitigation.mit_id.label("mit_id"),
+            Mitigation.name.label("name"),
+            MitigationSource.source.label("source"),
+            MitigationSource.display_name.label("display_name"),
+            ranked.c.uid.label("uid"),
+            ranked.c.score.label("score"),
+            ranked.c.num_matches.label("num_matches"),
+            tsqry.label("tsqry"),
+        )
+        .select_from(ranked)
+        .join(technique_mitigation_map, technique_mitigation_map.c.uid == ranked.c.uid)
+        .join(Mitigation, Mitigation.uid == technique_mitigation_map.c.mitigation)
+        .join(Technique, Technique.uid == technique_mitigation_map.c.technique)
+        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
+    ).subquery()
+
+    logger.debug("querying Technique Mitigation Uses filtered by Mitigation Source, ranked, and highlighted")
     result_q = (
         db.session.query(
-            result_subq,
-            # 10, 11, 12, 13, 14
+            top_subq.c.use,  # 0
+            top_subq.c.tech_id,  # 1
+            top_subq.c.tech_name,  # 2
+            top_subq.c.mit_id,  # 3
+            top_subq.c.name,  # 4
+            top_subq.c.source,  # 5
+            top_subq.c.display_name,  # 6
+            top_subq.c.score,  # 7
+            top_subq.c.num_matches,  # 8
+            # 9, 10, 11, 12, 13
             literal_column(PSQLTxt.basic_headline(PSQLTxt.zwspace_pad_special("mit_id"), "tsqry")).label("hl_mit_id"),
             literal_column(PSQLTxt.basic_headline(PSQLTxt.unaccent("name"), "tsqry")).label("hl_mit_name"),
             literal_column(PSQLTxt.basic_headline(PSQLTxt.zwspace_pad_special("tech_id"), "tsqry")).label("hl_tech_id"),
             literal_column(PSQLTxt.basic_headline(PSQLTxt.unaccent("tech_name"), "tsqry")).label("hl_tech_name"),
-            literal_column(mit_tech_use_headline).label("hl_use")
+            literal_column(mit_tech_use_headline).label("hl_use"),
         )
+        .order_by(top_subq.c.score.desc(), top_subq.c.uid)
     ).all()
-
-    logger.debug("query finished")
+    num_matches = result_q[0].num_matches if result_q else 0
+    logger.debug(f"got {num_matches} matching Uses for Technique Mitigations, {len(result_q)} returned")
 
     # build response
+    paths = get_navigation_graph(version)  # precomputed app paths
     for (
-        mit_tech_uid,
         mit_tech_use,
         tech_id,
         tech_name,
@@ -669,7 +729,8 @@ def mitigation_use_search(search_tsqry, mitigation_sources, version):
         mit_name,
         mit_src,
         mit_src_display_name,
-        _,  # tsqry
+        score,
+        _,  # num_matches
         hl_mit_id,
         hl_mit_name,
         hl_tech_id,
@@ -697,83 +758,63 @@ def mitigation_use_search(search_tsqry, mitigation_sources, version):
                 "mitigation_name": hl_mit_name,
                 "use_name_plain": hl_tech_name +"("+tech_id+")" + " - " + hl_mit_name +"("+ mit_id+")",
                 "use": hl_use,
-                "attack_url": "http://localhost/test",                
-                "internal_url": url_for(
-                    "mitigations_.mitigation_success", version=version, source=mit_src.lower(), mit_id=mit_id, _anchor=tech_id
-                ),
-                "score": mit_to_score[mit_tech_uid],
+                "attack_url": "http://localhost/test",
+                "internal_url": paths.mitigation_path(mit_src, mit_id, anchor=tech_id),
+                "score": score,
             }
         )
-    
-    return results
 
-def usage_example_search(search_tsqry, mitigation_sources, version):
-    results = []
-    
-    tsvec = PSQLTxt.multiline_cleanup(
-        """
-        blurb.blurb_ts 
+    return results, num_matches
+
+def usage_example_search(search_tsqry, mitigation_sources, version, limit=None):
+    """Performs a full search of Usage Examples (blurbs citing Technique use) and returns ranked results
+
+    - filtering, ranking, and limiting is all 1 statement
+    - returns (list[dict], int): the results (ordered by score), and the number of matches
     """
-    )
+    results = []
 
-    # filter Blurbs then generate tsvecs for remaining
-    logger.debug("querying Usage Example selections and ranked by relevance")
-    
-    blurb_subq = (
-        db.session.query(
-            Blurb.uid,  # 0
-            literal_column(tsvec).label("tsvec"),  # 1
-            literal_column(search_tsqry).label("tsqry"),  # 2
-        )
+    # CTE: Usage Examples of version, matched, ranked, counted, and cut to the top-N
+    tsqry = literal_column(search_tsqry)
+    score = func.ts_rank(Blurb.blurb_ts, tsqry)
+    ranked = (
+        db.session.query(Blurb.uid, score.label("score"), func.count().over().label("num_matches"))
         .join(Technique, Technique.uid == Blurb.technique)
         .filter(Technique.attack_version == version)
-    ).subquery()    
+        .filter(Blurb.blurb_ts.op("@@")(tsqry))
+        .order_by(score.desc(), Blurb.uid)
+        .limit(limit)
+    ).cte("ranked")
 
-    # get techniques matching search tsquery
-    generate_existing = (db.session.query(blurb_subq, literal_column("tsvec @@ tsqry").label("exists"))).subquery()
-
-    # filter non-matching and get scores - returns IDs and their scores, pull into dict
-    filter_and_scoreq = (
-        db.session.query(
-            generate_existing.c.uid,
-            literal_column("ts_rank(tsvec, tsqry)").label("score"),
-        ).filter(generate_existing.c.exists)
-    )
-    
-    filter_and_score = filter_and_scoreq.all()
-
-    print(f"got {len(filter_and_score)} matching Usage Examples")
-    blurb_to_score = {blurb: score for blurb, score in filter_and_score}
-
-    # fetch details of matching blurbs
-    print("querying details for the earlier-matched Uses for Technique Mitigation")
-    result_subq = (
+    logger.debug("querying Usage Examples ranked by relevance")
+    result_q = (
         db.session.query(
             Blurb.uid,  # 0
             Blurb.sentence.regexp_replace('(<sup.*\\/sup>|\\(http.*?\\))', '', 'g').regexp_replace('([^\\[]*)\\[(.*?)\\](.*)', '\\2', 'g').label("use_threat_actor"), # 1
             Technique.tech_id, # 2
             Technique.tech_name, # 3
             Blurb.sentence,  # 4
+            ranked.c.score,  # 5
+            ranked.c.num_matches,  # 6
         )
+        .select_from(ranked)
+        .join(Blurb, Blurb.uid == ranked.c.uid)
         .join(Technique, Technique.uid == Blurb.technique)
-        .filter(Blurb.uid.in_(list(blurb_to_score.keys())))
-    ).subquery()
-
-    result_q = (
-        db.session.query(
-            result_subq
-        )
+        .order_by(ranked.c.score.desc(), Blurb.uid)
     ).all()
-
-    logger.debug("query finished")
+    num_matches = result_q[0].num_matches if result_q else 0
+    logger.debug(f"got {num_matches} matching Usage Examples, {len(result_q)} returned")
 
     # build response
+    paths = get_navigation_graph(version)  # precomputed app paths
     for (
         uid,
         use_threat_actor,
         tech_id,
         tech_name,
         sentence,
+        score,
+        _,  # num_matches
     ) in result_q:
         # for ts_headlined descriptions - finish off any ... between snippets
         if len(use_threat_actor) > 50:
@@ -791,23 +832,34 @@ def usage_example_search(search_tsqry, mitigation_sources, version):
                 "usage_example": True,
                 "tech_id": tech_id,
                 "technique_name": tech_name,
-                "use": tdesc,    
+                "use": tdesc,
                 "actor": use_threat_actor,
-                "internal_url": url_for(
-                    "question_.notactic_success", version=version, subpath=tech_id.replace(".", "/")
-                ),
-                "score": blurb_to_score[uid],
+                "internal_url": paths.technique_path(tech_id),
+                "score": score,
             }
         )
-    
-    return results
+
+    return results, num_matches
 
 
 @search_.route("/search/full", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
 def full_search():
-    
-    results = []
+    """Searches Techniques, Mitigations, Mitigation Uses, and Usage Examples - returning a page of the ranked results
+
+    URL Params (besides the search filters)
+    ---------------------------------------
+    offset : (int) number of top-ranked results to skip (default 0)
+    limit  : (int) max results to return (default FULL_SEARCH_DEFAULT_LIMIT, at most FULL_SEARCH_MAX_LIMIT)
+    - offset + limit can be at most FULL_SEARCH_MAX_DEPTH
+
+    JSON response
+    -------------
+    techniques  : list[dict] the page of results, across all result kinds, ordered by match score
+    facets      : dict       result kind -> number of matches of that kind
+    next_offset : int / null offset of the next page, null if this is the last page (or the next would be too deep)
+    status      : str        human-readable form of the search that was used
+    """
     g.route_title = "Full-Search"
 
     # get and validate parameters
@@ -824,6 +876,12 @@ def full_search():
         logger.debug("request malformed - serving them a 400 code")
         return jsonify(message="Invalid search parameters"), 400
 
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", FULL_SEARCH_DEFAULT_LIMIT, type=int)
+    if (offset < 0) or not (1 <= limit <= FULL_SEARCH_MAX_LIMIT) or (offset + limit > FULL_SEARCH_MAX_DEPTH):
+        logger.error("request malformed - offset / limit out of range")
+        return jsonify(message="Invalid search parameters"), 400
+
     # empty & too-long (arbitrary really) search cases
     if not search_str:
         logger.info("request skipped - no search query entered")
@@ -848,25 +906,49 @@ def full_search():
 
     search_tsqry = tsqry_rep(parsed_search.bool_expr, parsed_search.sym_to_term)
 
-    print (options)
-    if (options is None or len(options) == 0) or "techniques" in options:
-        results.extend(technique_search(search_tsqry, tactics, version, platforms, data_sources))
-
-    if (options is None or len(options) == 0) or "mitigations" in options:
-        results.extend(mitigation_search(search_tsqry, mitigation_sources, version))
-    
-    if (options is None or len(options) == 0) or "mitigation_uses" in options:
-        results.extend(mitigation_use_search(search_tsqry, mitigation_sources, version))
-    
-    if (options is None or len(options) == 0) or "usage_examples" in options:
-        results.extend(usage_example_search(search_tsqry, mitigation_sources, version))
-                
-    # order by match score and then Tech ID
-    results.sort(key=lambda t: (-t["score"])) #, float(t["card_id_plain"][1:])))
-    
+    # each kind only needs its top (offset + limit) results - the page can't include any lower-ranked ones
+    per_kind_limit = offset + limit
+    kind_searches = {
+        "techniques": lambda: technique_search(
+            search_tsqry, tactics, version, platforms, data_sources, per_kind_limit
+        ),
+        "mitigations": lambda: mitigation_search(search_tsqry, mitigation_sources, version, per_kind_limit),
+        "mitigation_uses": lambda: mitigation_use_search(search_tsqry, mitigation_sources, version, per_kind_limit),
+        "usage_examples": lambda: usage_example_search(search_tsqry, mitigation_sources, version, per_kind_limit),
+    }
+
+    # sub-searches are independent read-only queries - run them at the same time on separate connections
+    t0 = time.perf_counter()
+    futures = {
+        kind: run_sub_search_concurrently(kind, kind_search)
+        for kind, kind_search in kind_searches.items()
+        if (not options) or (kind in options)
+    }
+
+    ranked_streams = []
+    facets = {}
+    for kind, future in futures.items():
+        kind_results, facets[kind] = future.result()
+        ranked_streams.append(kind_results)
+    logger.info(f"all sub-searches took {(time.perf_counter() - t0) * 1000:.1f}ms")
+
+    # global top-K: merge the per-kind streams (each already ordered by score) and cut out the requested page
+    merged = heapq.merge(*ranked_streams, key=lambda r: -r["score"])
+    results = list(itertools.islice(merged, offset, offset + limit))
+    has_next_page = ((offset + limit) < sum(facets.values())) and ((offset + 2 * limit) <= FULL_SEARCH_MAX_DEPTH)
+    next_offset = (offset + limit) if has_next_page else None
+
     # send results and what search was used for debugging purposes
-    logger.info("sending search results")
-    return jsonify(techniques=results, status=plain_rep(parsed_search.bool_expr, parsed_search.sym_to_term)), 200
+    logger.info(f"sending search results {offset}-{offset + len(results)} of {sum(facets.values())}")
+    return (
+        jsonify(
+            techniques=results,
+            facets=facets,
+            next_offset=next_offset,
+            status=plain_rep(parsed_search.bool_expr, parsed_search.sym_to_term),
+        ),
+        200,
+    )
 
 @search_.route("/search/answer_cards", methods=["GET"])
 @wrap_exceptions_as(ErrorDuringAJAXRoute)
@@ -909,7 +991,7 @@ def answer_card_search():
         return jsonify(message="ATT&CK version specified is not on server"), 400
 
     logger.debug(f"Checking existince of ATT&CK {version} - it exists")
-    version_model = version_picker.cur_version_model
+    version_entry = version_picker.cur_version_entry
 
     # index (format)
     if is_tact_id(index):  # Tactic -> Techs page
@@ -960,7 +1042,7 @@ def answer_card_search():
 
     # platforms (format, existence)
     logger.debug(f"Checking specified platforms against ATT&CK {version}")
-    valid_platforms = {p.internal_name for p in version_model.platforms}
+    valid_platforms = {p.internal_name for p in version_entry.platforms}
     specified_platforms = set(platforms)
     if len(specified_platforms) != len(specified_platforms.intersection(valid_platforms)):
         logger.error(f"Checking specified platforms against ATT&CK {version} - some are invalid")
@@ -969,7 +1051,7 @@ def answer_card_search():
 
     # data_sources (format, existence)
     logger.debug(f"Checking specified data sources against ATT&CK {version}")
-    valid_data_sources = {s.internal_name for s in version_model.data_sources}
+    valid_data_sources = {s.internal_name for s in version_entry.data_sources}
     specified_data_sources = set(data_sources)
     if len(specified_data_sources) != len(specified_data_sources.intersection(valid_data_sources)):
         logger.error(f"Checking specified data sources against ATT&CK {version} - some are invalid")
@@ -7,8 +7,14 @@ import re
 import markdown
 import bleach
 import html
+import hashlib
+import os
+import tempfile
+import threading
+import time
 from bs4 import BeautifulSoup
 
+from collections import OrderedDict
 from functools import wraps as functools_wraps
 
 from flask import url_for
@@ -150,8 +156,212 @@ def incoming_markdown(unsafe_html):
     return html.escape(unsafe_html)
 
 
+class RenderedMarkdownCache:
+    """Bounded LRU of rendered HTML, keyed by a content hash of the MD it came from
+
+    - identical MD (a Technique description shown on many pages) is only rendered once per worker
+    - shared_dir (optional) is a directory of rendered files shared by all workers / restarts
+      - files are written to a temp file then renamed into place, so readers never see partial HTML
+      - keys include RENDER_REVISION, bump it when render_markdown output changes to orphan old files
+      - bounded to max_shared_files by pruning the oldest-written: at startup, then on a background thread once the
+        count of files (from the last prune + this worker's new files) passes it - so requests never walk the dir
+        (other workers' files are only seen at a prune, so it can briefly exceed the bound by their new files)
+      - its HTML is served as already sanitized, so it's only used if just this user can write to it (made 0700),
+        otherwise only the per-worker cache is used
+    - hit / miss stats are logged every stats_every lookups, and available from stats()
+    """
+
+    RENDER_REVISION = "1"
+
+    def __init__(self, max_entries=4096, shared_dir=None, stats_every=5000, max_shared_files=20000):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # hash -> html
+        self.configure(max_entries, shared_dir, stats_every, max_shared_files)
+
+    def configure(self, max_entries, shared_dir=None, stats_every=5000, max_shared_files=20000):
+        if shared_dir and not self._private_dir(shared_dir):
+            shared_dir = None
+
+        with self._lock:
+            self._max_entries = max_entries
+            self._shared_dir = shared_dir
+            self._max_shared_files = max_shared_files
+            self._shared_files = 0
+            self._pruning = False
+            self._stats_every = stats_every
+            self._hits = self._disk_hits = self._misses = 0
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+        if shared_dir:
+            self._shared_files = self._prune_shared()
+
+    @staticmethod
+    def _private_dir(path):
+        """Makes path (0700) if needed, returns if it's a directory owned by, and only writable by, this user"""
+        try:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            info = os.stat(path)
+        except OSError:
+            logger.warning(f"can't create the shared markdown cache at {path} - using the per-worker cache only")
+            return False
+
+        if (info.st_uid != os.getuid()) or (info.st_mode & 0o022):
+            logger.warning(
+                f"shared markdown cache {path} is writable by other users (or not owned by this one) - "
+                "its HTML would be served unsanitized, so only the per-worker cache is used"
+            )
+            return False
+        return True
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": ((self._hits + self._disk_hits) / lookups) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def get_or_render(self, md, render):
+        key = hashlib.blake2b(f"{self.RENDER_REVISION}\0{md}".encode(), digest_size=16).hexdigest()
+
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._log_stats()
+                return rendered
+
+        rendered = self._read_shared(key)
+        from_disk = rendered is not None
+        if not from_disk:
+            rendered = render(md)
+            self._write_shared(key, rendered)
+
+        with self._lock:
+            self._entries[key] = rendered
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            if from_disk:
+                self._disk_hits += 1
+            else:
+                self._misses += 1
+            self._log_stats()
+        return rendered
+
+    def _log_stats(self):
+        # lock is held by caller
+        lookups = self._hits + self._disk_hits + self._misses
+        if self._stats_every and (lookups % self._stats_every == 0):
+            logger.info(
+                f"markdown render cache - {lookups} lookups: {self._hits} hits, {self._disk_hits} shared hits, "
+                f"{self._misses} misses, {len(self._entries)} entries held"
+            )
+
+    def _shared_path(self, key):
+        return os.path.join(self._shared_dir, key[:2], f"{key}.html")
+
+    def _read_shared(self, key):
+        if not self._shared_dir:
+            return None
+        try:
+            with open(self._shared_path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_shared(self, key, rendered):
+        if not self._shared_dir:
+            return
+        path = self._shared_path(key)
+        try:
+            is_new = not os.path.exists(path)
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(rendered)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"failed to write rendered markdown to shared cache at {path}", exc_info=True)
+            return
+
+        with self._lock:
+            self._shared_files += is_new
+            prune = (self._shared_files > self._max_shared_files) and not self._pruning
+            if prune:
+                self._pruning = True
+        if prune:
+            threading.Thread(target=self._prune_shared_in_background, daemon=True).start()
+
+    def _prune_shared_in_background(self):
+        with self._lock:
+            counted_before = self._shared_files
+        remaining = None
+        try:
+            remaining = self._prune_shared()
+        except Exception:
+            logger.warning("failed to prune the shared markdown cache", exc_info=True)
+        finally:
+            with self._lock:
+                # files written while pruning may or may not have been seen by it - count them again to be safe
+                if remaining is not None:
+                    self._shared_files = remaining + (self._shared_files - counted_before)
+                self._pruning = False
+
+    def _prune_shared(self):
+        """Removes the oldest-written files of shared_dir beyond max_shared_files (down to 90% of it, so a full
+        directory isn't re-pruned right away), along with temp files abandoned by a crashed writer
+
+        returns the number of files left
+        """
+        shared_dir = self._shared_dir
+        files = []
+        abandoned_before = time.time() - 60 * 60
+        for dirpath, _, filenames in os.walk(shared_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    mtime = os.stat(path).st_mtime
+                    if filename.endswith(".html"):
+                        files.append((mtime, path))
+                    elif filename.endswith(".tmp") and (mtime < abandoned_before):
+                        os.remove(path)
+                except OSError:
+                    pass  # removed by another worker's prune
+
+        if len(files) <= self._max_shared_files:
+            return len(files)
+        files.sort()
+        to_remove = files[: len(files) - int(self._max_shared_files * 0.9)]
+        for _, path in to_remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        logger.info(f"pruned {len(to_remove)} oldest files from shared markdown cache {shared_dir}")
+        return len(files) - len(to_remove)
+
+
+# configured from app config in decider.py (MARKDOWN_CACHE_SIZE / MARKDOWN_CACHE_DIR)
+markdown_cache = RenderedMarkdownCache()
+
+
+def _reset_markdown_cache_lock():
+    # forked workers start with a fresh lock - one held by another thread at fork time would never be released
+    # (same for a prune in progress: its thread doesn't exist in the child)
+    markdown_cache._lock = threading.Lock()
+    markdown_cache._pruning = False
+
+
+os.register_at_fork(after_in_child=_reset_markdown_cache_lock)
+
+
 def outgoing_markdown(database_md):
-    """Renders MD to an HTML subset
+    """Renders MD to an HTML subset, served from markdown_cache when this MD was rendered before
 
     - Only text, lists, links, and codeblocks can be used
     - Prevents XSS vulns as well
@@ -159,7 +369,17 @@ def outgoing_markdown(database_md):
 
     if database_md is None or len(database_md) == 0:
         return ""
-    
+
+    return markdown_cache.get_or_render(database_md, render_markdown)
+
+
+def render_markdown(database_md):
+    """Renders MD to an HTML subset (uncached - use outgoing_markdown)
+
+    - Only text, lists, links, and codeblocks can be used
+    - Prevents XSS vulns as well
+    """
+
     # Gives us some control on spacing
     spaced_out = "\n".join(("<br>" if ln == "\\ " else ln) for ln in database_md.split("\n"))
 
@@ -3,15 +3,20 @@ This variant of utils may import from app.models / use app variables
 Check out utils.py for why the separation exists
 """
 
-from app.models import AttackVersion
+from app.domain.content_generation import GenerationCache, generations_etag
+from app.domain.version_catalog import get_catalog
 
-from flask import jsonify, g
+from flask import current_app, jsonify, g, request
 from flask_login import current_user
 
+from functools import wraps as functools_wraps
 import logging
 
 logger = logging.getLogger(__name__)
 
+# appended to a strong ETag when the response is sent gzipped (decider.py compression_setup)
+GZIP_ETAG_SUFFIX = "-gzip"
+
 
 class VersionPicker:
     """Populates global Jinja vars with the current/available versions, provides program with current selected version
@@ -23,13 +28,10 @@ class VersionPicker:
     """
 
     def __init__(self, version=None):
-        logger.debug("VersionPicker querying available ATT&CK versions")
+        logger.debug("VersionPicker reading available ATT&CK versions from catalog")
 
-        ver_str_to_model = {av.version: av for av in AttackVersion.query.all()}
-        self.all_versions = sorted(
-            list(ver_str_to_model.keys()),
-            key=lambda ver_str: float(ver_str.replace("v", "")),
-        )
+        catalog = get_catalog()
+        self.all_versions = list(catalog.versions)
 
         # no versions installed
         if len(self.all_versions) == 0:
@@ -54,9 +56,8 @@ class VersionPicker:
             else:
                 self.cur_version = self.all_versions[-1]
 
-        # provides reference to model if defined - saves
-        # an extra query when getting platforms / tactics
-        self.cur_version_model = ver_str_to_model[self.cur_version] if self.is_valid else None
+        # provides catalog entry (platforms / tactics / data sources / mitigation sources) if defined
+        self.cur_version_entry = catalog.get(self.cur_version) if self.is_valid else None
 
     def set_vars(self):
         # sets global version variables if version is valid; returns if setting was done or not
@@ -70,3 +71,60 @@ class VersionPicker:
 
     def get_invalid_message(self):
         return jsonify(message="The value for version is not a valid version."), 404
+
+
+def generation_cached(scopes_of, cache_bodies=True, max_entries=1024):
+    """Decorator for read-only GET routes whose response is a pure function of their args and some content scopes
+
+    scopes_of    : function(**view_kwargs) -> content scopes the response depends on (can read request.args)
+    cache_bodies : whether to keep responses in a bounded in-process cache (must be False for streamed responses)
+    max_entries  : bound on the number of responses kept, least-recently used are evicted first
+
+    - 200 responses get a strong ETag of the scopes' generations (it changes when any of them is bumped)
+    - a request whose If-None-Match holds that ETag (or its gzip form) gets a 304 without the route running
+    - cached responses are keyed by route + full path (args), and rebuilt once the scopes' generations change
+    - place below @wrap_exceptions_as so failures are still handled by it
+    """
+
+    def decorator(view):
+        def build_response(key):
+            _, _, view_kwargs = key
+            response = current_app.make_response(view(**dict(view_kwargs)))
+            return response.status_code, response.mimetype, response.get_data()
+
+        responses = GenerationCache(
+            build_response,
+            scopes_of=lambda key: scopes_of(**dict(key[2])),
+            max_entries=max_entries,
+        )
+
+        @functools_wraps(view)
+        def wrapper(**view_kwargs):
+            etag = generations_etag(*scopes_of(**view_kwargs))
+
+            # unchanged since client's last pull -> 304 (echoing the form of the ETag the client holds)
+            if etag is not None:
+                held = [tag for tag in (etag, etag + GZIP_ETAG_SUFFIX) if request.if_none_match.contains(tag)]
+                if held:
+                    logger.info(f"{request.path} unchanged since the client's copy, responding 304")
+                    response = current_app.response_class(status=304)
+                    response.set_etag(held[0])
+                    return response
+
+            # without generations nothing would ever invalidate a kept response
+            if cache_bodies and (etag is not None):
+                key = (view.__name__, request.full_path, tuple(sorted(view_kwargs.items())))
+                status, mimetype, body = responses.get(key)
+                response = current_app.response_class(body, status=status, mimetype=mimetype)
+            else:
+                response = current_app.make_response(view(**view_kwargs))
+
+            # clients may keep it, but must revalidate it as content can change at any time
+            if (etag is not None) and (response.status_code == 200):
+                response.set_etag(etag)
+                response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1393,6 +1393,8 @@ document.addEventListener('alpine:init', function () {
         data_sources: [],
 
         results: [],
+        facets: {},
+        nextOffset: null,
 
         init() {
             // initial URL read -> then auto write it & auto search
@@ -1427,6 +1429,32 @@ document.addEventListener('alpine:init', function () {
         },
 
         async doSearch() {
+            const data = await this.fetchResultsPage(0);
+            if (data === null) {
+                return;
+            }
+
+            // don't annoy user if they haven't typed anything
+            if (data.status === 'Please type a search query') {
+                this.searchStatus = '';
+            } else {
+                this.searchStatus = data.status;
+            }
+            this.results = data.techniques;
+            this.facets = data.facets ?? {};
+            this.nextOffset = data.next_offset ?? null;
+        },
+
+        async loadMoreResults() {
+            const data = await this.fetchResultsPage(this.nextOffset);
+            if (data === null) {
+                return;
+            }
+            this.results = this.results.concat(data.techniques ?? []);
+            this.nextOffset = data.next_offset ?? null;
+        },
+
+        async fetchResultsPage(offset) {
             const response = await fetchV2({
                 url: '/search/full',
                 params: {
@@ -1437,26 +1465,19 @@ document.addEventListener('alpine:init', function () {
                     mitigation_sources: this.mitigation_sources,
                     platforms: this.platforms,
                     data_sources: this.data_sources,
+                    offset: offset,
                 },
             });
             if (response.netFail) {
                 doToast('Failed to perform search due to network issue. Please refresh.', false);
-                return;
+                return null;
             }
             if (!response.ok) {
                 const message = response.data.message ?? 'Unknown error';
                 doToast(`Search Failed: ${message}`, false);
-                return;
+                return null;
             }
-            const data = response.data;
-
-            // don't annoy user if they haven't typed anything
-            if (data.status === 'Please type a search query') {
-                this.searchStatus = '';
-            } else {
-                this.searchStatus = data.status;
-            }
-            this.results = data.techniques;
+            return response.data;
         },
     }));
 });
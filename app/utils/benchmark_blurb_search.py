@@ -0,0 +1,72 @@
+# standalone script to time a Usage Example (blurb) search match with and without blurb_ts_index
+# - blurb is the largest searched table: the unindexed run forces sequential scans, so it isn't part of the build
+# - needs a built DB: python -m app.utils.benchmark_blurb_search --config DefaultConfig --version v14.0
+
+from flask import Flask
+from sqlalchemy.sql import text as sql_text
+
+from app.models import db
+from app.utils.db.util import get_config_option_map, option_selector
+
+import argparse
+import time
+
+import sys
+
+BLURB_MATCH = sql_text(
+    """
+    SELECT count(*) FROM blurb JOIN technique ON technique.uid = blurb.technique
+    WHERE technique.attack_version = :version
+    AND blurb.blurb_ts @@ to_tsquery('english_nostop', :tsqry)
+    """
+)
+
+
+def benchmark_blurb_search_index(version, tsqry, runs):
+    params = {"version": version, "tsqry": tsqry}
+
+    # SET LOCALs are undone by rolling back to the savepoint
+    savepoint = db.session.begin_nested()
+    for name, disable_index in (("with search index", False), ("sequential scan", True)):
+        if disable_index:
+            db.session.execute(sql_text("SET LOCAL enable_bitmapscan = off; SET LOCAL enable_indexscan = off;"))
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            matches = db.session.execute(BLURB_MATCH, params).scalar()
+        elapsed_ms = (time.perf_counter() - t0) * 1000 / runs
+        print(f"    {name:<24}: {elapsed_ms:>8.2f}ms avg over {runs} runs ({matches} matches)")
+    savepoint.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser("Times a Usage Example search match with and without its search index.")
+    parser.add_argument("--config", help="The database configuration to use (from app/conf.py).")
+    parser.add_argument("--version", required=True, help="Installed ATT&CK version to time (e.g. v14.0).")
+    parser.add_argument("--tsqry", default="process:* & (inject:* | create:*)", help="tsquery to match blurbs with.")
+    parser.add_argument("--runs", type=int, default=10, help="Runs to average over.")
+    args = parser.parse_args()
+
+    # perform config selection, can fail on bad cmdline pick
+    try:
+        app_config = option_selector(
+            get_config_option_map(),
+            default="DefaultConfig",
+            initial_msg="Available app/database configs",
+            prompt_msg="Which config to use",
+            invalid_msg="is NOT a valid config from",
+            cmdline_pick=args.config,
+        )
+    except Exception as ex:
+        print(f"Invalid command-line selection made:\n{ex}")
+        sys.exit(1)
+
+    app = Flask(__name__)
+    app.config.from_object(app_config)
+    db.init_app(app)
+    with app.app_context():
+        print(f"Usage Example search under {args.version} ({args.tsqry}):")
+        benchmark_blurb_search_index(args.version, args.tsqry, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# standalone script to time building result paths with url_for per row vs the NavigationGraph's precomputed paths
+# - no DB needed: runs on a synthetic version with the question / mitigation blueprints registered
+# - usage: python -m app.utils.benchmark_paths --rows 2000 --runs 20
+
+from flask import Flask, url_for
+
+from app.domain.navigation_graph import NavigationGraph
+from app.routes.mitigation import mitigations_
+from app.routes.question import question_
+
+import argparse
+import time
+
+VERSION = "v14.0"
+
+
+def synthetic_graph(tech_ids, mit_ids):
+    return NavigationGraph(
+        version=VERSION,
+        tactics={},
+        techniques={},
+        tactic_paths={},
+        technique_paths={
+            tech_id: url_for("question_.notactic_success", version=VERSION, subpath=tech_id.replace(".", "/"))
+            for tech_id in tech_ids
+        },
+        mitigation_paths={
+            ("MITRE", mit_id): url_for(
+                "mitigations_.mitigation_success", version=VERSION, source="mitre", mit_id=mit_id
+            )
+            for mit_id in mit_ids
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser("Times url_for per result row against precomputed NavigationGraph paths.")
+    parser.add_argument("--rows", type=int, default=2000, help="Result rows per simulated response.")
+    parser.add_argument("--runs", type=int, default=20, help="Simulated responses to average over.")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.register_blueprint(mitigations_)
+    app.register_blueprint(question_)
+
+    # 2/3 Technique results, 1/3 Mitigation results - like a broad full search
+    tech_ids = [f"T{1000 + n // 4}" if n % 4 == 0 else f"T{1000 + n // 4}.{n % 4:03}" for n in range(args.rows)]
+    mit_ids = [f"M{1000 + n}" for n in range(args.rows)]
+    num_mits = args.rows // 3
+
+    with app.test_request_context():
+        graph = synthetic_graph(tech_ids, mit_ids[:num_mits])
+
+        def with_url_for():
+            return [
+                url_for("question_.notactic_success", version=VERSION, subpath=tech_id.replace(".", "/"))
+                for tech_id in tech_ids[num_mits:]
+            ] + [
+                url_for("mitigations_.mitigation_success", version=VERSION, source="mitre", mit_id=mit_id)
+                for mit_id in mit_ids[:num_mits]
+            ]
+
+        def with_graph():
+            return [graph.technique_path(tech_id) for tech_id in tech_ids[num_mits:]] + [
+                graph.mitigation_path("MITRE", mit_id) for mit_id in mit_ids[:num_mits]
+            ]
+
+        assert with_url_for() == with_graph()
+
+        print(f"Building {args.rows} result paths, averaged over {args.runs} runs:")
+        for name, build in (("url_for per row", with_url_for), ("NavigationGraph paths", with_graph)):
+            t0 = time.perf_counter()
+            for _ in range(args.runs):
+                build()
+            elapsed_ms = (time.perf_counter() - t0) * 1000 / args.runs
+            print(f"    {name:<24}: {elapsed_ms:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# standalone script to time the success page's relationship fetching on an installed version
+# - the previous single GROUP BY (Tactics x Platforms x AKAs x Mitigations joined) against the helpers used now
+#   (get_mitigations() alone, and all of success_page_vars()), on the Techniques with the most Mitigations
+# - needs a built DB: python -m app.utils.benchmark_success_page --config DefaultConfig --version v14.0
+
+from flask import Flask
+from sqlalchemy import func
+from sqlalchemy.sql import text as sql_text
+
+from app.domain.navigation_graph import get_navigation_graph
+from app.models import db, Technique, technique_mitigation_map
+from app.routes.mitigation import mitigations_
+from app.routes.question import question_, get_mitigations, success_page_vars
+from app.utils.db.util import get_config_option_map, option_selector
+
+import argparse
+import time
+
+import sys
+
+# how success pages fetched their Tactics / Platforms / AKAs / Mitigations before, kept only as the baseline
+JOINED_GROUP_BY = sql_text(
+    """
+    SELECT technique.uid,
+        array_agg(distinct(ARRAY[tactic.tact_id, tactic.tact_name])),
+        array_agg(distinct(platform.readable_name)),
+        array_remove(array_agg(distinct(aka.term)), NULL),
+        array_agg(distinct(ARRAY[mitigation.mit_id, mitigation_source.source, mitigation_source.display_name,
+            mitigation_source.url, mitigation.name, mitigation.description, technique_mitigation_map.use]))
+    FROM technique
+    JOIN tactic_technique_map ON tactic_technique_map.technique = technique.uid
+    JOIN tactic ON tactic.uid = tactic_technique_map.tactic
+    LEFT JOIN technique_platform_map ON technique_platform_map.technique = technique.uid
+    LEFT JOIN platform ON platform.uid = technique_platform_map.platform
+    LEFT JOIN technique_aka_map ON technique_aka_map.technique = technique.uid
+    LEFT JOIN aka ON aka.uid = technique_aka_map.aka
+    LEFT JOIN technique_mitigation_map ON technique_mitigation_map.technique = technique.uid
+    LEFT JOIN mitigation ON mitigation.uid = technique_mitigation_map.mitigation
+    LEFT JOIN mitigation_source ON mitigation_source.uid = mitigation.mitigation_source
+    WHERE technique.uid = :uid
+    GROUP BY technique.uid
+    """
+)
+
+
+def most_mitigated_techniques(version, top):
+    """Returns [(Technique UID, Technique ID, number of Mitigation uses)] of the top Techniques of a version"""
+    num_uses = func.count(technique_mitigation_map.c.mitigation)
+    return (
+        db.session.query(Technique.uid, Technique.tech_id, num_uses)
+        .join(technique_mitigation_map, technique_mitigation_map.c.technique == Technique.uid)
+        .filter(Technique.attack_version == version)
+        .group_by(Technique.uid, Technique.tech_id)
+        .order_by(num_uses.desc())
+        .limit(top)
+    ).all()
+
+
+def avg_ms(fn, runs):
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / runs
+
+
+def main():
+    parser = argparse.ArgumentParser("Times success page relationship fetching: joined GROUP BY vs current helpers.")
+    parser.add_argument("--config", help="The database configuration to use (from app/conf.py).")
+    parser.add_argument("--version", required=True, help="Installed ATT&CK version to time (e.g. v14.0).")
+    parser.add_argument("--top", type=int, default=5, help="Number of most-mitigated Techniques to time.")
+    parser.add_argument("--runs", type=int, default=10, help="Runs to average over, per Technique.")
+    args = parser.parse_args()
+
+    # perform config selection, can fail on bad cmdline pick
+    try:
+        app_config = option_selector(
+            get_config_option_map(),
+            default="DefaultConfig",
+            initial_msg="Available app/database configs",
+            prompt_msg="Which config to use",
+            invalid_msg="is NOT a valid config from",
+            cmdline_pick=args.config,
+        )
+    except Exception as ex:
+        print(f"Invalid command-line selection made:\n{ex}")
+        sys.exit(1)
+
+    # success_page_vars() builds paths with url_for, which needs the blueprints and a request context
+    app = Flask(__name__)
+    app.config.from_object(app_config)
+    db.init_app(app)
+    app.register_blueprint(mitigations_)
+    app.register_blueprint(question_)
+
+    with app.test_request_context():
+        graph = get_navigation_graph(args.version)
+
+        for uid, tech_id, num_uses in most_mitigated_techniques(args.version, args.top):
+            # page as reached through the Technique's first Tactic
+            tactic_context = min(graph.technique(tech_id).tactic_ids)
+
+            print(f"{tech_id} ({num_uses} Mitigation uses), averaged over {args.runs} runs:")
+            timings = (
+                ("joined GROUP BY", lambda: db.session.execute(JOINED_GROUP_BY, {"uid": uid}).all()),
+                ("get_mitigations()", lambda: get_mitigations(uid)),
+                ("success_page_vars()", lambda: success_page_vars(tech_id, tactic_context, args.version)),
+            )
+            for name, fetch in timings:
+                print(f"    {name:<24}: {avg_ms(fetch, args.runs):>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# standalone script to pre-compress static assets into .gz (and .br) siblings - served by uWSGI's static-gzip-all
+# - run at build time (see docker/web/Dockerfile), no app imports needed
+# - biggest wins: bootstrap, docx, minisearch, and the user guide HTML (~2MB)
+# - .br siblings are only written if the optional brotli package is installed (pip install Brotli)
+# - usage: python -m app.utils.compress_static [--static-dir app/static] [--min-bytes 1024] [--no-brotli] [--clean]
+
+import argparse
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# text-like assets - fonts / images are either already compressed or tiny
+COMPRESSIBLE_EXTENSIONS = (".css", ".html", ".js", ".json", ".map", ".mjs", ".svg", ".txt", ".ttf", ".eot")
+COMPRESSED_EXTENSIONS = (".gz", ".br")
+
+# a sibling not at least this much smaller than its source isn't worth serving
+MAX_RATIO = 0.9
+
+
+def compressible_files(static_dir, min_bytes):
+    """Yields paths of the files under static_dir worth compressing"""
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            if filename.endswith(COMPRESSIBLE_EXTENSIONS) and (os.path.getsize(path) >= min_bytes):
+                yield path
+
+
+def write_sibling(path, extension, compress):
+    """Writes path + extension holding compress(content of path), returns its size (None if it wasn't worth it)
+
+    - an existing sibling newer than its source is kept as-is
+    """
+    sibling = path + extension
+    if os.path.exists(sibling) and (os.path.getmtime(sibling) >= os.path.getmtime(path)):
+        return os.path.getsize(sibling)
+
+    with open(path, "rb") as fh:
+        data = fh.read()
+    compressed = compress(data)
+
+    if len(compressed) > len(data) * MAX_RATIO:
+        if os.path.exists(sibling):
+            os.remove(sibling)
+        return None
+
+    with open(sibling, "wb") as fh:
+        fh.write(compressed)
+    return len(compressed)
+
+
+def remove_siblings(static_dir):
+    """Removes every .gz / .br file under static_dir, returns how many were removed"""
+    removed = 0
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            if filename.endswith(COMPRESSED_EXTENSIONS):
+                os.remove(os.path.join(dirpath, filename))
+                removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser("Pre-compresses static assets into .gz / .br siblings.")
+    parser.add_argument("--static-dir", default="app/static", help="Directory of the static assets.")
+    parser.add_argument("--min-bytes", type=int, default=1024, help="Files smaller than this aren't compressed.")
+    parser.add_argument("--no-brotli", action="store_true", help="Only write .gz siblings.")
+    parser.add_argument("--clean", action="store_true", help="Remove all .gz / .br siblings instead.")
+    args = parser.parse_args()
+
+    if args.clean:
+        print(f"Removed {remove_siblings(args.static_dir)} compressed siblings from {args.static_dir}")
+        return
+
+    # mtime=0 keeps .gz output identical between builds of the same source
+    compressors = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is None:
+        print("brotli isn't installed - only writing .gz siblings")
+    elif not args.no_brotli:
+        compressors[".br"] = lambda data: brotli.compress(data, quality=11)
+
+    totals = {"source": 0, **{extension: 0 for extension in compressors}}
+    for path in compressible_files(args.static_dir, args.min_bytes):
+        size = os.path.getsize(path)
+        totals["source"] += size
+        for extension, compress in compressors.items():
+            # not worth compressing -> the source itself is served
+            totals[extension] += write_sibling(path, extension, compress) or size
+
+    print(f"Compressed {args.static_dir} ({totals['source'] / 1024:.1f} KiB of compressible files):")
+    for extension in compressors:
+        print(f"    {extension:<4}: {totals[extension] / 1024:>10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
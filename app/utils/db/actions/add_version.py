@@ -153,7 +153,7 @@ def main():
 
         # ATT&CK + Tree content
         try:
-            db_create.attack.add_version(to_install, src_mgr)
+            db_create.attack.add_version(to_install, src_mgr, run_postbuild=False)
         except Exception as ex:
             tfail = time.time() - t0
             print(
@@ -165,7 +165,7 @@ def main():
         # AKAs
         if akas_loaded:
             try:
-                db_create.akas.add_version(to_install, src_mgr)
+                db_create.akas.add_version(to_install, src_mgr, run_postbuild=False)
             except Exception as ex:
                 tfail = time.time() - t0
                 print(f"Failed to add AKAs for version {to_install} at {tfail:.1f}s into build - due to:\n{ex}")
@@ -195,6 +195,23 @@ def main():
                 )
                 sys.exit(10)
 
+        # version loads in 1 transaction, then its search vectors / indexes are built
+        try:
+            db.session.commit()
+            db_create.search_facilities([to_install])
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to commit / index content at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(12)
+
+        # signal running app workers that installed content changed
+        try:
+            db_create.content_generations([to_install])
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to bump content generations at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(11)
+
         print("\n------------------------------------------------\n")
         tdone = time.time() - t0
         print(f"SUCCESS - Added Version {to_install} In: {tdone:.1f}s!")
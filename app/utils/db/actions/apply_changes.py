@@ -0,0 +1,171 @@
+from flask import Flask
+
+from app.models import db
+
+from app.domain import content_generation
+from app.utils.db.source_loader import SourceManager
+from app.utils.db.util import option_selector, app_config_selector
+import app.utils.db.read as db_read
+import app.utils.db.create as db_create
+import app.utils.db.update as db_update
+
+from app.constants import BUILD_SOURCES_DIR
+
+import argparse
+import time
+
+import sys
+
+# ---------------------------------------------------------------------------------------------------------------------
+# Applies edits of the on-disk Tree / AKA / CoOccurrence / Mitigation files to an already-installed version
+# - only changed rows are written, in 1 transaction, instead of a remove_version + add_version round trip
+# - the ATT&CK bundle itself isn't diffed: a new ATT&CK release is a new version in Decider
+# - carts are untouched
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def main():
+    # optional avenue of command-line instead of text-ui
+    parser = argparse.ArgumentParser("Applies on-disk content changes to an ATT&CK version already in the DB.")
+    parser.add_argument("--config", help="The database configuration to use (from app/conf.py).")
+    parser.add_argument("--version", help="ATT&CK version to be updated.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes, but roll them back.")
+    args = parser.parse_args()
+
+    # ensure all-or-nothing command-line argument pick
+    if len([a for a in (args.config, args.version) if a is not None]) not in [0, 2]:
+        print("Either ALL or NONE of the command-line args should be defined. Exiting.")
+        sys.exit(1)
+
+    # perform config selection, can fail on bad cmdline pick
+    try:
+        app_config = app_config_selector(args.config)
+    except Exception as ex:
+        print(f"Invalid command-line selection made:\n{ex}")
+        sys.exit(2)
+
+    print("\n------------------------------------------------\n")
+
+    app = Flask(__name__)
+    app.config.from_object(app_config)
+    db.init_app(app)
+    with app.app_context():
+        # RESOURCE LOADING --------------------------------------------------------------------------------------------
+        src_mgr = SourceManager(BUILD_SOURCES_DIR)
+
+        # Determine existing content
+        try:
+            versions_installed = set(db_read.attack.versions())
+        except Exception as ex:
+            print(f"Failed to read what ATT&CK content is currently installed in the DB - due to:\n{ex}")
+            sys.exit(3)
+        print(f"Currently Installed: {sorted(list(versions_installed))}\n")
+
+        # Updatable versions need Tree content on disk
+        updatable_versions = versions_installed.intersection(set(src_mgr.tree.keys()))
+        if len(updatable_versions) == 0:
+            print("There are no installed versions with Tree content on disk!")
+            return
+
+        # Allow user to select a version to update
+        try:
+            to_update = option_selector(
+                updatable_versions,
+                initial_msg="Versions on-DB with content on-disk",
+                prompt_msg="What version to update",
+                invalid_msg="is NOT a valid version from",
+                cmdline_pick=args.version,
+            )
+        except Exception as ex:
+            print(f"Invalid command-line selection made:\n{ex}")
+            sys.exit(4)
+
+        print("\n------------------------------------------------\n")
+
+        # Load Tree
+        if src_mgr.tree[to_update].load_validate():
+            print("Loaded Tree content (questions / answers).")
+        else:
+            print("Failed to load Tree content (questions / answers). Exiting")
+            sys.exit(5)
+
+        print("\n------------------------------------------------\n")
+
+        # Load optional content - missing / invalid files leave that content as it is in the DB
+        optional_loaded = {}
+        for name, sources in (
+            ("AKAs", src_mgr.akas),
+            ("CoOccurrences", src_mgr.co_ocs),
+            ("Mitigations", src_mgr.mitigations),
+        ):
+            optional_loaded[name] = False
+            if to_update in sources.keys():
+                print(f"Located {name}, attempting to load and include in update.")
+                if sources[to_update].load_validate():
+                    print(f"{name} loaded!")
+                    optional_loaded[name] = True
+                else:
+                    print(f"Failed to load {name}. Skipping for this update.")
+
+        print("\n------------------------------------------------\n")
+
+        # APPLY PROCESS -----------------------------------------------------------------------------------------------
+
+        t0 = time.time()
+
+        try:
+            touched_nodes = db_update.tree.apply_version(to_update, src_mgr)
+            touched_aka_techs = set()
+            if optional_loaded["AKAs"]:
+                touched_aka_techs = db_update.akas.apply_version(to_update, src_mgr)
+            co_ocs_changed = False
+            if optional_loaded["CoOccurrences"]:
+                co_ocs_changed = db_update.coocs.apply_version(to_update, src_mgr)
+            mitigations_changed = False
+            if optional_loaded["Mitigations"]:
+                mitigations_changed = db_update.mitigation.apply_version(to_update, src_mgr)
+
+            # Technique search vectors hold AKAs, so they're refreshed for the Techniques whose AKAs changed
+            # (Tree / Mitigation text feeds generated columns, which Postgres recomputes on update)
+            if touched_aka_techs:
+                db_create.attack.postbuild.refresh_technique_search_vectors(to_update, touched_aka_techs, commit=False)
+        except Exception as ex:
+            db.session.rollback()
+            tfail = time.time() - t0
+            print(f"Failed to apply changes to version {to_update} at {tfail:.1f}s in - due to:\n{ex}")
+            sys.exit(6)
+
+        print("\n------------------------------------------------\n")
+
+        anything_changed = bool(touched_nodes or touched_aka_techs or co_ocs_changed or mitigations_changed)
+        if not anything_changed:
+            db.session.rollback()
+            print(f"Version {to_update} already matches the on-disk content - nothing to apply.")
+            return
+
+        if args.dry_run:
+            db.session.rollback()
+            print("DRY RUN - changes rolled back.")
+            return
+
+        # content change (incl. search vectors) + generation bump commit together
+        # - so workers never cache a half-applied update
+        # - the version scope covers caches of the whole version (CoOccurrence matrix, technique pages)
+        try:
+            content_generation.bump(
+                to_update, *(content_generation.answer_node_scope(to_update, node) for node in touched_nodes)
+            )
+            db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            tfail = time.time() - t0
+            print(f"Failed to commit changes at {tfail:.1f}s in - due to:\n{ex}")
+            sys.exit(7)
+
+        print("\n------------------------------------------------\n")
+        tdone = time.time() - t0
+        print(f"SUCCESS - Applied Changes to Version {to_update} In: {tdone:.1f}s!")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from sqlalchemy import inspect
 
 import traceback
 
-from app.utils.db.source_loader import SourceManager
+from app.utils.db.source_loader import SourceManager, load_validate_parallel
 import app.utils.db.create as db_create
 import app.utils.db.destroy as db_destroy
 import app.utils.db.read as db_read
@@ -27,7 +27,9 @@ from app.env_vars import (
 import sqlalchemy as sqlalch
 
 import argparse
+import multiprocessing
 import os
+import resource
 import time
 
 import sys
@@ -35,12 +37,135 @@ import sys
 # ---------------------------------------------------------------------------------------------------------------------
 
 
+def install_version(version, src_mgr, t0, akas_versions, co_oc_versions, mismap_versions, mitigations_versions):
+    # installs all content of a version - exits the (build / version worker) process with the step's code on failure
+    print(f"\nAdding ATT&CK content for version {version}\n")
+
+    # a version loads in 1 transaction (committed below), search facilities are built once for all versions
+
+    # ATT&CK + Tree content
+    try:
+        db_create.attack.add_version(version, src_mgr, run_postbuild=False)
+    except Exception as ex:
+        tfail = time.time() - t0
+        print(
+            f"Failed to add ATT&CK/Tree content for version {version}"
+            f" at {tfail:.1f}s into build - due to:\n{ex}"
+        )
+        sys.exit(9)
+
+    # AKAs
+    if version in akas_versions:
+        try:
+            db_create.akas.add_version(version, src_mgr, run_postbuild=False)
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to add AKAs for version {version} at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(10)
+
+    # CoOccurrences
+    if version in co_oc_versions:
+        try:
+            db_create.coocs.add_version(version, src_mgr)
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(
+                f"Failed to add ATT&CK/Tree content for version {version}"
+                f" at {tfail:.1f}s into build - due to:\n{ex}"
+            )
+            sys.exit(11)
+
+    # Mismappings
+    if version in mismap_versions:
+        try:
+            db_create.mismaps.add_version(version, src_mgr)
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(
+                f"Failed to add ATT&CK/Tree content for version {version}"
+                f" at {tfail:.1f}s into build - due to:\n{ex}"
+            )
+            sys.exit(12)
+
+    # Mitigation Mappings
+    if version in mitigations_versions:
+        try:
+            db_create.mitigation.add_version(version, src_mgr, run_postbuild=False)
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(
+                f"Failed to add ATT&CK Mitigations content for version {version}"
+                f" at {tfail:.1f}s into build - due to:\n{traceback.format_exception(ex) }"
+            )
+            sys.exit(12)
+
+    try:
+        db.session.commit()
+    except Exception as ex:
+        tfail = time.time() - t0
+        print(f"Failed to commit content for version {version} at {tfail:.1f}s into build - due to:\n{ex}")
+        sys.exit(12)
+
+
+# UIDs of a version installed by a parallel build are allocated from its own block: [(i + 1) * SIZE, (i + 2) * SIZE)
+PARALLEL_UID_BLOCK_SIZE = 10_000_000
+
+
+def install_version_worker(version, block_index, src_mgr, t0, version_content):
+    # runs in a forked process - the parent holds no DB connections at fork, so this process makes its own
+    floor = (block_index + 1) * PARALLEL_UID_BLOCK_SIZE
+    db_read.util.set_uid_block(floor, floor + PARALLEL_UID_BLOCK_SIZE)
+    install_version(version, src_mgr, t0, *version_content)
+
+
+def install_versions_parallel(install_versions, src_mgr, t0, version_content):
+    # installs each version in its own process (and DB connection / transaction), exits if any fails
+    db.session.remove()
+    db.engine.dispose()
+    sys.stdout.flush()  # else buffered output is printed again by each worker
+
+    ctx = multiprocessing.get_context("fork")
+    workers = {}
+    for block_index, version in enumerate(sorted(install_versions)):
+        print(f"Starting install of version {version} in a worker process")
+        worker = ctx.Process(target=install_version_worker, args=(version, block_index, src_mgr, t0, version_content))
+        worker.start()
+        workers[version] = worker
+
+    failed = {}
+    for version, worker in workers.items():
+        worker.join()
+        if worker.exitcode != 0:
+            failed[version] = worker.exitcode
+
+    if failed:
+        tfail = time.time() - t0
+        for version, exitcode in failed.items():
+            print(f"Install of version {version} failed (exit code {exitcode}) at {tfail:.1f}s into build")
+        sys.exit(18)
+
+    print(f"\nInstalled versions {', '.join(sorted(install_versions))} in parallel")
+
+
+def print_peak_memory():
+    """Prints the peak resident memory of the build process and of its (loader) worker processes (Linux: KiB)"""
+    self_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kib = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"Peak Memory: {self_kib / 1024:.1f} MiB (build), {children_kib / 1024:.1f} MiB (largest loader worker)")
+
+
 def main():
     # optional avenue of command-line instead of text-ui
     parser = argparse.ArgumentParser("Builds the DB with all content from the local disk JSONs.")
     parser.add_argument("--config", help="The database configuration to use (from app/conf.py).")
     parser.add_argument("--test", help="Run in test mode for importing Att&ck and Mitigation data. Ignores users and roles.", action="store_true")
+    parser.add_argument(
+        "--parallel",
+        help="Install each ATT&CK version in its own process (also FULL_BUILD_PARALLEL=1).",
+        action="store_true",
+    )
     args = parser.parse_args()
+    parallel = args.parallel or (os.getenv("FULL_BUILD_PARALLEL", "0").lower() in ("1", "true", "yes"))
 
     # perform config selection, can fail on bad cmdline pick
     try:
@@ -128,12 +253,14 @@ def main():
         print("\n------------------------------------------------\n")
         # ATT&CK content - 1+ required
 
-        attack_versions = {v for v in src_mgr.attack.keys() if src_mgr.attack[v].load_validate()}
+        # bundles are streamed (only used, active objects kept) - in parallel worker processes, a version each
+        t_load = time.time()
+        attack_versions = load_validate_parallel(src_mgr.attack)
         if len(attack_versions) == 0:
             print("Failed to load any ATT&CK versions. At least one is needed for Decider to work. Exiting.")
             sys.exit(5)
         else:
-            print(f"Loaded ATT&CK content for versions: {attack_versions}")
+            print(f"Loaded ATT&CK content for versions: {attack_versions} in {time.time() - t_load:.1f}s")
 
         print("\n------------------------------------------------\n")
         # Tree content - 1+ (after intersection with ATT&CK content) required
@@ -273,64 +400,30 @@ def main():
             print(f"Failed to add Roles and Users at {tfail:.1f}s into build - due to:\n{ex}")
             sys.exit(8)
 
-        for version in install_versions:
-            print(f"\nAdding ATT&CK content for version {version}\n")
+        # shared rows (Platforms, AKA terms) are made up front, so versions can be installed independently
+        try:
+            db_create.attack.shared_platforms(install_versions, src_mgr)
+            db_create.akas.shared_terms(akas_versions, src_mgr)
+            db.session.commit()
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to add shared Platforms / AKAs at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(17)
 
-            # ATT&CK + Tree content
-            try:
-                db_create.attack.add_version(version, src_mgr)
-            except Exception as ex:
-                tfail = time.time() - t0
-                print(
-                    f"Failed to add ATT&CK/Tree content for version {version}"
-                    f" at {tfail:.1f}s into build - due to:\n{ex}"
-                )
-                sys.exit(9)
+        version_content = (akas_versions, co_oc_versions, mismap_versions, mitigations_versions)
+        if parallel:
+            install_versions_parallel(install_versions, src_mgr, t0, version_content)
+        else:
+            for version in install_versions:
+                install_version(version, src_mgr, t0, *version_content)
 
-            # AKAs
-            if version in akas_versions:
-                try:
-                    db_create.akas.add_version(version, src_mgr)
-                except Exception as ex:
-                    tfail = time.time() - t0
-                    print(f"Failed to add AKAs for version {version} at {tfail:.1f}s into build - due to:\n{ex}")
-                    sys.exit(10)
-
-            # CoOccurrences
-            if version in co_oc_versions:
-                try:
-                    db_create.coocs.add_version(version, src_mgr)
-                except Exception as ex:
-                    tfail = time.time() - t0
-                    print(
-                        f"Failed to add ATT&CK/Tree content for version {version}"
-                        f" at {tfail:.1f}s into build - due to:\n{ex}"
-                    )
-                    sys.exit(11)
-
-            # Mismappings
-            if version in mismap_versions:
-                try:
-                    db_create.mismaps.add_version(version, src_mgr)
-                except Exception as ex:
-                    tfail = time.time() - t0
-                    print(
-                        f"Failed to add ATT&CK/Tree content for version {version}"
-                        f" at {tfail:.1f}s into build - due to:\n{ex}"
-                    )
-                    sys.exit(12)
-
-            # Mitigation Mappings
-            if version in mitigations_versions:
-                try:
-                    db_create.mitigation.add_version(version, src_mgr)
-                except Exception as ex:
-                    tfail = time.time() - t0
-                    print(
-                        f"Failed to add ATT&CK Mitigations content for version {version}"
-                        f" at {tfail:.1f}s into build - due to:\n{traceback.format_exception(ex) }"
-                    )
-                    sys.exit(12)
+        # search vectors / indexes of all versions
+        try:
+            db_create.search_facilities(install_versions)
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to build search facilities at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(16)
 
         # carts
         if carts_loaded:
@@ -342,6 +435,14 @@ def main():
                 print(f"Failed to add Carts at {tfail:.1f}s into build - due to:\n{ex}")
                 sys.exit(13)
 
+        # signal running app workers that installed content changed
+        try:
+            db_create.content_generations(install_versions)
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to bump content generations at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(15)
+
         # db kiosk user
         print("\nCreating users\n")
 
@@ -355,6 +456,7 @@ def main():
         print("\n------------------------------------------------\n")
         tdone = time.time() - t0
         print(f"SUCCESS - Full Build Complete In: {tdone:.1f}s!")
+        print_peak_memory()
 
 
 if __name__ == "__main__":
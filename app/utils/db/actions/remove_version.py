@@ -3,6 +3,7 @@ from flask import Flask
 from app.models import db
 
 import app.utils.db.read as db_read
+import app.utils.db.create as db_create
 import app.utils.db.destroy as db_destroy
 from app.utils.db.util import option_selector, app_config_selector
 
@@ -108,6 +109,14 @@ def main():
             )
             sys.exit(6)
 
+        # signal running app workers that installed content changed
+        try:
+            db_create.content_generations([to_remove])
+        except Exception as ex:
+            tfail = time.time() - t0
+            print(f"Failed to bump content generations at {tfail:.1f}s into build - due to:\n{ex}")
+            sys.exit(7)
+
         print("\n------------------------------------------------\n")
         tdone = time.time() - t0
         print(f"SUCCESS - Removed Version {to_remove} In: {tdone:.1f}s!")
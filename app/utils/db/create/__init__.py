@@ -3,6 +3,7 @@ from . import akas, attack, cart, coocs, mismaps, role, user, util, mitigation
 from textwrap import dedent as txt_dedent
 from sqlalchemy.sql import text as sql_text, quoted_name as sql_quoted_name
 
+from app.domain import content_generation
 from app.models import db
 from app.utils.db.util import messaged_timer
 from app.utils.db.saltstack_scram_sha_256 import scram_sha_256
@@ -87,6 +88,7 @@ def create_user(username, password):
         GRANT SELECT ON mitigation TO {db_user_name};
         GRANT SELECT ON mitigation_source TO {db_user_name};
         GRANT SELECT ON technique_mitigation_map TO {db_user_name};
+        GRANT SELECT ON content_generation TO {db_user_name};
         """
     )
     query = query.format(
@@ -102,6 +104,19 @@ def create_user(username, password):
     db.session.commit()
 
 
+def search_facilities(versions):
+    # builds search vectors / indexes once all content is loaded (build steps ran with run_postbuild=False)
+    attack.postbuild.run(versions)
+    mitigation.postbuild.run()
+    db.session.commit()
+
+
+@messaged_timer("Bumping Content Generations (refreshes running app caches)")
+def content_generations(versions):
+    content_generation.bump(content_generation.CATALOG_SCOPE, *versions)
+    db.session.commit()
+
+
 @messaged_timer("Adding tables to DB")
 def all_tables():
     db.create_all()
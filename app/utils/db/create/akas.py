@@ -1,14 +1,40 @@
 from app.models import db, Aka, technique_aka_map
 
 import app.utils.db.read as db_read
+import app.utils.db.create as db_create
 
 from app.utils.db.util import messaged_timer
 
 import copy
 
 
+@messaged_timer("Adding AKA terms shared by versions")
+def shared_terms(versions, src_mgr):
+    # adds all AKA terms of the versions up front, so add_version() only maps to them (allows parallel installs)
+    known = {term for (term,) in db.session.query(Aka.term)}
+    next_uid_up = db_read.util.max_primary_key(Aka.uid) + 1
+
+    new_terms = []
+    for version in sorted(versions):
+        tech_ids = {
+            tech["external_references"][0]["external_id"]
+            for tech in src_mgr.attack[version].get_index().of_type("attack-pattern")
+        }
+        for entry in src_mgr.akas[version].get_data():
+            if entry["id"] not in tech_ids:
+                continue
+            for term in entry["akas"]:
+                if term in known:
+                    continue
+                known.add(term)
+                new_terms.append({"uid": next_uid_up, "term": term})
+                next_uid_up += 1
+
+    db_create.util.copy_rows(Aka, new_terms)
+
+
 @messaged_timer("Building Akas table")
-def add_version(version, src_mgr):
+def add_version(version, src_mgr, run_postbuild=True):
     # Determine at what offset to insert Akas
     next_uid_up = db_read.util.max_primary_key(Aka.uid) + 1
 
@@ -53,10 +79,13 @@ def add_version(version, src_mgr):
 
     # Add newly created Akas to Aka
     new_term_to_uid = [{"uid": uid, "term": term} for term, uid in new_term_to_uid.items()]
-    db.session.bulk_insert_mappings(Aka, new_term_to_uid, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Aka, new_term_to_uid)
 
     # Add both new & old mappings to map
     aka_mappings = [{"technique": entry["id"], "aka": aka_uid} for entry in aka_data for aka_uid in entry["akas"]]
-    db.session.execute(technique_aka_map.insert().values(aka_mappings))
-    db.session.commit()
+    db_create.util.copy_rows(technique_aka_map, aka_mappings)
+
+    # fold AKAs into the stored Technique search vectors (else done by db_create.search_facilities())
+    if run_postbuild:
+        db_create.attack.postbuild.refresh_technique_search_vectors(version)
+        db_create.attack.postbuild.benchmark_technique_search_vectors(version)
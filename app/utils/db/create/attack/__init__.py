@@ -28,13 +28,24 @@ from app.utils.db.util import messaged_timer
 from collections import defaultdict
 
 
+def detects_relationships(stix):
+    """Returns DataComponent -detects-> Technique relationships of a StixIndex"""
+    return [
+        # fmt: off
+        i
+        for i in stix.relationships("detects")
+        if i["source_ref"].startswith("x-mitre-data-component--")
+        and i["target_ref"].startswith("attack-pattern--")
+        # fmt: on
+    ]
+
+
 @messaged_timer("Building Tactics table")
 def tactic_table(version, src_mgr):
 
-    # get ATT&CK matrix and tactics
-    attack: dict = src_mgr.attack[version].get_data()
-    matrix = next(i for i in attack.values() if i["type"] == "x-mitre-matrix")
-    stix_tactics = [i for i in attack.values() if i["type"] == "x-mitre-tactic"]
+    # get ATT&CK matrix (tactics are looked up by STIX ID)
+    stix = src_mgr.attack[version].get_index()
+    matrix = stix.of_type("x-mitre-matrix")[0]
 
     # get question / answer content
     tree_qna = src_mgr.tree[version].get_data()
@@ -49,7 +60,7 @@ def tactic_table(version, src_mgr):
     for uid_offset, tactic_ref in enumerate(matrix["tactic_refs"]):
 
         # get tactic object and id
-        stix_tactic = next(filter(lambda t: t["id"] == tactic_ref, stix_tactics))
+        stix_tactic = stix.by_id[tactic_ref]
         external_reference = stix_tactic["external_references"][0]
         tact_id = external_reference["external_id"]
 
@@ -70,17 +81,14 @@ def tactic_table(version, src_mgr):
         )
 
     # save to DB
-    db.session.bulk_insert_mappings(Tactic, tactics, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Tactic, tactics)
 
 
 @messaged_timer("Building Techniques table")
 def technique_table(version, src_mgr):
 
     # pull Base / Sub Techniques from ATT&CK
-    attack: dict = src_mgr.attack[version].get_data()
-
-    stix_techs = [i for i in attack.values() if i["type"] == "attack-pattern"]
+    stix_techs = src_mgr.attack[version].get_index().of_type("attack-pattern")
     stix_base_techs = [i for i in stix_techs if not i.get("x_mitre_is_subtechnique", False)]
     stix_sub_techs = [i for i in stix_techs if i.get("x_mitre_is_subtechnique", False)]
 
@@ -147,13 +155,12 @@ def technique_table(version, src_mgr):
 
     # join Base / Sub Techniques and add to DB
     all_techniques = list(base_techniques.values()) + sub_techniques
-    db.session.bulk_insert_mappings(Technique, all_techniques, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Technique, all_techniques)
 
 
 @messaged_timer("Building Blurbs (examples) table")
 def blurb_table(version, src_mgr):
-    attack: dict = src_mgr.attack[version].get_data()
+    stix = src_mgr.attack[version].get_index()
     tech_id_to_uid = db_read.attack.tech_id_to_uid(version)
     blurbs = []
 
@@ -161,17 +168,10 @@ def blurb_table(version, src_mgr):
     next_blurb_uid = db_read.util.max_primary_key(Blurb.uid) + 1
 
     # attack-pattern--8c32eb4d-805f-4fc5-bf60-c4d476c131b5 -> Twxyz.abc
-    stixid_to_techid = {
-        item_id: item["external_references"][0]["external_id"]
-        for item_id, item in attack.items()
-        if item["type"] == "attack-pattern"
-    }
-
-    for i in attack.values():
+    stixid_to_techid = stix.stixid_to_attack_id
 
-        # must be relationship
-        if i["type"] != "relationship":
-            continue
+    # relationships
+    for i in stix.of_type("relationship"):
 
         # with description
         if "description" not in i:
@@ -215,14 +215,13 @@ def blurb_table(version, src_mgr):
                 )
                 next_blurb_uid += 1
 
-    db.session.bulk_insert_mappings(Blurb, blurbs, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Blurb, blurbs)
 
 
 @messaged_timer("Building Tactic <-> Technique map")
 def tact_tech_map(version, src_mgr):
 
-    attack: dict = src_mgr.attack[version].get_data()
+    stix_techs = src_mgr.attack[version].get_index().of_type("attack-pattern")
     techid_to_uid = db_read.attack.tech_id_to_uid(version)
 
     # query Tactics in database for version
@@ -243,8 +242,7 @@ def tact_tech_map(version, src_mgr):
             for kcp in tech["kill_chain_phases"]
             if kcp["kill_chain_name"].lower() == "mitre-attack"
         }
-        for tech in attack.values()
-        if tech["type"] == "attack-pattern"
+        for tech in stix_techs
         # fmt: on
     }
 
@@ -262,15 +260,14 @@ def tact_tech_map(version, src_mgr):
             tact_techs.append({"tactic": tactic["uid"], "technique": techid_to_uid[techid]})
 
     # add mappings
-    db.session.execute(tactic_technique_map.insert().values(tact_techs))
-    db.session.commit()
+    db_create.util.copy_rows(tactic_technique_map, tact_techs)
 
 
 @messaged_timer("Building Platform table (+ mappings to AttackVersion & Technique)")
 def platform_table(version, src_mgr):
     old_plat_name_uid = db.session.query(Platform.readable_name, Platform.uid).all()
     old_plat_name_to_uid = {name: uid for name, uid in old_plat_name_uid}
-    next_plat_uid = max(list(old_plat_name_to_uid.values()), default=0) + 1
+    next_plat_uid = db_read.util.max_primary_key(Platform.uid) + 1
 
     new_plat_name_to_uid = {}
 
@@ -281,8 +278,7 @@ def platform_table(version, src_mgr):
     tech_uid_plat_uid = []
 
     # get techniques
-    attack: dict = src_mgr.attack[version].get_data()
-    techniques = [i for i in attack.values() if i["type"] == "attack-pattern"]
+    techniques = src_mgr.attack[version].get_index().of_type("attack-pattern")
 
     for tech in techniques:
         tech_id = tech["external_references"][0]["external_id"]
@@ -318,18 +314,42 @@ def platform_table(version, src_mgr):
         for plat_name, uid in new_plat_name_to_uid.items()
     ]
     new_platforms.sort(key=lambda p: p["uid"])  # ensures order of platform uids for clean DB
-    db.session.bulk_insert_mappings(Platform, new_platforms, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Platform, new_platforms)
 
     version_platform_mappings = [
         {"version": version, "platform": platform_uid} for platform_uid in sorted(list(attack_version_platform_uids))
     ]
-    db.session.execute(attack_version_platform_map.insert().values(version_platform_mappings))
-    db.session.commit()
+    db_create.util.copy_rows(attack_version_platform_map, version_platform_mappings)
 
     tech_uid_plat_uid.sort(key=lambda m: m["technique"])
-    db.session.execute(technique_platform_map.insert().values(tech_uid_plat_uid))
-    db.session.commit()
+    db_create.util.copy_rows(technique_platform_map, tech_uid_plat_uid)
+
+
+@messaged_timer("Adding Platforms shared by versions")
+def shared_platforms(versions, src_mgr):
+    # adds all Platforms of the versions up front, so platform_table() only maps to them (allows parallel installs)
+    known = {name for (name,) in db.session.query(Platform.readable_name)}
+    next_plat_uid = db_read.util.max_primary_key(Platform.uid) + 1
+
+    new_platforms = []
+    for version in sorted(versions):
+        for tech in src_mgr.attack[version].get_index().of_type("attack-pattern"):
+            for platform in tech["x_mitre_platforms"]:
+                if platform in known:
+                    continue
+                known.add(platform)
+                new_platforms.append(
+                    {
+                        # fmt: off
+                        "uid"          : next_plat_uid,
+                        "readable_name": platform,
+                        "internal_name": platform.lower().replace(" ", "_"),
+                        # fmt: on
+                    }
+                )
+                next_plat_uid += 1
+
+    db_create.util.copy_rows(Platform, new_platforms)
 
 
 @messaged_timer("Building Tactic <-> Platform map")
@@ -350,14 +370,13 @@ def tact_plat_map(version, src_mgr):
 
     tact_uid_plat_uid = [{"tactic": tact_uid, "platform": plat_uid} for tact_uid, plat_uid in tact_uid_plat_uid]
 
-    db.session.execute(tactic_platform_map.insert().values(tact_uid_plat_uid))
-    db.session.commit()
+    db_create.util.copy_rows(tactic_platform_map, tact_uid_plat_uid)
 
 
 @messaged_timer("Building Data Source table")
 def data_source_table(version, src_mgr):
 
-    attack: dict = src_mgr.attack[version].get_data()
+    stix = src_mgr.attack[version].get_index()
 
     # record active Data Sources
     # 'active' meaning that a DS has at least 1 DC, and that DC detects at least 1 Tech
@@ -366,26 +385,17 @@ def data_source_table(version, src_mgr):
     active_dss = set()
 
     # DataComponent -detects-> Technique relationships
-    detects_rels = [
-        # fmt: off
-        i
-        for i in attack.values()
-        if i["type"] == "relationship"
-        and i["relationship_type"] == "detects"
-        and i["source_ref"].startswith("x-mitre-data-component--")
-        and i["target_ref"].startswith("attack-pattern--")
-        # fmt: on
-    ]
+    detects_rels = detects_relationships(stix)
 
     for rel in detects_rels:
         # mark the DC's DS as active
         dc_id = rel["source_ref"]
-        dc = attack[dc_id]
+        dc = stix.by_id[dc_id]
         ds_id = dc["x_mitre_data_source_ref"]
         active_dss.add(ds_id)
 
     # only data sources eventually mapping to a tech
-    data_sources = [attack[ds_id] for ds_id in active_dss]
+    data_sources = [stix.by_id[ds_id] for ds_id in active_dss]
 
     # determine where they'll be inserted
     next_datasrc_uid = db_read.util.max_primary_key(DataSource.uid) + 1
@@ -411,16 +421,14 @@ def data_source_table(version, src_mgr):
         )
 
     # insert them
-    db.session.bulk_insert_mappings(DataSource, data_source_rows, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(DataSource, data_source_rows)
 
 
 @messaged_timer("Building Data Component table")
 def data_component_table(version, src_mgr):
 
     # query data components from ATT&CK
-    attack: dict = src_mgr.attack[version].get_data()
-    data_components = [i for i in attack.values() if i["type"] == "x-mitre-data-component"]
+    data_components = src_mgr.attack[version].get_index().of_type("x-mitre-data-component")
 
     # determine where they'll be inserted
     next_datacomp_uid = db_read.util.max_primary_key(DataComponent.uid) + 1
@@ -444,32 +452,18 @@ def data_component_table(version, src_mgr):
         )
 
     # insert them
-    db.session.bulk_insert_mappings(DataComponent, data_component_rows, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(DataComponent, data_component_rows)
 
 
 @messaged_timer("Building Data Component <-> Technique map")
 def tech_datacomp_map(version, src_mgr):
 
     # get DataComponent -detects-> Technique rels
-    attack: dict = src_mgr.attack[version].get_data()
-    detects_rels = [
-        # fmt: off
-        i
-        for i in attack.values()
-        if i["type"] == "relationship"
-        and i["relationship_type"] == "detects"
-        and i["source_ref"].startswith("x-mitre-data-component--")
-        and i["target_ref"].startswith("attack-pattern--")
-        # fmt: on
-    ]
+    stix = src_mgr.attack[version].get_index()
+    detects_rels = detects_relationships(stix)
 
-    # create map to resolve Technique STIX IDs to ATT&CK IDs
-    stixid_to_techid = {
-        stix_id: tech["external_references"][0]["external_id"]
-        for stix_id, tech in attack.items()
-        if tech["type"] == "attack-pattern"
-    }
+    # map to resolve Technique STIX IDs to ATT&CK IDs
+    stixid_to_techid = stix.stixid_to_attack_id
 
     # get DB UID resolvers for Technique and DataComponent
     tech_id_to_uid = db_read.attack.tech_id_to_uid(version)
@@ -493,8 +487,7 @@ def tech_datacomp_map(version, src_mgr):
             tech_dc_map_rows.append({"technique": tech_uid, "data_component": datacomp_uid})
 
     # insert them
-    db.session.execute(technique_dc_map.insert().values(tech_dc_map_rows))
-    db.session.commit()
+    db_create.util.copy_rows(technique_dc_map, tech_dc_map_rows)
 
 
 @messaged_timer("Building Data Source <-> Technique map")
@@ -521,8 +514,7 @@ def tech_datasrc_map(version, src_mgr):
     tech_dc_map_rows = [
         {"technique": tech_uid, "data_source": datasrc_uid} for tech_uid, datasrc_uid in tech_uid_datasrc_uid
     ]
-    db.session.execute(technique_ds_map.insert().values(tech_dc_map_rows))
-    db.session.commit()
+    db_create.util.copy_rows(technique_ds_map, tech_dc_map_rows)
 
 
 @messaged_timer("Building Data Source <-> Tactic map")
@@ -543,15 +535,15 @@ def tact_datasrc_map(version, src_mgr):
     tact_ds_map_rows = [
         {"tactic": tact_uid, "data_source": datasrc_uid} for tact_uid, datasrc_uid in tact_uid_datasrc_uid
     ]
-    db.session.execute(tactic_ds_map.insert().values(tact_ds_map_rows))
-    db.session.commit()
+    db_create.util.copy_rows(tactic_ds_map, tact_ds_map_rows)
 
 
-def add_version(version, src_mgr):
+def add_version(version, src_mgr, run_postbuild=True):
+    # loads in the caller's transaction (doesn't commit)
+    # run_postbuild=False leaves search facilities to a single db_create.search_facilities() once all content is loaded
 
     # attack_version [easy]
     db.session.add(AttackVersion(version=version))
-    db.session.commit()
 
     # technique [subs need parent_uids and base names for their full_name]
     # subtechnique
@@ -583,8 +575,5 @@ def add_version(version, src_mgr):
         db_create.attack.tech_datasrc_map(version, src_mgr)
         db_create.attack.tact_datasrc_map(version, src_mgr)
 
-    # Ensures generated TS vector and index exists for Technique table
-    db_create.attack.postbuild.add_technique_search_index()
-
-    # Ensures Answer Cards / their subs are searchable
-    db_create.attack.postbuild.add_technique_answer_search_facilities()
+    if run_postbuild:
+        db_create.attack.postbuild.run([version])
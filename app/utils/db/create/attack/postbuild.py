@@ -1,6 +1,21 @@
 from app.models import db
 
 from app.utils.db.util import messaged_timer
+from app.utils.db.create.util import create_search_index
+
+from sqlalchemy.sql import text as sql_text
+
+import time
+
+# AKA terms of a Technique as a weight-C vector - these are folded into technique.tech_search_ts
+TECHNIQUE_AKA_TSVEC = r"""
+    setweight(to_tsvector('english_nostop',
+    regexp_replace(coalesce((
+        SELECT array_to_string(array_agg(distinct(aka.term)), ' ', '')
+        FROM technique_aka_map JOIN aka ON aka.uid = technique_aka_map.aka
+        WHERE technique_aka_map.technique = technique.uid
+    ), ''), '[^a-z0-9 ]', ' ', 'gi')), 'C')
+""".strip()
 
 
 @messaged_timer("Creating index for full Technique search")
@@ -32,9 +47,13 @@ def add_technique_search_index():
             regexp_replace(regexp_replace(regexp_replace(regexp_replace(imm_unaccent(technique.tech_description),
             '<\/?(sup|a|code)[^>]*>', '', 'gi'), '\[[0-9]{1,2}\]', '', 'gi'),
             '\[([^\]]+)\]\([^\)]+\)', '\1', 'gi'), '[^a-z0-9 ]', ' ', 'gi')), 'D')) STORED;
-    CREATE INDEX tech_ts_index ON technique USING gist(tech_ts);
+
+    -- tech_ts + AKAs, not generated as it spans tables: filled by refresh_technique_search_vectors()
+    ALTER TABLE technique ADD COLUMN IF NOT EXISTS tech_search_ts tsvector;
     """.strip()
     )
+    create_search_index("tech_ts_index", "technique", "tech_ts")
+    create_search_index("tech_search_ts_index", "technique", "tech_search_ts")
     db.session.commit()
 
     db.session.execute(
@@ -57,9 +76,9 @@ def add_technique_search_index():
                     '[\[\]]', '', 'g'
                 ))), 'B'))
             ) STORED;
-    CREATE INDEX blurb_ts_index ON blurb USING gist(blurb_ts);
     """.strip()
     )
+    create_search_index("blurb_ts_index", "blurb", "blurb_ts")
     db.session.commit()
 
 @messaged_timer("Add Facilities for Answer Card Search")
@@ -92,7 +111,6 @@ def add_technique_answer_search_facilities():
                 imm_unaccent(coalesce(technique.tech_answer, '')),
             '[^a-z0-9 ]+', ' ', 'gi'))
             ) STORED;
-    CREATE INDEX tech_ans_ts_index ON technique USING gist(tech_ans_ts);
 
     DROP FUNCTION IF EXISTS tsvector_agg;
     CREATE FUNCTION tsvector_agg(tsvector[]) RETURNS tsvector AS $$
@@ -109,4 +127,81 @@ def add_technique_answer_search_facilities():
     $$ LANGUAGE plpgsql IMMUTABLE;
     """.strip()
     )
+    create_search_index("tech_ans_ts_index", "technique", "tech_ans_ts")
+    db.session.commit()
+
+
+@messaged_timer("Creating trigram index for Technique name Mini-Search")
+def add_technique_name_trgm_index():
+    # Mini-Search matches names with "phrase <% full_tech_name" (WORD_SIMILARITY over a threshold)
+    # - gin_trgm_ops lets that operator use an index, instead of computing a similarity against every Technique
+    db.session.execute(
+        r"""
+    DROP INDEX IF EXISTS technique_name_trgm_index;
+    CREATE INDEX technique_name_trgm_index ON technique USING gin (full_tech_name gin_trgm_ops);
+    """.strip()
+    )
     db.session.commit()
+
+
+@messaged_timer("Refreshing stored Technique search vectors (tech_ts + AKAs)")
+def refresh_technique_search_vectors(version, tech_uids=None, commit=True):
+    # (re)computes technique.tech_search_ts for a version (or just for tech_uids of it)
+    # - must run after Techniques / their AKAs change, as a generated column can't read other tables
+    # - commit=False leaves the UPDATE in the caller's transaction (e.g. to commit / roll back with the change)
+    # - replaces the per-query "tech_ts || AKA vector" that had every search aggregate AKAs for every Technique
+    query = f"""
+    UPDATE technique SET tech_search_ts = technique.tech_ts || {TECHNIQUE_AKA_TSVEC}
+    WHERE technique.attack_version = :version
+    """
+    params = {"version": version}
+    if tech_uids is not None:
+        query += " AND technique.uid = ANY(:tech_uids)"
+        params["tech_uids"] = list(tech_uids)
+
+    db.session.execute(sql_text(query), params)
+    if commit:
+        db.session.commit()
+
+
+@messaged_timer("Benchmarking Technique search (per-query AKA vectors vs stored vectors)")
+def benchmark_technique_search_vectors(version, tsqry="credential:* | access:* | dump:*", runs=20):
+    # times a representative full search match over a version both ways, to show the effect of tech_search_ts
+    per_query = sql_text(
+        f"""
+        SELECT count(*) FROM technique
+        WHERE technique.attack_version = :version
+        AND (technique.tech_ts || {TECHNIQUE_AKA_TSVEC}) @@ to_tsquery('english_nostop', :tsqry)
+        """
+    )
+    stored = sql_text(
+        """
+        SELECT count(*) FROM technique
+        WHERE technique.attack_version = :version
+        AND technique.tech_search_ts @@ to_tsquery('english_nostop', :tsqry)
+        """
+    )
+    params = {"version": version, "tsqry": tsqry}
+
+    savepoint = db.session.begin_nested()
+    for name, query in (("per-query AKA vectors", per_query), ("stored tech_search_ts", stored)):
+        t0 = time.time()
+        for _ in range(runs):
+            matches = db.session.execute(query, params).scalar()
+        elapsed_ms = (time.time() - t0) * 1000 / runs
+        print(f"    {name:<24}: {elapsed_ms:>8.2f}ms avg over {runs} runs ({matches} matches)")
+    savepoint.rollback()
+
+
+def run(versions):
+    # (re)builds the search facilities of the Technique / Blurb tables, fills the stored search vectors of versions
+    # - these rebuild whole tables, so a multi-version build runs this once after loading all versions
+    add_technique_search_index()
+    add_technique_answer_search_facilities()
+    add_technique_name_trgm_index()
+    for version in versions:
+        refresh_technique_search_vectors(version)
+
+    # the blurb_ts_index timing is app/utils/benchmark_blurb_search.py, run by hand (it forces sequential scans)
+    for version in versions:
+        benchmark_technique_search_vectors(version)
@@ -1,6 +1,7 @@
 from app.models import db, CoOccurrence
 
 import app.utils.db.read as db_read
+import app.utils.db.create as db_create
 
 from app.utils.db.util import messaged_timer
 
@@ -24,5 +25,9 @@ def add_version(version, src_mgr):
             co_oc_rows.append({**co_oc, "technique_i": tech_i_uid, "technique_j": tech_j_uid})
 
     # insert rows
-    db.session.bulk_insert_mappings(CoOccurrence, co_oc_rows, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(CoOccurrence, co_oc_rows)
+
+    # made by create_all on new DBs - ensures DBs built before it was added have it too
+    db.session.execute(
+        "CREATE INDEX IF NOT EXISTS cooccurrence_technique_i_score_index ON co_occurrence (technique_i, score);"
+    )
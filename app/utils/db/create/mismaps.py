@@ -1,6 +1,7 @@
-from app.models import db, Mismapping
+from app.models import Mismapping
 
 import app.utils.db.read as db_read
+import app.utils.db.create as db_create
 
 from app.utils.db.util import messaged_timer
 
@@ -23,5 +24,4 @@ def add_version(version, src_mgr):
         mismap["original"] = tech_id_to_uid[mismap["original"]]  # always defined
         mismap["corrected"] = tech_id_to_uid.get(mismap["corrected"])  # may be 'N/A', replace with None
 
-    db.session.bulk_insert_mappings(Mismapping, mismaps, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Mismapping, mismaps)
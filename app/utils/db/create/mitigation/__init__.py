@@ -47,8 +47,7 @@ def mitigation_sources_table(version, src_mgr):
             uid_offset += 1
     
         # insert them
-        db.session.bulk_insert_mappings(MitigationSource, source_rows, render_nulls=True)
-        db.session.commit()
+        db_create.util.copy_rows(MitigationSource, source_rows)
 
 @messaged_timer("Building Mitigations table")
 def mitigations_table(version, src_mgr):
@@ -85,8 +84,7 @@ def mitigations_table(version, src_mgr):
         uid_offset += 1
 
     # insert them
-    db.session.bulk_insert_mappings(Mitigation, mitigation_rows, render_nulls=True)
-    db.session.commit()
+    db_create.util.copy_rows(Mitigation, mitigation_rows)
 
 
 @messaged_timer("Building Mitigations <-> Technique map")
@@ -123,10 +121,11 @@ def tech_mitigations_map(version, src_mgr):
                 uid_offset += 1
 
     # insert them
-    db.session.execute(technique_mitigation_map.insert().values(tech_mit_map_rows))
-    db.session.commit()
+    db_create.util.copy_rows(technique_mitigation_map, tech_mit_map_rows)
+
+def add_version(version, src_mgr, run_postbuild=True):
+    # loads in the caller's transaction (doesn't commit), postbuild as in db_create.attack.add_version()
 
-def add_version(version, src_mgr):
     # mitigations
     db_create.mitigation.mitigation_sources_table(version, src_mgr)
     db_create.mitigation.mitigations_table(version, src_mgr)
@@ -136,6 +135,5 @@ def add_version(version, src_mgr):
     if base_version_num >= 15:
         db_create.mitigation.tech_mitigations_map(version, src_mgr)
 
-    # Ensures generated TS vector and index exists for Mitigations and Mitigation Uses
-    db_create.mitigation.postbuild.add_mitigation_search_index()
-    db_create.mitigation.postbuild.add_technique_mitigation_use_search_index()
\ No newline at end of file
+    if run_postbuild:
+        db_create.mitigation.postbuild.run()
\ No newline at end of file
@@ -1,6 +1,8 @@
 from app.models import db
 
 from app.utils.db.util import messaged_timer
+from app.utils.db.create.util import create_search_index
+
 
 @messaged_timer("Creating index for Mitigations search")
 def add_mitigation_search_index():
@@ -24,9 +26,12 @@ def add_mitigation_search_index():
             imm_unaccent(mitigation.description)), 'B') ||
             setweight(to_tsvector('english_nostop',
             regexp_replace(mitigation.mit_id, '[^a-z0-9 ]+', ' ', 'gi')), 'B')) STORED;
-    CREATE INDEX mit_ts_index ON mitigation USING gist(mit_ts);
+
+    -- version-scoped lookups (version -> source -> mit_id), made by create_all on new DBs
+    CREATE INDEX IF NOT EXISTS mitigation_source_mit_id_index ON mitigation (mitigation_source, mit_id);
     """.strip()
     )
+    create_search_index("mit_ts_index", "mitigation", "mit_ts")
     db.session.commit()
 
 @messaged_timer("Creating index for Technique Mitigation Uses search")
@@ -43,7 +48,13 @@ def add_technique_mitigation_use_search_index():
         GENERATED ALWAYS AS
             (setweight(to_tsvector('english_nostop',
             imm_unaccent(technique_mitigation_map.use)), 'A')) STORED;
-    CREATE INDEX tech_mit_use_ts_index ON technique_mitigation_map USING gist(tech_mit_use_ts);
     """.strip()
     )
+    create_search_index("tech_mit_use_ts_index", "technique_mitigation_map", "tech_mit_use_ts")
     db.session.commit()
+
+
+def run():
+    # (re)builds the search facilities of the Mitigation tables
+    add_mitigation_search_index()
+    add_technique_mitigation_use_search_index()
@@ -1,4 +1,11 @@
 import re
+import time
+
+from flask import current_app
+
+from app.models import db
+
+SEARCH_INDEX_TYPES = ("gin", "gist")
 
 
 def transform_description_citations(item):
@@ -36,3 +43,91 @@ def transform_description_citations(item):
                 cite_num += 1
 
     return desc
+
+
+def create_search_index(index_name, table, column):
+    """(Re)creates the index for a full-text search tsvector column
+
+    - index type is the SEARCH_INDEX_TYPE app config: "gin" (default) or "gist"
+      - gin : faster @@ lookups, slower to build / update - fits Decider's build-once-then-read content
+      - gist: smaller and faster to update, but lossy - every candidate row is rechecked against the query
+    """
+    index_type = current_app.config.get("SEARCH_INDEX_TYPE", "gin").lower()
+    if index_type not in SEARCH_INDEX_TYPES:
+        raise ValueError(f"SEARCH_INDEX_TYPE must be one of {SEARCH_INDEX_TYPES}, not {index_type}")
+
+    db.session.execute(
+        f"""
+    DROP INDEX IF EXISTS {index_name};
+    CREATE INDEX {index_name} ON {table} USING {index_type}({column});
+    """.strip()
+    )
+
+
+class CopyRowStream:
+    """File-like object streaming rows as COPY CSV text (NULL '\\N') - rows are only formatted as COPY reads them
+
+    columns: column names, in the order of the COPY's column list
+    rows   : iterable of dicts, keys missing from a row are NULL
+    """
+
+    def __init__(self, columns, rows):
+        self._columns = columns
+        self._rows = iter(rows)
+        self._buf = ""
+        self.num_rows = 0
+
+    @staticmethod
+    def _field(value):
+        if value is None:
+            return r"\N"
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return '"' + str(value).replace('"', '""') + '"'
+
+    def read(self, size=-1):
+        while (size < 0) or (len(self._buf) < size):
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buf += ",".join(self._field(row.get(col)) for col in self._columns) + "\n"
+            self.num_rows += 1
+
+        if size < 0:
+            size = len(self._buf)
+        out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+
+def copy_rows(table, rows):
+    """Bulk loads rows into a table with COPY FROM STDIN, in the session's current transaction (doesn't commit)
+
+    table: Model or Table
+    rows : list of dicts of column name -> value, keys not naming a column are ignored
+
+    Replaces bulk_insert_mappings() / insert().values() for build content - COPY skips per-statement parsing and
+    planning, and doesn't render all rows into 1 giant statement
+    """
+    table = getattr(table, "__table__", table)
+    if not rows:
+        return
+
+    present = set().union(*(row.keys() for row in rows))
+    columns = [col.name for col in table.columns if col.name in present]
+    col_list = ", ".join(f'"{col}"' for col in columns)
+
+    # pending ORM objects (ex: AttackVersion) must exist before COPY rows can reference them
+    db.session.flush()
+
+    t0 = time.time()
+    stream = CopyRowStream(columns, rows)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({col_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", stream)
+    finally:
+        cursor.close()
+    elapsed = time.time() - t0
+    rate = stream.num_rows / max(elapsed, 1e-6)
+    print(f"    COPY {table.name}: {stream.num_rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
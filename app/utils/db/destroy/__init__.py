@@ -1,10 +1,14 @@
 from . import akas, attack, coocs, mismaps
 
-from app.models import db
+from app.models import db, ContentGeneration
 from app.utils.db.util import messaged_timer
 
 
 @messaged_timer("Removing all tables from DB")
 def all_tables():
-    db.drop_all()
+    # content generations are kept so running app workers see a rebuild as a change, not a counter reset
+    db.Model.metadata.drop_all(
+        bind=db.engine,
+        tables=[t for t in db.Model.metadata.sorted_tables if t is not ContentGeneration.__table__],
+    )
     db.session.commit()
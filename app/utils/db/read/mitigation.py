@@ -19,5 +19,9 @@ def mit_src_to_uid(version):
     ).all()
     return {src: uid for src, uid in src_uids}
 
-def mit_src(source):
-    return db.session.query(MitigationSource).filter(func.lower(MitigationSource.source) == source.lower()).first()
\ No newline at end of file
+def mit_src(source, version):
+    return (
+        db.session.query(MitigationSource)
+        .filter(func.lower(MitigationSource.source) == source.lower())
+        .filter(MitigationSource.attack_version == version)
+    ).first()
\ No newline at end of file
@@ -3,10 +3,27 @@ from app.models import db
 from sqlalchemy import func
 
 
+# [floor, ceiling) of the UIDs this process allocates - set by processes of a parallel full build, see set_uid_block()
+_uid_block = None
+
+
+def set_uid_block(floor, ceiling):
+    # confines max_primary_key() to a block of UIDs, so processes building concurrently never allocate the same UIDs
+    global _uid_block
+    _uid_block = (floor, ceiling)
+
+
 def max_primary_key(column):
     # returns the highest value in the provided column, gives 0 if non-present
     # mean to be used as max_primary_key(col) + 1 for bulk inserting the next set of rows
-    highest = db.session.query(func.max(column)).first()[0]
+    # - within a UID block: the highest value in the block, gives floor - 1 if non-present
+    query = db.session.query(func.max(column))
+    if _uid_block is not None:
+        floor, ceiling = _uid_block
+        highest = query.filter(column >= floor, column < ceiling).first()[0]
+        return (floor - 1) if highest is None else highest
+
+    highest = query.first()[0]
     if highest is None:
         return 0
     else:
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 import json
 import os
@@ -60,55 +62,250 @@ class SourceFile(ABC):
             return self.data
 
 
+def iter_json_bundle(fhandle, list_key, chunk_size=1 << 20):
+    """Streams a JSON file whose root is a dict - yields ("item", x) for each x in root[list_key] as it is parsed,
+    then ("root", {other root keys}) at the end
+
+    - only 1 item (and a read chunk) is in memory at a time, rather than the whole decoded file
+    - raises ValueError / json.JSONDecodeError on malformed content
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buf, pos, eof
+        chunk = fhandle.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk  # drop consumed content
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while (pos < len(buf)) and buf[pos].isspace():
+                pos += 1
+            if (pos < len(buf)) or eof:
+                return
+            read_more()
+
+    def expect(chars):
+        nonlocal pos
+        skip_ws()
+        if (pos >= len(buf)) or (buf[pos] not in chars):
+            found = buf[pos] if pos < len(buf) else "end of file"
+            raise ValueError(f"expected one of {list(chars)} in JSON, found {found!r}")
+        pos += 1
+        return buf[pos - 1]
+
+    def decode():
+        # a value is only accepted once content follows it, so a number split by a chunk boundary isn't cut short
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if (end < len(buf)) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            read_more()
+
+    root = {}
+    expect("{")
+    if expect('"}') == "}":
+        yield "root", root
+        return
+    pos -= 1
+
+    while True:
+        key = decode()
+        expect(":")
+        if key == list_key:
+            expect("[")
+            skip_ws()
+            if buf[pos:pos + 1] == "]":
+                pos += 1
+            else:
+                while True:
+                    yield "item", decode()
+                    if expect(",]") == "]":
+                        break
+        else:
+            root[key] = decode()
+        if expect(",}") == "}":
+            break
+
+    yield "root", root
+
+
 class AttackFile(SourceFile):
-    def validate(self):
-        """Validates loaded JSON structure & builds STIX ID index for active items"""
-        data = self.data
+    # STIX object types that the build reads - anything else is dropped while streaming
+    KEPT_TYPES = {
+        "x-mitre-matrix",
+        "x-mitre-tactic",
+        "attack-pattern",
+        "x-mitre-data-source",
+        "x-mitre-data-component",
+        "relationship",
+    }
 
-        # need {}
-        if not isinstance(data, dict):
-            raise Exception(f"ATT&CK file root isn't dict as expected - it's a {type(data).__name__}")
+    def load(self):
+        """Streams the STIX bundle, keeping only active objects of KEPT_TYPES
 
-        # need { "type": "bundle" }
-        if data.get("type") != "bundle":
-            raise Exception("ATT&CK file root isn't marked as type=bundle")
+        - relationships are only kept when they point to a Technique (all the build uses)
+        - IDs of active objects of every type are kept, so relationships to dropped types can still be resolved
+        """
+        root = {}
+        active_ids = set()
+        kept = {}
+        num_objects = 0
 
-        # need { "type": "bundle", "objects": [ ... ] }
-        items = data.get("objects")
-        if (not isinstance(items, list)) or (len(items) == 0):
-            raise Exception("ATT&CK file root 'objects' field missing, empty, or not a list")
+        with open_utf8(self.path) as fhandle:
+            for kind, value in iter_json_bundle(fhandle, "objects"):
+                if kind == "root":
+                    root = value
+                    continue
 
-        # filter out dep/revoked objects
-        active_primary = {
-            item["id"]: item
-            for item in items
-            if not item.get("x_mitre_deprecated", False) and not item.get("revoked", False)
-        }
+                num_objects += 1
+                item = value
+                if item.get("x_mitre_deprecated", False) or item.get("revoked", False):
+                    continue
+                active_ids.add(item["id"])
 
-        # filter out dep/revoked relationships
-        active_secondary = {
+                if item["type"] not in self.KEPT_TYPES:
+                    continue
+                if (item["type"] == "relationship") and (not item["target_ref"].startswith("attack-pattern--")):
+                    continue
+                kept[item["id"]] = item
+
+        # filter out relationships to dep/revoked objects
+        active = {
             item_id: item
-            for item_id, item in active_primary.items()
+            for item_id, item in kept.items()
             if item["type"] != "relationship"
-            or (item["source_ref"] in active_primary and item["target_ref"] in active_primary)
+            or (item["source_ref"] in active_ids and item["target_ref"] in active_ids)
         }
 
+        self.data = {"root": root, "num_objects": num_objects, "active": active}
+
+    def validate(self):
+        """Validates loaded JSON structure & keeps the STIX ID index for active items"""
+        root, num_objects, active = self.data["root"], self.data["num_objects"], self.data["active"]
+
+        # need { "type": "bundle" }
+        if root.get("type") != "bundle":
+            raise Exception("ATT&CK file root isn't marked as type=bundle")
+
+        # need { "type": "bundle", "objects": [ ... ] }
+        if num_objects == 0:
+            raise Exception("ATT&CK file root 'objects' field missing, empty, or not a list")
+
         # need 1 matrix exactly
-        matrix_ids = [item_id for item_id, item in active_secondary.items() if item["type"] == "x-mitre-matrix"]
+        matrix_ids = [item_id for item_id, item in active.items() if item["type"] == "x-mitre-matrix"]
         if len(matrix_ids) != 1:
             raise Exception(f"ATT&CK file has {len(matrix_ids)} Matrices - exactly 1 required for Enterprise")
 
         # need 1+ tactics
-        tactic_ids = [item_id for item_id, item in active_secondary.items() if item["type"] == "x-mitre-tactic"]
+        tactic_ids = [item_id for item_id, item in active.items() if item["type"] == "x-mitre-tactic"]
         if len(tactic_ids) == 0:
             raise Exception("ATT&CK file has 0 Tactics")
 
         # need 1+ techniques
-        technique_ids = [item_id for item_id, item in active_secondary.items() if item["type"] == "attack-pattern"]
+        technique_ids = [item_id for item_id, item in active.items() if item["type"] == "attack-pattern"]
         if len(technique_ids) == 0:
             raise Exception("ATT&CK file has 0 Techniques")
 
-        self.data = active_secondary
+        self.data = active
+
+    def get_index(self):
+        """Returns the StixIndex of the loaded bundle, building it on first use"""
+        if not self.loaded:
+            return None
+        if getattr(self, "_index", None) is None:
+            self._index = StixIndex(self.data)
+        return self._index
+
+
+class StixIndex:
+    """Index of the active objects of an ATT&CK bundle, built in 1 pass so build stages don't rescan the bundle
+
+    by_id         : STIX ID -> object
+    by_type       : STIX type -> [objects] (in bundle order)
+    rels_by_type  : relationship_type -> [relationship objects] (in bundle order)
+    stixid_to_attack_id : STIX ID -> ATT&CK ID (TAxxxx, Txxxx(.yyy), DSxxxx, ..) of objects that have one
+    """
+
+    def __init__(self, active):
+        self.by_id = active
+        self.by_type = defaultdict(list)
+        self.rels_by_type = defaultdict(list)
+        self.stixid_to_attack_id = {}
+
+        for stix_id, item in active.items():
+            item_type = item["type"]
+            self.by_type[item_type].append(item)
+
+            if item_type == "relationship":
+                self.rels_by_type[item["relationship_type"]].append(item)
+
+            elif item.get("external_references") and ("external_id" in item["external_references"][0]):
+                self.stixid_to_attack_id[stix_id] = item["external_references"][0]["external_id"]
+
+    def of_type(self, item_type):
+        """Returns [objects] of a STIX type (ex: attack-pattern)"""
+        return self.by_type.get(item_type, [])
+
+    def relationships(self, relationship_type):
+        """Returns [relationship objects] of a relationship type (ex: detects)"""
+        return self.rels_by_type.get(relationship_type, [])
+
+
+def _load_validate_in_worker(clas, path):
+    # runs in a worker process - returns the loaded data (pickled back to the parent) or None on failure
+    source_file = clas(path)
+    if not source_file.load_validate():
+        return None
+    return source_file.get_data()
+
+
+def load_validate_parallel(source_files, max_workers=None):
+    """Runs load_validate() of many SourceFiles at once in worker processes, returns the keys of those that loaded
+
+    source_files: dict of key (ex: version) -> SourceFile
+    - used for the large ATT&CK bundles, where decoding is CPU-bound and each version is independent
+    """
+    if len(source_files) <= 1:
+        return {key for key, source_file in source_files.items() if source_file.load_validate()}
+
+    max_workers = max_workers or min(len(source_files), os.cpu_count() or 1)
+    loaded = set()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            key: executor.submit(_load_validate_in_worker, type(source_file), source_file.path)
+            for key, source_file in source_files.items()
+            if source_file.exists
+        }
+        for key, source_file in source_files.items():
+            if key not in futures:
+                print(f"Loading {type(source_file).__name__} at {source_file.path} failed as it does not exist!")
+                continue
+            try:
+                data = futures[key].result()
+            except Exception as ex:
+                print(f"Loading {type(source_file).__name__} at {source_file.path} failed due to:\n{ex}")
+                continue
+            if data is None:
+                continue
+            source_file.data = data
+            source_file.loaded = True
+            loaded.add(key)
+    return loaded
+
 
 class MitigationSourceFile(SourceFile):
     def validate(self):
@@ -0,0 +1,5 @@
+# Incremental updates of an installed version - diffs on-disk sources against the DB and applies only changed rows
+# - functions don't commit, the caller applies everything in 1 transaction
+# - each returns what it touched, so the caller can refresh stored search vectors / bump content generations
+
+from . import akas, coocs, mitigation, tree
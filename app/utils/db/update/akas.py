@@ -0,0 +1,63 @@
+from app.models import db, Aka, technique_aka_map
+
+import app.utils.db.read as db_read
+import app.utils.db.create as db_create
+
+from app.utils.db.util import messaged_timer
+
+from sqlalchemy import tuple_
+
+
+@messaged_timer("Applying AKA changes")
+def apply_version(version, src_mgr):
+    # returns UIDs of the Techniques whose AKAs changed
+    tech_id_to_uid = db_read.attack.tech_id_to_uid(version)
+
+    # (tech uid, term) pairs on disk and in DB
+    disk_pairs = {
+        (tech_id_to_uid[entry["id"]], term)
+        for entry in src_mgr.akas[version].get_data()
+        if entry["id"] in tech_id_to_uid
+        for term in entry["akas"]
+    }
+    db_pairs = set(
+        db.session.query(technique_aka_map.c.technique, Aka.term)
+        .join(Aka, Aka.uid == technique_aka_map.c.aka)
+        .filter(technique_aka_map.c.technique.in_(tech_id_to_uid.values()))
+    )
+
+    added = disk_pairs - db_pairs
+    removed = db_pairs - disk_pairs
+    if not (added or removed):
+        print("    no changes")
+        return set()
+
+    term_to_uid = {term: uid for term, uid in db.session.query(Aka.term, Aka.uid)}
+
+    # unmap removed
+    if removed:
+        db.session.execute(
+            technique_aka_map.delete().where(
+                tuple_(technique_aka_map.c.technique, technique_aka_map.c.aka).in_(
+                    [(tech_uid, term_to_uid[term]) for tech_uid, term in removed]
+                )
+            )
+        )
+
+    # add new terms, then map added
+    next_uid_up = db_read.util.max_primary_key(Aka.uid) + 1
+    new_terms = []
+    for term in sorted({term for _, term in added if term not in term_to_uid}):
+        term_to_uid[term] = next_uid_up
+        new_terms.append({"uid": next_uid_up, "term": term})
+        next_uid_up += 1
+    db_create.util.copy_rows(Aka, new_terms)
+    db_create.util.copy_rows(
+        technique_aka_map, [{"technique": tech_uid, "aka": term_to_uid[term]} for tech_uid, term in sorted(added)]
+    )
+
+    # terms no longer used by any version
+    db.session.execute(Aka.__table__.delete().where(Aka.uid.notin_(db.session.query(technique_aka_map.c.aka))))
+
+    print(f"    {len(added)} mappings added ({len(new_terms)} new terms), {len(removed)} removed")
+    return {tech_uid for tech_uid, _ in added | removed}
@@ -0,0 +1,64 @@
+from app.models import db, CoOccurrence, Technique
+
+import app.utils.db.read as db_read
+import app.utils.db.create as db_create
+
+from app.utils.db.util import messaged_timer
+
+from sqlalchemy import tuple_
+
+# columns of a CoOccurrence besides its (technique_i, technique_j) key
+VALUE_COLUMNS = (
+    "score",
+    "i_references",
+    "j_references",
+    "shared_references",
+    "shared_percent",
+    "j_avg",
+    "j_std",
+)
+
+
+@messaged_timer("Applying Co-occurrence changes")
+def apply_version(version, src_mgr):
+    # returns whether any Co-occurrence changed
+    tech_id_to_uid = db_read.attack.tech_id_to_uid(version)
+
+    # (i uid, j uid) -> row, as add_version() would insert them
+    disk_rows = {}
+    for co_oc in src_mgr.co_ocs[version].get_data():
+        tech_i_uid = tech_id_to_uid.get(co_oc["technique_i"])
+        tech_j_uid = tech_id_to_uid.get(co_oc["technique_j"])
+        if tech_i_uid and tech_j_uid:
+            disk_rows[(tech_i_uid, tech_j_uid)] = {
+                "technique_i": tech_i_uid,
+                "technique_j": tech_j_uid,
+                **{col: co_oc[col] for col in VALUE_COLUMNS},
+            }
+
+    db_rows = {
+        (row.technique_i, row.technique_j): {col: getattr(row, col) for col in VALUE_COLUMNS}
+        for row in db.session.query(CoOccurrence)
+        .join(Technique, Technique.uid == CoOccurrence.technique_i)
+        .filter(Technique.attack_version == version)
+    }
+
+    removed = [key for key in db_rows if key not in disk_rows]
+    added = [row for key, row in disk_rows.items() if key not in db_rows]
+    changed = [
+        row
+        for key, row in disk_rows.items()
+        if (key in db_rows) and any(db_rows[key][col] != row[col] for col in VALUE_COLUMNS)
+    ]
+
+    if removed:
+        db.session.execute(
+            CoOccurrence.__table__.delete().where(
+                tuple_(CoOccurrence.technique_i, CoOccurrence.technique_j).in_(removed)
+            )
+        )
+    db_create.util.copy_rows(CoOccurrence, added)
+    db.session.bulk_update_mappings(CoOccurrence, changed)
+    print(f"    {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+
+    return bool(removed or added or changed)
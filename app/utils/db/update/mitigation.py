@@ -0,0 +1,98 @@
+from app.models import db, Mitigation, MitigationSource, technique_mitigation_map
+
+import app.utils.db.read as db_read
+import app.utils.db.create as db_create
+
+from app.utils.db.util import messaged_timer
+
+
+@messaged_timer("Applying Mitigation changes")
+def apply_version(version, src_mgr):
+    # returns whether any Mitigation / Mitigation use changed
+    # - Mitigation Sources aren't diffed, a Mitigation of a source not installed for the version is skipped
+    mitigations = src_mgr.mitigations[version].get_data()
+    src_to_uid = db_read.mitigation.mit_src_to_uid(version)
+    tech_id_to_uid = db_read.attack.tech_id_to_uid(version)
+
+    db_mits = {
+        mit.mit_id: mit
+        for mit in db.session.query(Mitigation)
+        .join(MitigationSource, MitigationSource.uid == Mitigation.mitigation_source)
+        .filter(MitigationSource.attack_version == version)
+    }
+
+    # Mitigations
+    next_mitigation_uid = db_read.util.max_primary_key(Mitigation.uid) + 1
+    added_mits, changed_mits = [], []
+    for mit_id, mtg in mitigations.items():
+        src_uid = src_to_uid.get(mtg["source"])
+        if src_uid is None:
+            continue
+
+        row = {"mit_id": mit_id, "name": mtg["name"], "mitigation_source": src_uid, "description": mtg["description"]}
+        if mit_id not in db_mits:
+            added_mits.append({"uid": next_mitigation_uid, **row})
+            next_mitigation_uid += 1
+        else:
+            mit = db_mits[mit_id]
+            if (mit.name, mit.mitigation_source, mit.description) != (row["name"], src_uid, row["description"]):
+                changed_mits.append({"uid": mit.uid, **row})
+    removed_mit_uids = [mit.uid for mit_id, mit in db_mits.items() if mit_id not in mitigations]
+
+    db_create.util.copy_rows(Mitigation, added_mits)
+    db.session.bulk_update_mappings(Mitigation, changed_mits)
+
+    mit_id_to_uid = {mit_id: mit.uid for mit_id, mit in db_mits.items()}
+    mit_id_to_uid.update({row["mit_id"]: row["uid"] for row in added_mits})
+
+    # Technique <-> Mitigation uses (ATT&CK 15+, as in db_create.mitigation.add_version())
+    removed_uses, added_uses, changed_uses = [], [], []
+    base_version_num = int(version.replace("v", "").split(".")[0])
+    if base_version_num >= 15:
+        disk_uses = {}
+        for mit_id, mit in mitigations.items():
+            for tech_id, tech_mit_use in mit.get("techniques", {}).items():
+                tech_uid = tech_id_to_uid.get(tech_id)
+                mit_uid = mit_id_to_uid.get(mit_id)
+                if tech_uid and mit_uid:
+                    disk_uses[(tech_uid, mit_uid)] = tech_mit_use["use"]
+
+        db_uses = {
+            (tech_uid, mit_uid): (uid, use)
+            for uid, tech_uid, mit_uid, use in db.session.query(
+                technique_mitigation_map.c.uid,
+                technique_mitigation_map.c.technique,
+                technique_mitigation_map.c.mitigation,
+                technique_mitigation_map.c.use,
+            ).filter(technique_mitigation_map.c.technique.in_(tech_id_to_uid.values()))
+        }
+
+        next_use_uid = db_read.util.max_primary_key(technique_mitigation_map.c.uid) + 1
+        for key, use in disk_uses.items():
+            if key not in db_uses:
+                added_uses.append({"uid": next_use_uid, "technique": key[0], "mitigation": key[1], "use": use})
+                next_use_uid += 1
+            elif db_uses[key][1] != use:
+                changed_uses.append((db_uses[key][0], use))
+        removed_uses = [uid for key, (uid, _) in db_uses.items() if key not in disk_uses]
+
+    # uses of removed Mitigations go first (FK)
+    if removed_mit_uids:
+        db.session.execute(
+            technique_mitigation_map.delete().where(technique_mitigation_map.c.mitigation.in_(removed_mit_uids))
+        )
+    if removed_uses:
+        db.session.execute(technique_mitigation_map.delete().where(technique_mitigation_map.c.uid.in_(removed_uses)))
+    for uid, use in changed_uses:
+        db.session.execute(
+            technique_mitigation_map.update().where(technique_mitigation_map.c.uid == uid).values(use=use)
+        )
+    db_create.util.copy_rows(technique_mitigation_map, added_uses)
+    if removed_mit_uids:
+        db.session.execute(Mitigation.__table__.delete().where(Mitigation.uid.in_(removed_mit_uids)))
+
+    print(
+        f"    Mitigations: {len(added_mits)} added, {len(removed_mit_uids)} removed, {len(changed_mits)} changed"
+        f" | Uses: {len(added_uses)} added, {len(removed_uses)} removed, {len(changed_uses)} changed"
+    )
+    return any((added_mits, changed_mits, removed_mit_uids, added_uses, removed_uses, changed_uses))
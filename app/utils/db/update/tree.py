@@ -0,0 +1,58 @@
+from app.models import db, Tactic, Technique, tactic_technique_map
+
+from app.utils.db.util import messaged_timer
+
+
+@messaged_timer("Applying Tree (question / answer) changes")
+def apply_version(version, src_mgr):
+    # returns the tree nodes whose answer cards changed ("start", Tactic IDs, base Technique IDs)
+    tree_qna = src_mgr.tree[version].get_data()
+    touched_nodes = set()
+
+    # Tactics - always have tree content
+    tactic_updates = []
+    for uid, tact_id, question, answer in db.session.query(
+        Tactic.uid, Tactic.tact_id, Tactic.tact_question, Tactic.tact_answer
+    ).filter(Tactic.attack_version == version):
+        if tact_id not in tree_qna:
+            continue
+        new_question, new_answer = tree_qna[tact_id]["question"], tree_qna[tact_id]["answer"]
+        if (new_question, new_answer) != (question, answer):
+            tactic_updates.append({"uid": uid, "tact_question": new_question, "tact_answer": new_answer})
+            touched_nodes.add("start")
+
+    # (Sub)Techniques - content is None when absent from the tree
+    technique_updates = []
+    touched_base_uids = []
+    for uid, tech_id, question, answer in db.session.query(
+        Technique.uid, Technique.tech_id, Technique.tech_question, Technique.tech_answer
+    ).filter(Technique.attack_version == version):
+        entry = tree_qna.get(tech_id)
+        new_question = entry["question"] if entry else None
+        new_answer = entry["answer"] if entry else None
+        if (new_question, new_answer) == (question, answer):
+            continue
+
+        technique_updates.append({"uid": uid, "tech_question": new_question, "tech_answer": new_answer})
+
+        # card of a Sub is shown at its base, a base's card at its Tactics (and it is the node of its Subs' cards)
+        if "." in tech_id:
+            touched_nodes.add(tech_id.split(".")[0])
+        else:
+            touched_nodes.add(tech_id)
+            touched_base_uids.append(uid)
+
+    if touched_base_uids:
+        touched_nodes.update(
+            tact_id
+            for (tact_id,) in db.session.query(Tactic.tact_id)
+            .join(tactic_technique_map, tactic_technique_map.c.tactic == Tactic.uid)
+            .filter(tactic_technique_map.c.technique.in_(touched_base_uids))
+            .distinct()
+        )
+
+    db.session.bulk_update_mappings(Tactic, tactic_updates)
+    db.session.bulk_update_mappings(Technique, technique_updates)
+    print(f"    {len(tactic_updates)} Tactics and {len(technique_updates)} Techniques changed")
+
+    return touched_nodes
@@ -0,0 +1,131 @@
+# standalone script to measure throughput / latency of a running Decider at increasing client concurrency
+# - no app imports needed: plain HTTP GETs against a mix of navigation, API, and full search routes
+# - rerun it with the server at different DECIDER_PROCESSES / DECIDER_THREADS to see throughput scale with workers
+# - --compare-encoding instead reports bytes on the wire of each route / large static asset, by Accept-Encoding
+# - usage: python -m app.utils.load_test --base-url https://localhost --version v14.0 --concurrency 1,2,4,8 --insecure
+#   - non-kiosk servers need a logged-in session: pass its cookie via --cookie "session=..."
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import argparse
+import itertools
+import ssl
+import statistics
+import time
+
+
+def request_paths(version, search):
+    """Returns the GET paths cycled through - cheap navigation clicks interleaved with heavier API calls"""
+    return [
+        f"/question/{version}",
+        "/api/answers/?" + urlencode({"index": "start", "version": version}),
+        "/api/answers/?" + urlencode({"index": "TA0001", "version": version}),
+        "/api/techniques?" + urlencode({"version": version}),
+        "/search/full?" + urlencode({"version": version, "search": search}),
+    ]
+
+
+# large static assets - served as their pre-compressed siblings (app/utils/compress_static.py)
+STATIC_PATHS = [
+    "/static/user-guide.html",
+    "/static/css/lib/bootstrap-5.3.0/bootstrap.min.css",
+    "/static/js/lib/bootstrap-bundle-5.3.0/bootstrap.bundle.min.js",
+    "/static/js/lib/docx-8.0.4/docx-8.0.4.js",
+    "/static/js/lib/minisearch-6.1.0/minisearch-6.1.0.min.js",
+]
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def fetch(url, headers, context):
+    """GETs url, returns (seconds taken, body bytes received, HTTP status)"""
+    t0 = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), context=context) as response:
+            body = response.read()
+            status = response.status
+    # 4xx / 5xx (e.g. 503 under load) are counted, not fatal to the run
+    except HTTPError as err:
+        body = err.read()
+        status = err.code
+    return time.perf_counter() - t0, len(body), status
+
+
+def run_level(base_url, paths, concurrency, num_requests, headers, context):
+    """Runs num_requests GETs (cycling paths) with concurrency clients, returns (wall seconds, per-request results)"""
+    urls = [base_url + path for path in itertools.islice(itertools.cycle(paths), num_requests)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda url: fetch(url, headers, context), urls))
+    return time.perf_counter() - t0, results
+
+
+def compare_encodings(base_url, paths, headers, context):
+    """Prints the bytes received for each path when requested with each of ENCODINGS
+
+    - urllib doesn't decode responses, so the body size is what was sent on the wire
+    - the Content-Encoding actually used is shown, as a server may not support every encoding
+    """
+    print(f"Bytes on the wire by Accept-Encoding against {base_url}:")
+    print(f"    {'path':<64} | " + " | ".join(f"{encoding:>18}" for encoding in ENCODINGS))
+    for path in paths:
+        cells = []
+        for encoding in ENCODINGS:
+            request = Request(base_url + path, headers={**headers, "Accept-Encoding": encoding})
+            with urlopen(request, context=context) as response:
+                size = len(response.read())
+                used = response.headers.get("Content-Encoding", "identity")
+            cells.append(f"{size / 1024:>8.1f} KiB {used:>8}")
+        print(f"    {path[:64]:<64} | " + " | ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser("Measures request throughput / latency of a running Decider by concurrency.")
+    parser.add_argument("--base-url", default="https://localhost", help="Scheme + host (+ port) of the server.")
+    parser.add_argument("--version", required=True, help="ATT&CK version to request pages / APIs of (e.g. v14.0).")
+    parser.add_argument("--search", default="process injection", help="Query used for the full search requests.")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated client concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests sent per concurrency level.")
+    parser.add_argument("--cookie", help="Cookie header to send (session of a logged-in user for non-kiosk servers).")
+    parser.add_argument("--insecure", action="store_true", help="Skip TLS certificate verification (self-signed).")
+    parser.add_argument("--gzip", action="store_true", help="Accept gzip-encoded responses in the load test.")
+    parser.add_argument(
+        "--compare-encoding", action="store_true", help="Report bytes on the wire by Accept-Encoding instead."
+    )
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    paths = request_paths(args.version, args.search)
+    headers = {"Cookie": args.cookie} if args.cookie else {}
+    context = ssl._create_unverified_context() if args.insecure else None
+    base_url = args.base_url.rstrip("/")
+
+    if args.compare_encoding:
+        compare_encodings(base_url, paths + STATIC_PATHS, headers, context)
+        return
+
+    if args.gzip:
+        headers["Accept-Encoding"] = "gzip"
+
+    # warm the workers' per-version caches so the first level isn't charged for loading them
+    run_level(base_url, paths, max(levels), len(paths) * max(levels), headers, context)
+
+    print(f"{args.requests} requests per level against {base_url}:")
+    print(f"    {'clients':>7} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'KiB recv':>10} | non-200")
+    for concurrency in levels:
+        elapsed, results = run_level(base_url, paths, concurrency, args.requests, headers, context)
+        latencies_ms = sorted(seconds * 1000 for seconds, _, _ in results)
+        p95_ms = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))]
+        kib = sum(size for _, size, _ in results) / 1024
+        non_ok = sum(1 for _, _, status in results if status != 200)
+        print(
+            f"    {concurrency:>7} | {len(results) / elapsed:>8.1f} | {statistics.median(latencies_ms):>8.1f} | "
+            f"{p95_ms:>8.1f} | {kib:>10.1f} | {non_ok}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@ from sqlalchemy_utils.types.encrypted.encrypted_type import InvalidCiphertextErr
 
 from sqlalchemy.exc import OperationalError as SQLAlchOperationalError
 from psycopg2 import OperationalError as psycopgOperationalError
-from app.routes.utils import ErrorDuringRoute, ErrorDuringHTMLRoute
+from app.routes.utils import ErrorDuringRoute, ErrorDuringHTMLRoute, markdown_cache
 
 from app.models import AttackVersion, db, User
 
@@ -23,7 +23,7 @@ from app.routes.auth import auth_, oauth_setup
 from app.routes.profile import profile_
 from app.routes.question import question_
 from app.routes.search import search_
-from app.routes.utils_db import VersionPicker
+from app.routes.utils_db import VersionPicker, GZIP_ETAG_SUFFIX
 from app.routes.edit import edit_
 from app.routes.docs import docs_
 from app.routes.admin import admin_
@@ -43,6 +43,8 @@ import sys
 import importlib
 import json
 import traceback
+import gzip
+import zlib
 
 from app.version import DECIDER_APP_VERSION
 
@@ -53,6 +55,8 @@ FRONTEND_CONF = dict(
     classification_level="",
     classification_message="",
     use_cdn_resources=False,
+    compress_responses=True,
+    compress_min_bytes=1024,
 )
 with open("config/frontend.json", "rt") as fh:
     try:
@@ -125,6 +129,16 @@ def app_setup(config):
     return app
 
 
+def render_cache_setup(app):
+    """Sizes the rendered-markdown cache (and points it to a shared directory if configured)"""
+
+    markdown_cache.configure(
+        max_entries=app.config["MARKDOWN_CACHE_SIZE"],
+        shared_dir=app.config["MARKDOWN_CACHE_DIR"],
+        max_shared_files=app.config["MARKDOWN_CACHE_DIR_MAX_FILES"],
+    )
+
+
 def security_setup(app):
     """Sets up CSRF protection and login settings"""
 
@@ -141,6 +155,89 @@ def security_setup(app):
         return User.query.filter_by(session_token=session_token).first()
 
 
+def fork_safety_setup(app):
+    """Makes state inherited by forked workers safe to use (uWSGI lazy-apps = false loads the app, then forks)
+
+    - connections opened before the fork would be shared by all workers: each child drops its inherited pool
+      (close=False leaves the parent's sockets alone) and opens its own connections on demand
+    - in-process caches / their locks handle the fork themselves (app/domain/content_generation.py, routes/utils.py)
+    - under uWSGI, at-fork hooks only run with py-call-osafterfork = true (see uwsgi.ini)
+    """
+
+    def dispose_inherited_pools():
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+    os.register_at_fork(after_in_child=dispose_inherited_pools)
+
+
+# dynamic response compression (see compression_setup)
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html")
+COMPRESS_LEVEL = 6
+
+
+def gzip_stream(chunks):
+    """Gzips a streamed response body chunk-by-chunk, closing the original body afterwards"""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def compression_setup(app):
+    """Gzips JSON / HTML responses for clients that accept it - toggled by compress_responses in config/frontend.json
+
+    - buffered bodies are compressed when at least compress_min_bytes long (smaller ones gain nothing)
+    - streamed bodies (e.g. /api/techniques) have no known length, they're always compressed as they stream
+    - static files aren't touched: uWSGI serves their pre-compressed siblings (app/utils/compress_static.py)
+    - a strong ETag gets GZIP_ETAG_SUFFIX, as the gzip body is a different representation than the identity one
+      (generation_cached accepts both forms in If-None-Match)
+    - responses carrying a CSRF token (every page built on base.html, login / password forms) are never compressed:
+      compressing a secret alongside user-reflected input (e.g. a search query) is the BREACH attack setup
+    """
+    if not FRONTEND_CONF["compress_responses"]:
+        return
+
+    min_bytes = FRONTEND_CONF["compress_min_bytes"]
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES) or response.direct_passthrough:
+            return response
+        response.vary.add("Accept-Encoding")
+
+        if (
+            (request.accept_encodings["gzip"] <= 0)
+            or (response.status_code < 200)
+            or (response.status_code in (204, 304))
+            or ("Content-Encoding" in response.headers)
+            or (current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token") in g)
+        ):
+            return response
+
+        if response.is_streamed:
+            response.response = gzip_stream(response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_bytes:
+                return response
+            response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+
+        response.headers["Content-Encoding"] = "gzip"
+        etag, weak = response.get_etag()
+        if (etag is not None) and not weak:
+            response.set_etag(etag + GZIP_ETAG_SUFFIX)
+        return response
+
+
 def register_blueprints(app):
     """Register application blueprints"""
     app.register_blueprint(auth_)
@@ -206,7 +303,9 @@ def dev_mode(app):
 
     @app.after_request
     def after_request(response):
-        response.cache_control.max_age = 1
+        # responses with an ETag already tell clients to revalidate, keep them 304-able
+        if response.get_etag()[0] is None:
+            response.cache_control.max_age = 1
         return response
 
     @identity_loaded.connect_via(app)
@@ -410,10 +509,13 @@ def error_handlers(app):
 def create_app(config):
     logger.debug("Creating the App.")
     app = app_setup(config)
+    render_cache_setup(app)
 
     Principal(app)
     security_setup(app)
     db.init_app(app)
+    fork_safety_setup(app)
+    compression_setup(app)
     register_blueprints(app)
     set_mode(app)
     context_setup(app)